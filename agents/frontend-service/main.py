@@ -4,8 +4,9 @@ import io
 import json
 import uuid
 import base64
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Form
 from fastapi.responses import JSONResponse, StreamingResponse, HTMLResponse
 from pydantic import BaseModel
 from datetime import datetime
@@ -17,7 +18,16 @@ from google.cloud import texttospeech
 from google.cloud import storage
 from google.cloud import pubsub_v1
 
-app = FastAPI(title="Financial Reports - Frontend API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """One pooled HTTP client for the lifetime of the process (see create_http_client)"""
+    global http_client
+    http_client = create_http_client()
+    yield
+    await http_client.aclose()
+    http_client = None
+
+app = FastAPI(title="Financial Reports - Frontend API", lifespan=lifespan)
 
 # Configuration
 PROJECT_ID = os.getenv("PROJECT_ID", "financial-reports-ai-2024")
@@ -30,6 +40,83 @@ LOGIC_AGENT_URL = os.getenv("LOGIC_AGENT_URL", "https://logic-understanding-agen
 REPORT_READER_URL = os.getenv("REPORT_READER_URL", "http://report-reader-agent:8081")
 ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "https://orchestrator-agent-eu66elwpia-uc.a.run.app")
 
+# Normalization and column profiling after upload may parse every sheet of the file
+PROFILE_TIMEOUT_SECONDS = float(os.getenv("PROFILE_TIMEOUT_SECONDS", "300"))
+
+# One keep-alive pool for calls to other agents; HTTP/2 if h2 is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+
+# Read timeouts per target agent
+LOGIC_AGENT_TIMEOUT = httpx.Timeout(120.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+FEEDBACK_TIMEOUT = httpx.Timeout(30.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)  # No model call
+REPORT_READER_TIMEOUT = httpx.Timeout(PROFILE_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+class ConnectionMetrics:
+    """Requests and newly opened connections per target host"""
+    
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.connections: Dict[str, int] = {}
+    
+    async def on_request(self, request: httpx.Request):
+        host = request.url.host
+        self.requests[host] = self.requests.get(host, 0) + 1
+        
+        async def trace(event_name: str, info: Dict):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections[host] = self.connections.get(host, 0) + 1
+        
+        request.extensions = {**request.extensions, "trace": trace}
+    
+    def stats(self) -> Dict:
+        return {
+            host: {
+                "requests": requests,
+                "new_connections": self.connections.get(host, 0),
+                "reused_connections": requests - self.connections.get(host, 0)
+            }
+            for host, requests in self.requests.items()
+        }
+
+http_metrics = ConnectionMetrics()
+http_client: Optional[httpx.AsyncClient] = None
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        event_hooks={"request": [http_metrics.on_request]}
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client (created on first use when the lifespan handler did not run)"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+def http_pool_stats() -> Dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "targets": http_metrics.stats()
+    }
+
 # Initialize Google Cloud clients
 try:
     speech_client = speech.SpeechClient()
@@ -597,7 +684,8 @@ async def health_check():
             "chat": True,
             "user_feedback": True,  # NEW
             "regenerate": True  # NEW
-        }
+        },
+        "http_pool": http_pool_stats()
     }
 
 @app.post("/chat")
@@ -609,32 +697,33 @@ async def chat_with_ai(request: ChatRequest):
             context["file_path"] = request.file_id
         if request.conversation_id:
             context["conversation_id"] = request.conversation_id
-        
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{LOGIC_AGENT_URL}/analyze",
-                json={
-                    "query": request.message,
-                    "context": context
-                }
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"AI agent failed: {response.text}"
-                )
-            
-            result = response.json()
-            conv_id = request.conversation_id or f"conv_{datetime.utcnow().timestamp()}"
-            
-            return ChatResponse(
-                response=result.get("insights", "Извините, не могу обработать запрос"),
-                conversation_id=conv_id,
-                timestamp=datetime.utcnow().isoformat(),
-                request_id=result.get("request_id"),  # NEW: pass request_id from Logic Agent
-                file_context={"file_id": request.file_id} if request.file_id else None
+
+        client = get_http_client()
+        response = await client.post(
+            f"{LOGIC_AGENT_URL}/analyze",
+            json={
+                "query": request.message,
+                "context": context
+            },
+            timeout=LOGIC_AGENT_TIMEOUT
+        )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"AI agent failed: {response.text}"
             )
+
+        result = response.json()
+        conv_id = request.conversation_id or f"conv_{datetime.utcnow().timestamp()}"
+
+        return ChatResponse(
+            response=result.get("insights", "Извините, не могу обработать запрос"),
+            conversation_id=conv_id,
+            timestamp=datetime.utcnow().isoformat(),
+            request_id=result.get("request_id"),  # NEW: pass request_id from Logic Agent
+            file_context={"file_id": request.file_id} if request.file_id else None
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
@@ -642,19 +731,20 @@ async def chat_with_ai(request: ChatRequest):
 async def submit_feedback(request: FeedbackRequest):
     """Proxy feedback to Logic Agent"""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{LOGIC_AGENT_URL}/feedback",
-                json=request.dict()
+        client = get_http_client()
+        response = await client.post(
+            f"{LOGIC_AGENT_URL}/feedback",
+            json=request.dict(),
+            timeout=FEEDBACK_TIMEOUT
+        )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Feedback submission failed: {response.text}"
             )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Feedback submission failed: {response.text}"
-                )
-            
-            return response.json()
+
+        return response.json()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Feedback failed: {str(e)}")
 
@@ -662,32 +752,66 @@ async def submit_feedback(request: FeedbackRequest):
 async def regenerate_response(request: RegenerateRequest):
     """Proxy regenerate request to Logic Agent"""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{LOGIC_AGENT_URL}/regenerate",
-                json=request.dict()
+        client = get_http_client()
+        response = await client.post(
+            f"{LOGIC_AGENT_URL}/regenerate",
+            json=request.dict(),
+            timeout=LOGIC_AGENT_TIMEOUT
+        )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Regenerate failed: {response.text}"
             )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Regenerate failed: {response.text}"
-                )
-            
-            result = response.json()
-            
-            # Return in same format as chat
-            return {
-                "response": result.get("insights", "Извините, не могу обработать запрос"),
-                "request_id": result.get("request_id"),
-                "timestamp": datetime.utcnow().isoformat()
-            }
+
+        result = response.json()
+
+        # Return in same format as chat
+        return {
+            "response": result.get("insights", "Извините, не могу обработать запрос"),
+            "request_id": result.get("request_id"),
+            "timestamp": datetime.utcnow().isoformat()
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Regenerate failed: {str(e)}")
 
+async def trigger_file_normalization(file_path: str):
+    """Ask the Report Reader to convert an uploaded workbook to its columnar format"""
+    if not file_path.endswith(('.xlsx', '.xls')):
+        return
+    try:
+        client = get_http_client()
+        response = await client.post(
+            f"{REPORT_READER_URL}/normalize",
+            json={"file_path": file_path, "bucket": REPORTS_BUCKET},
+            timeout=REPORT_READER_TIMEOUT
+        )
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Warning: Normalization failed for {file_path}: {e}")
+
+async def trigger_file_profile(file_path: str, owner: Optional[str] = None):
+    """Ask the Report Reader to ingest a file: fingerprint it against the owner's
+    previous version of the report and store its column profile"""
+    try:
+        client = get_http_client()
+        response = await client.post(
+            f"{REPORT_READER_URL}/ingest",
+            json={"file_path": file_path, "bucket": REPORTS_BUCKET, "owner": owner},
+            timeout=REPORT_READER_TIMEOUT
+        )
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Warning: Profiling failed for {file_path}: {e}")
+
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """Upload file to Cloud Storage and trigger orchestration via Pub/Sub"""
+async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                      user_id: Optional[str] = Form(None)):
+    """Upload file to Cloud Storage and trigger orchestration via Pub/Sub
+    
+    Column profiling starts in the background right after the upload.
+    """
     try:
         if not storage_available:
             raise HTTPException(status_code=503, detail="Cloud Storage not available")
@@ -722,6 +846,11 @@ async def upload_file(file: UploadFile = File(...)):
         future = publisher.publish(tasks_topic_path, message_bytes)
         message_id = future.result()
         
+        # Background tasks run in order: ingest then reads the normalized copy.
+        # Runs after the response: the service is deployed with CPU always allocated
+        background_tasks.add_task(trigger_file_normalization, file_path)
+        background_tasks.add_task(trigger_file_profile, file_path, user_id)
+        
         return {
             "status": "success",
             "file_id": file_path,
@@ -9,9 +9,10 @@ import os
 import logging
 import asyncio
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Optional, Dict
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import vertexai
@@ -36,9 +37,20 @@ from google.api_core import exceptions as google_exceptions
 from prompts import (
     build_super_prompt,
     build_sheet_analysis_prompt,
-    extract_sheet_name_from_user_response
+    extract_sheet_name_from_user_response,
+    format_profile_summary
 )
 
+from response_decoding import accept_header, decode_response
+from request_store import (
+    FirestoreRequestBackend,
+    InMemoryRequestBackend,
+    LocalRequestStore,
+    RequestStore
+)
+from metadata_cache import MetadataCache
+from response_cache import ResponseCache, Scope, prompt_version
+
 # Session 21: Import signed URL helper for IAM signBlob API
 from signed_url_helper import generate_signed_url_v4
 
@@ -46,7 +58,16 @@ from signed_url_helper import generate_signed_url_v4
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Logic Understanding Agent - Marketplace Expert")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """One pooled HTTP client for the lifetime of the process (see create_http_client)"""
+    global http_client
+    http_client = create_http_client()
+    yield
+    await http_client.aclose()
+    http_client = None
+
+app = FastAPI(title="Logic Understanding Agent - Marketplace Expert", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -62,6 +83,88 @@ PROJECT_ID = os.getenv("PROJECT_ID", "financial-reports-ai-2024")
 LOCATION = os.getenv("REGION", "us-central1")
 REPORT_READER_URL = os.getenv("REPORT_READER_URL", "https://report-reader-agent-38390150695.us-central1.run.app")
 
+# Normalization and column profiling run once per upload and may parse every sheet
+PROFILE_TIMEOUT_SECONDS = float(os.getenv("PROFILE_TIMEOUT_SECONDS", "300"))
+
+# Workbooks with more sheets than this start with sheet selection
+MULTI_SHEET_THRESHOLD = 5
+
+# Encoding of Report Reader read responses: json | arrow | msgpack
+READER_RESPONSE_FORMAT = os.getenv("READER_RESPONSE_FORMAT", "json")
+
+# One keep-alive pool for calls to other agents; HTTP/2 if h2 is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+
+# Read timeouts per target agent
+REPORT_READER_TIMEOUT = httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+REPORT_READER_PROFILE_TIMEOUT = httpx.Timeout(PROFILE_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+class ConnectionMetrics:
+    """Requests and newly opened connections per target host"""
+    
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.connections: Dict[str, int] = {}
+    
+    async def on_request(self, request: httpx.Request):
+        host = request.url.host
+        self.requests[host] = self.requests.get(host, 0) + 1
+        
+        async def trace(event_name: str, info: Dict):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections[host] = self.connections.get(host, 0) + 1
+        
+        request.extensions = {**request.extensions, "trace": trace}
+    
+    def stats(self) -> Dict:
+        return {
+            host: {
+                "requests": requests,
+                "new_connections": self.connections.get(host, 0),
+                "reused_connections": requests - self.connections.get(host, 0)
+            }
+            for host, requests in self.requests.items()
+        }
+
+http_metrics = ConnectionMetrics()
+http_client: Optional[httpx.AsyncClient] = None
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        event_hooks={"request": [http_metrics.on_request]}
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client (created on first use when the lifespan handler did not run)"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+def http_pool_stats() -> Dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "targets": http_metrics.stats()
+    }
+
 # GCS Configuration for file uploads (Session 20: Bug #2 Fix)
 REPORTS_BUCKET = os.getenv("REPORTS_BUCKET", "financial-reports-ai-2024-reports")
 
@@ -175,8 +278,22 @@ def get_cached_system_prompt() -> str:
     
     return _cached_prompt
 
-# In-memory cache for request data (for regenerate functionality and multi-sheet context)
-_request_cache: Dict[str, Dict] = {}
+# Prompt/response of recent requests (for feedback, regenerate and multi-sheet
+# context): bounded in-process LRU plus a shared backend across instances
+REQUEST_STORE_MAX_MB = int(os.getenv("REQUEST_STORE_MAX_MB", "64"))
+REQUEST_STORE_TTL_SECONDS = float(os.getenv("REQUEST_STORE_TTL_SECONDS", str(24 * 3600)))
+REQUEST_STORE_BACKEND = os.getenv("REQUEST_STORE_BACKEND", "firestore")  # firestore | memory | none
+REQUEST_STORE_COLLECTION = os.getenv("REQUEST_STORE_COLLECTION", "request_cache")
+
+# Answers to repeated questions about the same file generation and prompt
+# version; RESPONSE_CACHE_SIMILARITY = 0 matches identical questions only
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.9"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(6 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
+# Report Reader metadata per (file, GCS generation) for follow-up turns
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "256"))
 
 class AnalyzeRequest(BaseModel):
     query: str
@@ -222,6 +339,7 @@ class UploadCompleteRequest(BaseModel):
     """Request model for upload completion notification (Session 20)"""
     file_id: str
     file_path: str
+    user_id: Optional[str] = None  # Re-uploads of a user's report are ingested incrementally
 
 # Session 19 Priority 1: Retry configuration for Report Reader calls
 # Retries on network errors, timeouts, and HTTP errors (except 4xx client errors)
@@ -252,6 +370,24 @@ FIRESTORE_RETRY_POLICY = google_retry.Retry(
     )
 )
 
+if REQUEST_STORE_BACKEND == "firestore":
+    _request_backend = FirestoreRequestBackend(db, REQUEST_STORE_COLLECTION,
+                                               retry=FIRESTORE_RETRY_POLICY)
+elif REQUEST_STORE_BACKEND == "memory":
+    _request_backend = InMemoryRequestBackend()
+else:
+    _request_backend = None
+
+request_store = RequestStore(
+    LocalRequestStore(REQUEST_STORE_MAX_MB * 1024 * 1024, REQUEST_STORE_TTL_SECONDS),
+    _request_backend
+)
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS,
+                               RESPONSE_CACHE_SIMILARITY)
+
+metadata_cache = MetadataCache(METADATA_CACHE_MAX_ENTRIES)
+
 async def generate_with_timeout(model, prompt: str, max_retries: int = 3):
     """Generate AI response with explicit timeout and retry logic
     
@@ -322,7 +458,92 @@ async def generate_with_timeout(model, prompt: str, max_retries: int = 3):
                 detail="An error occurred during AI analysis. Please try again."
             )
 
-async def get_file_metadata(file_path: str) -> Dict:
+async def fetch_file_overview(file_path: str) -> Dict:
+    """Metadata, stored profile and first-sheet preview in one Report Reader call"""
+    
+    @REPORT_READER_RETRY_POLICY
+    async def _fetch_with_retry():
+        """Inner function with retry decorator"""
+        endpoint = f"{REPORT_READER_URL}/analyze/overview"
+        payload = {"file_path": file_path, "max_preview_sheets": MULTI_SHEET_THRESHOLD}
+        
+        client = get_http_client()
+        response = await client.post(endpoint, json=payload, timeout=REPORT_READER_TIMEOUT)
+        
+        # Don't retry on 4xx client errors (404 = Report Reader without /analyze/overview)
+        if 400 <= response.status_code < 500:
+            return {"error": f"Client error: {response.status_code}"}
+        
+        response.raise_for_status()
+        return response.json()
+    
+    try:
+        return await _fetch_with_retry()
+    except Exception as e:
+        logger.warning(f"⚠️ Overview not available for {file_path}: {str(e)}")
+        return {"error": f"Failed to fetch overview: {str(e)}"}
+
+async def get_file_overview(file_path: str, generation: Optional[int] = None) -> Dict:
+    """Metadata (Excel only), profile and preview of a file for /analyze
+    
+    A first question about a file is answered from one /analyze/overview
+    call instead of metadata -> profile -> read in sequence; concurrent
+    first questions share that call (see metadata_cache.py). Follow-up
+    turns already have the metadata cached; they, and Report Readers
+    without /analyze/overview, fetch metadata and profile concurrently and
+    leave the preview (None) to read_file_from_storage. "generation" is the
+    one the overview reports, else the one passed in.
+    """
+    is_excel = file_path.endswith(('.xlsx', '.xls'))
+    cached = is_excel and generation is not None and metadata_cache.peek(file_path, generation)
+    
+    if not cached:
+        overview = await metadata_cache.get_overview(file_path, generation,
+                                                     lambda: fetch_file_overview(file_path))
+        if "error" not in overview:
+            return {
+                "generation": overview.get("generation", generation),
+                "metadata": overview["metadata"],
+                "profile": overview["profile"] or {"error": "Profile not ready"},
+                "preview": overview["preview"]
+            }
+    
+    if is_excel:
+        metadata, profile = await asyncio.gather(get_file_metadata(file_path, generation),
+                                                 get_file_profile(file_path))
+    else:
+        metadata, profile = None, await get_file_profile(file_path)
+    return {"generation": generation, "metadata": metadata, "profile": profile, "preview": None}
+
+async def prefetch_file_overview(file_path: str) -> Dict:
+    """Overview fetched for the last generation seen, while the current one is looked up"""
+    return await get_file_overview(file_path, metadata_cache.generation(file_path))
+
+async def get_file_generation(file_path: str) -> Optional[int]:
+    """GCS generation of a file (changes on every re-upload), None if unknown"""
+    if storage_bucket is None:
+        return None
+    try:
+        blob = await asyncio.to_thread(storage_bucket.get_blob, file_path)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not get generation of {file_path}: {str(e)}")
+        return None
+    return blob.generation if blob is not None else None
+
+async def get_file_metadata(file_path: str, generation: Optional[int] = None) -> Dict:
+    """Metadata of an Excel file, fetched once per GCS generation
+    
+    Follow-up turns about the same file reuse the cached result; concurrent
+    requests share one fetch (see metadata_cache.py).
+    """
+    if generation is None:
+        generation = await get_file_generation(file_path)
+    if generation is None:
+        return await fetch_file_metadata(file_path)
+    return await metadata_cache.get(file_path, generation,
+                                    lambda: fetch_file_metadata(file_path))
+
+async def fetch_file_metadata(file_path: str) -> Dict:
     """Get metadata for Excel file (all sheets) using Report Reader
     
     Session 19: Enhanced with retry logic (3 attempts with exponential backoff)
@@ -337,19 +558,19 @@ async def get_file_metadata(file_path: str) -> Dict:
         
         logger.info(f"Fetching metadata for file: {file_path}")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(endpoint, json=payload)
+        client = get_http_client()
+        response = await client.post(endpoint, json=payload, timeout=REPORT_READER_TIMEOUT)
             
-            # Don't retry on 4xx client errors (bad request, not found, etc.)
-            if 400 <= response.status_code < 500:
-                logger.error(f"❌ Client error (no retry): {response.status_code}")
-                return {"error": f"Client error: {response.status_code}"}
+        # Don't retry on 4xx client errors (bad request, not found, etc.)
+        if 400 <= response.status_code < 500:
+            logger.error(f"❌ Client error (no retry): {response.status_code}")
+            return {"error": f"Client error: {response.status_code}"}
             
-            # Raise for 5xx errors to trigger retry
-            response.raise_for_status()
+        # Raise for 5xx errors to trigger retry
+        response.raise_for_status()
             
-            logger.info(f"✅ Metadata fetched successfully")
-            return response.json()
+        logger.info(f"✅ Metadata fetched successfully")
+        return response.json()
     
     try:
         return await _fetch_with_retry()
@@ -360,10 +581,12 @@ async def get_file_metadata(file_path: str) -> Dict:
         logger.error(f"❌ Failed to fetch metadata after retries: {str(e)}")
         return {"error": f"Failed to fetch metadata: {str(e)}"}
 
-async def read_specific_sheet(file_path: str, sheet_name: str) -> Dict:
+async def read_specific_sheet(file_path: str, sheet_name: str,
+                              response_format: str = READER_RESPONSE_FORMAT) -> Dict:
     """Read specific sheet using Report Reader
     
     Session 19: Enhanced with retry logic (3 attempts with exponential backoff)
+    response_format: json, arrow or msgpack; the result is the same dict
     """
     
     @REPORT_READER_RETRY_POLICY
@@ -377,19 +600,21 @@ async def read_specific_sheet(file_path: str, sheet_name: str) -> Dict:
         
         logger.info(f"Reading sheet '{sheet_name}' from file: {file_path}")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(endpoint, json=payload)
+        client = get_http_client()
+        response = await client.post(endpoint, json=payload,
+                                     headers={"Accept": accept_header(response_format)},
+                                     timeout=REPORT_READER_TIMEOUT)
             
-            # Don't retry on 4xx client errors
-            if 400 <= response.status_code < 500:
-                logger.error(f"❌ Client error (no retry): {response.status_code}")
-                return {"error": f"Client error: {response.status_code}"}
+        # Don't retry on 4xx client errors
+        if 400 <= response.status_code < 500:
+            logger.error(f"❌ Client error (no retry): {response.status_code}")
+            return {"error": f"Client error: {response.status_code}"}
             
-            # Raise for 5xx errors to trigger retry
-            response.raise_for_status()
+        # Raise for 5xx errors to trigger retry
+        response.raise_for_status()
             
-            logger.info(f"✅ Sheet '{sheet_name}' read successfully")
-            return response.json()
+        logger.info(f"✅ Sheet '{sheet_name}' read successfully")
+        return decode_response(response)
     
     try:
         return await _read_with_retry()
@@ -400,10 +625,12 @@ async def read_specific_sheet(file_path: str, sheet_name: str) -> Dict:
         logger.error(f"❌ Failed to read sheet after retries: {str(e)}")
         return {"error": f"Failed to read sheet: {str(e)}"}
 
-async def read_file_from_storage(file_path: str) -> Dict:
+async def read_file_from_storage(file_path: str,
+                                 response_format: str = READER_RESPONSE_FORMAT) -> Dict:
     """Read file using report-reader-agent (reads first sheet only)
     
     Session 19: Enhanced with retry logic (3 attempts with exponential backoff)
+    response_format: json, arrow or msgpack; the result is the same dict
     """
     
     @REPORT_READER_RETRY_POLICY
@@ -414,19 +641,21 @@ async def read_file_from_storage(file_path: str) -> Dict:
         
         logger.info(f"Reading file from storage: {file_path}")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(endpoint, json=payload)
+        client = get_http_client()
+        response = await client.post(endpoint, json=payload,
+                                     headers={"Accept": accept_header(response_format)},
+                                     timeout=REPORT_READER_TIMEOUT)
             
-            # Don't retry on 4xx client errors
-            if 400 <= response.status_code < 500:
-                logger.error(f"❌ Client error (no retry): {response.status_code}")
-                return {"error": f"Client error: {response.status_code}"}
+        # Don't retry on 4xx client errors
+        if 400 <= response.status_code < 500:
+            logger.error(f"❌ Client error (no retry): {response.status_code}")
+            return {"error": f"Client error: {response.status_code}"}
             
-            # Raise for 5xx errors to trigger retry
-            response.raise_for_status()
+        # Raise for 5xx errors to trigger retry
+        response.raise_for_status()
             
-            logger.info(f"✅ File read successfully: {file_path}")
-            return response.json()
+        logger.info(f"✅ File read successfully: {file_path}")
+        return decode_response(response)
     
     try:
         return await _read_with_retry()
@@ -437,6 +666,111 @@ async def read_file_from_storage(file_path: str) -> Dict:
         logger.error(f"❌ Failed to read file after retries: {str(e)}")
         return {"error": f"Failed to read file: {str(e)}"}
 
+async def get_file_profile(file_path: str) -> Dict:
+    """Get the precomputed column profile of a file (never computes one)
+    
+    Returns {"error": ...} if the profile is not ready yet, so callers fall
+    back to reading the file.
+    """
+    
+    @REPORT_READER_RETRY_POLICY
+    async def _fetch_with_retry():
+        """Inner function with retry decorator"""
+        endpoint = f"{REPORT_READER_URL}/profile"
+        payload = {"file_path": file_path, "compute": False}
+        
+        client = get_http_client()
+        response = await client.post(endpoint, json=payload, timeout=30.0)
+            
+        # Don't retry on 4xx client errors (404 = no profile yet)
+        if 400 <= response.status_code < 500:
+            return {"error": f"Client error: {response.status_code}"}
+            
+        response.raise_for_status()
+        return response.json()
+    
+    try:
+        return await _fetch_with_retry()
+    except Exception as e:
+        logger.warning(f"⚠️ Profile not available for {file_path}: {str(e)}")
+        return {"error": f"Failed to fetch profile: {str(e)}"}
+
+def response_cache_scope(system_instruction: str, file_path: Optional[str],
+                         generation: Optional[int],
+                         sheet_name: Optional[str] = None) -> Optional[Scope]:
+    """Response cache scope of a question, None if the answer must not be cached"""
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    version = prompt_version(system_instruction)
+    if file_path is None:
+        return (version, None, None, None)
+    if generation is None:
+        return None
+    return (version, file_path, generation, sheet_name)
+
+async def cached_analysis(scope: Optional[Scope], query: str, request_id: str,
+                          entry: Dict) -> Optional[AnalyzeResponse]:
+    """Cached answer to a repeated question, stored under a new request_id"""
+    if scope is None:
+        return None
+    cached = response_cache.lookup(scope, query)
+    if cached is None:
+        return None
+    value, match = cached
+    logger.info(f"♻️ Answer from response cache ({match}): {query[:50]}")
+    
+    # Feedback and regenerate work on cached answers as well
+    await request_store.put(request_id, {
+        **entry,
+        "prompt": value["prompt"],
+        "response": value["insights"],
+        "timestamp": datetime.utcnow().isoformat(),
+        "cached": match
+    })
+    
+    return AnalyzeResponse(
+        status="completed",
+        insights=value["insights"],
+        request_id=request_id,
+        agent_mode=value["agent_mode"],
+        metadata={**value["metadata"], "cached": match}
+    )
+
+async def trigger_file_normalization(file_path: str):
+    """Convert an uploaded workbook to the Report Reader's columnar format (background task)"""
+    if not file_path.endswith(('.xlsx', '.xls')):
+        return
+    try:
+        client = get_http_client()
+        response = await client.post(
+            f"{REPORT_READER_URL}/normalize",
+            json={"file_path": file_path},
+            timeout=REPORT_READER_PROFILE_TIMEOUT
+        )
+        response.raise_for_status()
+        logger.info(f"✅ Normalized: {file_path}")
+    except Exception as e:
+        logger.warning(f"⚠️ Normalization failed for {file_path}: {str(e)}")
+
+async def trigger_file_profile(file_path: str, user_id: Optional[str] = None):
+    """Ingest an uploaded file and store its column profile (background task)
+    
+    With a user id, a re-upload of the user's report is diffed against the
+    previous version and only the new rows are profiled.
+    """
+    try:
+        client = get_http_client()
+        response = await client.post(
+            f"{REPORT_READER_URL}/ingest",
+            json={"file_path": file_path, "owner": user_id},
+            timeout=REPORT_READER_PROFILE_TIMEOUT
+        )
+        response.raise_for_status()
+        kinds = [sheet["kind"] for sheet in response.json().get("sheets", [])]
+        logger.info(f"✅ Profile stored for: {file_path} ({', '.join(kinds)})")
+    except Exception as e:
+        logger.warning(f"⚠️ Profiling failed for {file_path}: {str(e)}")
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
@@ -455,8 +789,16 @@ async def health():
             "report_reader_retry_logic",  # Priority 1
             "firestore_retry_logic",       # Priority 2
             "gemini_explicit_timeout",     # Priority 3
-            "signed_url_upload_v2_signblob" # Session 21 FIXED with signed_url_helper
-        ]
+            "signed_url_upload_v2_signblob", # Session 21 FIXED with signed_url_helper
+            "precomputed_column_profiles",
+            "shared_request_store",
+            "response_cache",
+            "file_metadata_cache"
+        ],
+        "request_store": request_store.stats(),
+        "response_cache": response_cache.stats(),
+        "metadata_cache": metadata_cache.stats(),
+        "http_pool": http_pool_stats()
     }
 
 @app.post("/analyze", response_model=AnalyzeResponse)
@@ -476,26 +818,48 @@ async def analyze_report(request: AnalyzeRequest):
         
         file_data = None
         data_summary = ""
+        rows_analyzed = 0
         use_multi_sheet = False
         
         # Load dynamic system prompt
         system_instruction = get_cached_system_prompt()
         
+        # Repeated question about the same file version: no reads, no Gemini call.
+        # The overview is fetched while the generation is looked up
+        file_path = (request.context or {}).get("file_path")
+        overview_task = asyncio.ensure_future(prefetch_file_overview(file_path)) if file_path else None
+        generation = await get_file_generation(file_path) if file_path else None
+        cache_scope = response_cache_scope(system_instruction, file_path, generation)
+        cached = await cached_analysis(cache_scope, request.query, request_id, {
+            "query": request.query,
+            "context": request.context,
+            "options": request.options
+        })
+        if cached is not None:
+            if overview_task is not None:
+                overview_task.cancel()  # A shared overview fetch keeps running for its other callers
+            return cached
+        
         # Проверяем есть ли file_path в контексте
-        if request.context and "file_path" in request.context:
-            file_path = request.context["file_path"]
+        if file_path:
+            
+            # Metadata, stored profile and first-sheet preview in one round trip;
+            # fetched again if the file was re-uploaded since the last turn
+            overview = await overview_task
+            if generation is not None and overview["generation"] not in (None, generation):
+                overview = await get_file_overview(file_path, generation)
             
             # Step 1: Check if file is Excel and get metadata
             if file_path.endswith(('.xlsx', '.xls')):
                 logger.info("📊 Excel file detected - checking for multiple sheets")
                 
-                metadata_result = await get_file_metadata(file_path)
+                metadata_result = overview["metadata"]
                 
                 if "error" not in metadata_result:
                     sheets_count = metadata_result.get("sheets_count", 1)
                     
                     # Multi-sheet logic: if > 5 sheets, use metadata-first approach
-                    if sheets_count > 5:
+                    if sheets_count > MULTI_SHEET_THRESHOLD:
                         logger.info(f"🎯 Multi-sheet mode activated: {sheets_count} sheets detected")
                         use_multi_sheet = True
                         
@@ -506,7 +870,7 @@ async def analyze_report(request: AnalyzeRequest):
                         response = await generate_with_timeout(model, prompt)
                         
                         # Cache metadata and request for follow-up
-                        _request_cache[request_id] = {
+                        await request_store.put(request_id, {
                             "query": request.query,
                             "context": request.context,
                             "options": request.options,
@@ -515,7 +879,7 @@ async def analyze_report(request: AnalyzeRequest):
                             "timestamp": datetime.utcnow().isoformat(),
                             "metadata": metadata_result,
                             "multi_sheet_mode": True
-                        }
+                        })
                         
                         return AnalyzeResponse(
                             status="completed",
@@ -534,20 +898,33 @@ async def analyze_report(request: AnalyzeRequest):
             
             # Standard flow: single sheet or < 5 sheets
             if not use_multi_sheet:
-                # Читаем файл через report-reader-agent (first sheet)
-                file_result = await read_file_from_storage(file_path)
+                # Precomputed profile (stored at upload): no parsing needed
+                profile_result = overview["profile"]
+                profiled_sheets = [sheet for sheet in profile_result.get("sheets", []) if sheet.get("rows")]
                 
-                if "error" not in file_result:
-                    file_data = file_result
+                if "error" not in profile_result and profiled_sheets:
+                    file_data = profile_result
+                    rows_analyzed = sum(sheet["rows"] for sheet in profiled_sheets)
+                    data_summary = "\n**Загруженный отчет (профиль колонок):**\n" + "\n\n".join(
+                        f'Лист "{sheet["name"]}":\n{format_profile_summary(sheet)}'
+                        for sheet in profiled_sheets
+                    )
+                else:
+                    # Читаем файл через report-reader-agent (first sheet)
+                    file_result = overview["preview"] or await read_file_from_storage(file_path)
                     
-                    # Создаем структурированное описание данных
-                    if "data" in file_result:
-                        data_info = file_result["data"]
-                        rows_count = data_info.get("rows", 0)
-                        columns = data_info.get("columns", [])
-                        sample_data = data_info.get("data", [])[:3]
+                    if "error" not in file_result:
+                        file_data = file_result
                         
-                        data_summary = f"""
+                        # Создаем структурированное описание данных
+                        if "data" in file_result:
+                            data_info = file_result["data"]
+                            rows_count = data_info.get("rows", 0)
+                            rows_analyzed = rows_count
+                            columns = data_info.get("columns", [])
+                            sample_data = data_info.get("data", [])[:3]
+                            
+                            data_summary = f"""
 **Загруженный отчет:**
 Строк: {rows_count}
 Столбцы: {', '.join(columns[:15])}
@@ -584,26 +961,38 @@ async def analyze_report(request: AnalyzeRequest):
         response = await generate_with_timeout(model, prompt)
         
         # Cache request for regenerate functionality
-        _request_cache[request_id] = {
+        await request_store.put(request_id, {
             "query": request.query,
             "context": request.context,
             "options": request.options,
             "prompt": prompt,
             "response": response.text,
             "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        metadata = {
+            "model": "gemini-2.0-flash-exp",
+            "has_file_data": file_data is not None,
+            "rows_analyzed": rows_analyzed,
+            "from_profile": file_data is not None and "sheets" in file_data,
+            "prompt_source": "secret_manager"
         }
         
+        # A file that could not be read gets no cached "no data" answer
+        if cache_scope is not None and (file_data is not None or not file_path):
+            response_cache.store(cache_scope, request.query, {
+                "prompt": prompt,
+                "insights": response.text,
+                "agent_mode": "marketplace_expert",
+                "metadata": metadata
+            })
+        
         return AnalyzeResponse(
             status="completed",
             insights=response.text,
             request_id=request_id,
             agent_mode="marketplace_expert",
-            metadata={
-                "model": "gemini-2.0-flash-exp",
-                "has_file_data": file_data is not None,
-                "rows_analyzed": file_data.get("data", {}).get("rows", 0) if file_data else 0,
-                "prompt_source": "secret_manager"
-            }
+            metadata=metadata
         )
     
     except HTTPException:
@@ -627,8 +1016,28 @@ async def analyze_specific_sheet(request: AnalyzeSheetRequest):
         
         logger.info(f"📊 Analyzing specific sheet: {request.sheet_name}")
         
+        # Load system instruction
+        system_instruction = get_cached_system_prompt()
+        
+        # Sheet and profile are read while the generation is looked up
+        sheet_task = asyncio.ensure_future(read_specific_sheet(request.file_path, request.sheet_name))
+        profile_task = asyncio.ensure_future(get_file_profile(request.file_path))
+        generation = await get_file_generation(request.file_path)
+        cache_scope = response_cache_scope(system_instruction, request.file_path,
+                                           generation, request.sheet_name)
+        cached = await cached_analysis(cache_scope, request.original_query, request_id, {
+            "query": request.original_query,
+            "sheet_name": request.sheet_name,
+            "file_path": request.file_path,
+            "multi_sheet_analysis": True
+        })
+        if cached is not None:
+            sheet_task.cancel()
+            profile_task.cancel()
+            return cached
+        
         # Read specific sheet data
-        sheet_result = await read_specific_sheet(request.file_path, request.sheet_name)
+        sheet_result = await sheet_task
         
         if "error" in sheet_result:
             raise HTTPException(
@@ -653,8 +1062,15 @@ async def analyze_specific_sheet(request: AnalyzeSheetRequest):
 ```
 """
         
-        # Load system instruction
-        system_instruction = get_cached_system_prompt()
+        # Statistics over all rows from the precomputed profile, if stored
+        profile_result = await profile_task
+        sheet_profile = next((sheet for sheet in profile_result.get("sheets", [])
+                              if sheet.get("name") == request.sheet_name), None)
+        if sheet_profile:
+            data_summary += f"""
+Профиль колонок (по всем строкам):
+{format_profile_summary(sheet_profile)}
+"""
         
         # Build analysis prompt
         prompt = build_sheet_analysis_prompt(
@@ -668,7 +1084,7 @@ async def analyze_specific_sheet(request: AnalyzeSheetRequest):
         response = await generate_with_timeout(model, prompt)
         
         # Cache request
-        _request_cache[request_id] = {
+        await request_store.put(request_id, {
             "query": request.original_query,
             "sheet_name": request.sheet_name,
             "file_path": request.file_path,
@@ -676,20 +1092,30 @@ async def analyze_specific_sheet(request: AnalyzeSheetRequest):
             "response": response.text,
             "timestamp": datetime.utcnow().isoformat(),
             "multi_sheet_analysis": True
+        })
+        
+        metadata = {
+            "model": "gemini-2.0-flash-exp",
+            "sheet_name": request.sheet_name,
+            "rows_analyzed": rows_count,
+            "multi_sheet_analysis": True,
+            "prompt_source": "secret_manager"
         }
         
+        if cache_scope is not None:
+            response_cache.store(cache_scope, request.original_query, {
+                "prompt": prompt,
+                "insights": response.text,
+                "agent_mode": "sheet_analyst",
+                "metadata": metadata
+            })
+        
         return AnalyzeResponse(
             status="completed",
             insights=response.text,
             request_id=request_id,
             agent_mode="sheet_analyst",
-            metadata={
-                "model": "gemini-2.0-flash-exp",
-                "sheet_name": request.sheet_name,
-                "rows_analyzed": rows_count,
-                "multi_sheet_analysis": True,
-                "prompt_source": "secret_manager"
-            }
+            metadata=metadata
         )
         
     except HTTPException:
@@ -707,7 +1133,7 @@ async def submit_feedback(request: FeedbackRequest):
     """
     try:
         # Get cached request data
-        cached_request = _request_cache.get(request.request_id)
+        cached_request = await request_store.get(request.request_id)
         
         if not cached_request:
             raise HTTPException(
@@ -764,7 +1190,7 @@ async def regenerate_response(request: RegenerateRequest):
     """
     try:
         # Get cached request data
-        cached_request = _request_cache.get(request.request_id)
+        cached_request = await request_store.get(request.request_id)
         
         if not cached_request:
             raise HTTPException(
@@ -784,7 +1210,7 @@ async def regenerate_response(request: RegenerateRequest):
         response = await generate_with_timeout(model, prompt)
         
         # Cache new regenerated request
-        _request_cache[new_request_id] = {
+        await request_store.put(new_request_id, {
             "query": cached_request.get("query"),
             "context": cached_request.get("context"),
             "options": cached_request.get("options"),
@@ -792,7 +1218,7 @@ async def regenerate_response(request: RegenerateRequest):
             "response": response.text,
             "timestamp": datetime.utcnow().isoformat(),
             "regenerated_from": request.request_id
-        }
+        })
         
         return AnalyzeResponse(
             status="completed",
@@ -885,12 +1311,13 @@ async def generate_signed_url_endpoint(request: SignedUrlRequest):
         )
 
 @app.post("/upload/complete")
-async def upload_complete(request: UploadCompleteRequest):
+async def upload_complete(request: UploadCompleteRequest, background_tasks: BackgroundTasks):
     """Verify that file upload completed successfully
     
     This endpoint is called by the client after successfully uploading
     the file to GCS using the signed URL. It verifies that the file
-    exists and is accessible.
+    exists and is accessible, then starts column profiling in the
+    background so later questions need no parsing.
     
     Session 20: Bug #2 Fix - Upload completion verification
     """
@@ -918,12 +1345,19 @@ async def upload_complete(request: UploadCompleteRequest):
         
         logger.info(f"✅ File upload verified: {request.file_path} ({file_size} bytes)")
         
+        # Background tasks run in order: ingest then reads the normalized copy.
+        # Runs after the response: the service is deployed with CPU always allocated
+        background_tasks.add_task(trigger_file_normalization, request.file_path)
+        background_tasks.add_task(trigger_file_profile, request.file_path, request.user_id)
+        
         return {
             "status": "success",
             "message": "File upload completed and verified",
             "file_id": request.file_id,
             "file_path": request.file_path,
             "file_size_bytes": file_size,
+            "normalization": "started",
+            "profiling": "started",
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -940,13 +1374,13 @@ async def upload_complete(request: UploadCompleteRequest):
 async def test_report_reader():
     """Test connection to report-reader-agent"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{REPORT_READER_URL}/health")
-            return {
-                "report_reader_status": response.status_code,
-                "report_reader_url": REPORT_READER_URL,
-                "response": response.json() if response.status_code == 200 else response.text
-            }
+        client = get_http_client()
+        response = await client.get(f"{REPORT_READER_URL}/health", timeout=10.0)
+        return {
+            "report_reader_status": response.status_code,
+            "report_reader_url": REPORT_READER_URL,
+            "response": response.json() if response.status_code == 200 else response.text
+        }
     except Exception as e:
         return {
             "error": str(e),
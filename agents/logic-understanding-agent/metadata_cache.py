@@ -0,0 +1,131 @@
+"""Cache of Report Reader file metadata per GCS generation
+
+Every /analyze turn about an Excel file needs its metadata (sheet names
+and sizes) to choose between the standard and the multi-sheet flow. The
+metadata of a file generation never changes, so it is fetched once and
+kept under (file path, generation); a re-upload gets a new generation
+and the old entry is dropped.
+
+Fetches are single-flight: concurrent questions about a freshly uploaded
+file wait for the one metadata or overview request in progress instead
+of starting their own scan. Error results are returned to the waiting
+callers but not cached.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+Key = Tuple[str, int]
+
+
+class MetadataCache:
+    """LRU of metadata results with single-flight loading (one event loop)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[Key, "asyncio.Future"] = {}
+        self._overviews: Dict[Tuple[str, Optional[int]], "asyncio.Future"] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _observe(self, file_path: str, generation: int):
+        """Drop entries of other generations of the file"""
+        if self._generations.get(file_path, generation) != generation:
+            for key in [key for key in self._entries if key[0] == file_path]:
+                del self._entries[key]
+                self.invalidations += 1
+        self._generations[file_path] = generation
+
+    def _store(self, key: Key, result: Dict[str, Any]):
+        self._entries[key] = result
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def peek(self, file_path: str, generation: int) -> Optional[Dict[str, Any]]:
+        """Cached metadata without loading it (no counters, no LRU update)"""
+        return self._entries.get((file_path, generation))
+
+    def generation(self, file_path: str) -> Optional[int]:
+        """Last generation of the file seen by the cache, None if never seen"""
+        return self._generations.get(file_path)
+
+    def put(self, file_path: str, generation: int, result: Dict[str, Any]):
+        """Store metadata fetched by other means (e.g. as part of a file overview)"""
+        self._observe(file_path, generation)
+        self._store((file_path, generation), result)
+
+    async def _load(self, key: Key, loader: Callable[[], Awaitable[Dict[str, Any]]]):
+        try:
+            result = await loader()
+            if "error" not in result and self._generations.get(key[0]) == key[1]:
+                self._store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, file_path: str, generation: int,
+                  loader: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Cached metadata, or the result of loader() shared by concurrent callers"""
+        key = (file_path, generation)
+        self._observe(file_path, generation)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        else:
+            self.joined += 1
+        # A cancelled caller must not cancel the fetch the others wait for
+        return await asyncio.shield(task)
+
+    async def _load_overview(self, key: Tuple[str, Optional[int]],
+                             loader: Callable[[], Awaitable[Dict[str, Any]]]):
+        try:
+            overview = await loader()
+            generation = overview.get("generation", key[1])
+            if "error" not in overview and overview.get("metadata") and generation is not None:
+                self.put(key[0], generation, overview["metadata"])
+            return overview
+        finally:
+            self._overviews.pop(key, None)
+
+    async def get_overview(self, file_path: str, generation: Optional[int],
+                           loader: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Result of loader() (a file overview) shared by concurrent callers
+
+        generation is None when it is not known yet; the metadata of the
+        overview is cached under the generation the overview reports.
+        """
+        key = (file_path, generation)
+        task = self._overviews.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load_overview(key, loader))
+            self._overviews[key] = task
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.joined
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "in_flight": len(self._inflight) + len(self._overviews),
+            "hits": self.hits,
+            "misses": self.misses,
+            "joined_in_flight": self.joined,
+            "hit_ratio": round((self.hits + self.joined) / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -164,6 +164,44 @@ def format_column_hint(columns: List[str]) -> str:
         return ", ".join([str(c) for c in columns[:2]])
 
 
+def format_profile_summary(sheet_profile: Dict[str, Any], max_columns: int = 15) -> str:
+    """Format a precomputed sheet profile into readable text
+    
+    Args:
+        sheet_profile: One entry of "sheets" from Report Reader /profile
+        max_columns: Maximum number of columns to describe
+        
+    Returns:
+        Multi-line description of rows, column types and statistics
+    """
+    columns = sheet_profile.get("columns", {})
+    lines = [f"Строк: {sheet_profile.get('rows', 0)}, колонок: {len(columns)}"]
+    
+    for name, col in list(columns.items())[:max_columns]:
+        line = f"- {name} ({col.get('type')})"
+        if col.get("null_ratio"):
+            line += f", пропусков {col['null_ratio']:.0%}"
+        if "min" in col:
+            line += f": мин {col['min']}, макс {col['max']}, среднее {col['mean']}, сумма {col['sum']}"
+            median = col.get("quantiles", {}).get("p50")
+            if median is not None:
+                line += f", медиана {median}"
+        elif "date_range" in col:
+            dates = col["date_range"]
+            line += f": с {dates['min'][:10]} по {dates['max'][:10]} ({dates['days']} дн.)"
+        else:
+            line += f": {col.get('distinct', 0)} уникальных"
+        top = col.get("top_values", [])
+        if top and "min" not in col and "date_range" not in col:
+            line += "; чаще всего: " + ", ".join(f"{v['value']} ({v['count']})" for v in top[:3])
+        lines.append(line)
+    
+    if len(columns) > max_columns:
+        lines.append(f"(и еще {len(columns) - max_columns} колонок)")
+    
+    return "\n".join(lines)
+
+
 def build_sheet_analysis_prompt(
     system_instruction: str,
     user_query: str,
@@ -0,0 +1,207 @@
+"""Request store for /feedback and /regenerate
+
+Every /analyze, /analyze/sheet and /regenerate call keeps its prompt and
+response so that feedback can be stored and the answer regenerated later.
+Entries live in two tiers:
+
+- LocalRequestStore: in-process LRU (OrderedDict, O(1) get/put) bounded by
+  total size in bytes and by entry age (TTL)
+- an optional shared backend, so a follow-up request that lands on another
+  Cloud Run instance still finds its entry: FirestoreRequestBackend, or
+  InMemoryRequestBackend for tests
+
+Writes go to both tiers; reads try the local tier first and fill it from
+the shared backend. Shared backend errors are logged and counted, never
+raised: the local tier keeps working on its own.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Firestore documents are limited to 1 MiB
+FIRESTORE_MAX_BYTES = 900 * 1024
+
+
+def encode_entry(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LocalRequestStore:
+    """Thread-safe LRU of request entries bounded by bytes and TTL"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, request_id: str):
+        _, size, _ = self._entries.pop(request_id)
+        self._bytes -= size
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(request_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(request_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(request_id)
+            self.hits += 1
+            return value
+
+    def put(self, request_id: str, entry: Dict[str, Any], size: Optional[int] = None) -> bool:
+        """Store an entry; False if it is larger than the whole store"""
+        if size is None:
+            size = len(encode_entry(entry).encode("utf-8"))
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if request_id in self._entries:
+                self._remove(request_id)
+            self._entries[request_id] = (entry, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class InMemoryRequestBackend:
+    """Shared-backend stand-in that keeps entries in a dict (tests, local runs)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[str, datetime]] = {}
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(request_id)
+        if entry is None or entry[1] < datetime.utcnow():
+            return None
+        return json.loads(entry[0])
+
+    def put(self, request_id: str, payload: str, expires_at: datetime):
+        self.entries[request_id] = (payload, expires_at)
+
+
+class FirestoreRequestBackend:
+    """Entries as JSON documents in a Firestore collection
+
+    Documents carry expires_at; a Firestore TTL policy on that field
+    deletes them, reads ignore expired ones in the meantime.
+    """
+
+    name = "firestore"
+
+    def __init__(self, client, collection: str = "request_cache", retry=None):
+        self.collection = client.collection(collection)
+        self.retry = retry
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        snapshot = self.collection.document(request_id).get(retry=self.retry)
+        if not snapshot.exists:
+            return None
+        document = snapshot.to_dict()
+        expires_at = document["expires_at"].replace(tzinfo=None)
+        if expires_at < datetime.utcnow():
+            return None
+        return json.loads(document["payload"])
+
+    def put(self, request_id: str, payload: str, expires_at: datetime):
+        self.collection.document(request_id).set(
+            {"payload": payload, "expires_at": expires_at}, retry=self.retry
+        )
+
+
+class RequestStore:
+    """Local LRU tier in front of an optional shared backend"""
+
+    def __init__(self, local: LocalRequestStore, shared=None,
+                 shared_max_bytes: int = FIRESTORE_MAX_BYTES):
+        self.local = local
+        self.shared = shared
+        self.shared_max_bytes = shared_max_bytes
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self.shared_skipped = 0
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.local.get(request_id)
+        if entry is not None or self.shared is None:
+            return entry
+        try:
+            entry = await asyncio.to_thread(self.shared.get, request_id)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"⚠️ Request store read failed for {request_id}: {str(e)}")
+            return None
+        if entry is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        self.local.put(request_id, entry)
+        return entry
+
+    async def put(self, request_id: str, entry: Dict[str, Any]):
+        payload = encode_entry(entry)
+        size = len(payload.encode("utf-8"))
+        self.local.put(request_id, entry, size)
+        if self.shared is None:
+            return
+        if size > self.shared_max_bytes:
+            self.shared_skipped += 1
+            logger.warning(f"⚠️ Request {request_id} too large for the shared store ({size} bytes)")
+            return
+        expires_at = datetime.utcnow() + timedelta(seconds=self.local.ttl_seconds)
+        try:
+            await asyncio.to_thread(self.shared.put, request_id, payload, expires_at)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"⚠️ Request store write failed for {request_id}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "shared": None if self.shared is None else {
+                "backend": self.shared.name,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "errors": self.shared_errors,
+                "skipped_too_large": self.shared_skipped,
+            },
+        }
@@ -0,0 +1,196 @@
+"""Cache of analysis answers for repeated questions about the same file
+
+Users often ask the same question about the same report again ("какая
+выручка за октябрь?" after a page reload, or from a colleague). Answers
+are cached under a scope and the normalized question:
+
+    scope = (system prompt version, file path, file generation, sheet)
+
+Lookups try the exact normalized question first, then, if a similarity
+threshold is set, the most similar cached question of the same scope
+(cosine similarity of character trigrams). Questions whose numbers differ
+("за 2023" / "за 2024") never match by similarity.
+
+An entry expires after ttl_seconds. A scope is dropped as soon as a newer
+generation of its file or a new system prompt version is seen, so a
+re-uploaded report or an edited prompt never gets an old answer.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+# (prompt version, file path, file generation, sheet name)
+Scope = Tuple[str, Optional[str], Optional[int], Optional[str]]
+
+EXACT = "exact"
+SIMILAR = "similar"
+
+NGRAM_SIZE = 3
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def prompt_version(system_instruction: str) -> str:
+    return hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, ё -> е, punctuation dropped, whitespace collapsed"""
+    text = query.lower().replace("ё", "е")
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def query_numbers(normalized: str) -> FrozenSet[str]:
+    return frozenset(number.replace(",", ".") for number in _NUMBERS.findall(normalized))
+
+
+def ngrams(normalized: str) -> Counter:
+    padded = f" {normalized} "
+    return Counter(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+
+def cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm
+
+
+class CachedResponse:
+    def __init__(self, query: str, value: Dict[str, Any]):
+        self.query = query
+        self.grams = ngrams(query)
+        self.numbers = query_numbers(query)
+        self.value = value
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """Thread-safe LRU of answers by scope and normalized question
+
+    similarity_threshold = 0 disables similarity lookups (exact only).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float,
+                 similarity_threshold: float = 0.0, max_scan: int = 256):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_scan = max_scan
+        self._entries: "OrderedDict[Tuple[Scope, str], CachedResponse]" = OrderedDict()
+        self._scopes: Dict[Scope, Dict[str, CachedResponse]] = {}
+        self._generations: Dict[str, Optional[int]] = {}
+        self._prompt_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key: Tuple[Scope, str]):
+        scope, query = key
+        del self._entries[key]
+        entries = self._scopes[scope]
+        del entries[query]
+        if not entries:
+            del self._scopes[scope]
+
+    def _drop_scopes(self, stale):
+        for scope in [scope for scope in self._scopes if stale(scope)]:
+            for query in list(self._scopes[scope]):
+                self._remove((scope, query))
+                self.invalidations += 1
+
+    def _observe(self, scope: Scope):
+        """Drop scopes of older prompt versions and file generations"""
+        version, file_path, generation, _ = scope
+        if version != self._prompt_version:
+            if self._prompt_version is not None:
+                self._drop_scopes(lambda s: s[0] != version)
+            self._prompt_version = version
+        if file_path is not None and self._generations.get(file_path, generation) != generation:
+            self._drop_scopes(lambda s: s[1] == file_path and s[2] != generation)
+        if file_path is not None:
+            self._generations[file_path] = generation
+
+    def _expired(self, entry: CachedResponse) -> bool:
+        return time.monotonic() - entry.stored_at > self.ttl_seconds
+
+    def _most_similar(self, scope: Scope, query: str) -> Optional[CachedResponse]:
+        grams = ngrams(query)
+        numbers = query_numbers(query)
+        best, best_score = None, self.similarity_threshold
+        candidates = list(self._scopes.get(scope, {}).values())[-self.max_scan:]
+        for entry in candidates:
+            if entry.numbers != numbers or self._expired(entry):
+                continue
+            score = cosine(grams, entry.grams)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def lookup(self, scope: Scope, query: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Cached answer and how it matched (EXACT or SIMILAR), or None"""
+        normalized = normalize_query(query)
+        with self._lock:
+            self._observe(scope)
+            key = (scope, normalized)
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.value, EXACT
+            if self.similarity_threshold > 0:
+                entry = self._most_similar(scope, normalized)
+                if entry is not None:
+                    self._entries.move_to_end((scope, entry.query))
+                    self.similar_hits += 1
+                    return entry.value, SIMILAR
+            self.misses += 1
+            return None
+
+    def store(self, scope: Scope, query: str, value: Dict[str, Any]):
+        normalized = normalize_query(query)
+        with self._lock:
+            self._observe(scope)
+            key = (scope, normalized)
+            if key in self._entries:
+                self._remove(key)
+            entry = CachedResponse(normalized, value)
+            self._entries[key] = entry
+            self._scopes.setdefault(scope, {})[normalized] = entry
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
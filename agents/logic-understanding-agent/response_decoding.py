@@ -0,0 +1,75 @@
+"""Decoding of Report Reader read responses in JSON, Arrow or MessagePack
+
+The Report Reader encodes /read/* responses as asked by the Accept header
+(see report-reader-agent/response_encoding.py). Decoded responses have the
+same structure as JSON ones, so callers do not depend on the format.
+Formats whose library is not installed fall back to JSON.
+"""
+import datetime
+import decimal
+import json
+from typing import Any, Dict
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+ARROW = "arrow"
+MSGPACK = "msgpack"
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+ACCEPT_HEADERS = {
+    JSON: "application/json",
+    ARROW: f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.5",
+    MSGPACK: f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.5",
+}
+
+
+def supported(response_format: str) -> bool:
+    if response_format == ARROW:
+        return pa is not None
+    if response_format == MSGPACK:
+        return msgpack is not None
+    return response_format == JSON
+
+
+def accept_header(response_format: str) -> str:
+    """Accept header for a read request (JSON if the format cannot be decoded here)"""
+    return ACCEPT_HEADERS[response_format if supported(response_format) else JSON]
+
+
+def _json_value(value: Any) -> Any:
+    """Arrow values as the Report Reader sends them in JSON"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+def decode_arrow(content: bytes) -> Dict[str, Any]:
+    table = pa.ipc.open_stream(content).read_all()
+    envelope = json.loads(table.schema.metadata[b"envelope"])
+    columns = {name: [_json_value(value) for value in column.to_pylist()]
+               for name, column in zip(table.column_names, table.columns)}
+    envelope["data"]["data"] = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    return envelope
+
+
+def decode_response(response) -> Dict[str, Any]:
+    """Decode an httpx response by its content type"""
+    content_type = response.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == ARROW_STREAM_MEDIA_TYPE:
+        return decode_arrow(response.content)
+    if content_type in (MSGPACK_MEDIA_TYPE, "application/x-msgpack"):
+        return msgpack.unpackb(response.content)
+    return response.json()
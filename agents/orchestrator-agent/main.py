@@ -3,6 +3,7 @@ import os
 import json
 import uuid
 import base64
+from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from enum import Enum
@@ -14,7 +15,16 @@ from sqlalchemy.orm import sessionmaker, Session
 from google.cloud import pubsub_v1
 import httpx
 
-app = FastAPI(title="Orchestrator Agent")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """One pooled HTTP client for the lifetime of the process (see create_http_client)"""
+    global http_client
+    http_client = create_http_client()
+    yield
+    await http_client.aclose()
+    http_client = None
+
+app = FastAPI(title="Orchestrator Agent", lifespan=lifespan)
 
 # ==========================================
 # Configuration
@@ -36,6 +46,84 @@ RESULTS_TOPIC = os.getenv("RESULTS_TOPIC", "financial-reports-results")
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./orchestrator.db")
 
+# ==========================================
+# Shared HTTP Client
+# ==========================================
+
+# One keep-alive pool for calls to other agents; HTTP/2 if h2 is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+
+# Read timeouts per target agent
+REPORT_READER_TIMEOUT = httpx.Timeout(120.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+LOGIC_AGENT_TIMEOUT = httpx.Timeout(300.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+VISUALIZATION_TIMEOUT = httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+class ConnectionMetrics:
+    """Requests and newly opened connections per target host"""
+    
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.connections: Dict[str, int] = {}
+    
+    async def on_request(self, request: httpx.Request):
+        host = request.url.host
+        self.requests[host] = self.requests.get(host, 0) + 1
+        
+        async def trace(event_name: str, info: Dict):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections[host] = self.connections.get(host, 0) + 1
+        
+        request.extensions = {**request.extensions, "trace": trace}
+    
+    def stats(self) -> Dict:
+        return {
+            host: {
+                "requests": requests,
+                "new_connections": self.connections.get(host, 0),
+                "reused_connections": requests - self.connections.get(host, 0)
+            }
+            for host, requests in self.requests.items()
+        }
+
+http_metrics = ConnectionMetrics()
+http_client: Optional[httpx.AsyncClient] = None
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        event_hooks={"request": [http_metrics.on_request]}
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client (created on first use when the lifespan handler did not run)"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+def http_pool_stats() -> Dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "targets": http_metrics.stats()
+    }
+
 # Initialize Pub/Sub Publisher (for sending results)
 try:
     publisher = pubsub_v1.PublisherClient()
@@ -180,61 +268,65 @@ async def call_report_reader(file_path: str = None, spreadsheet_id: str = None,
                              sheet_data: bytes = None) -> Dict:
     """Call Report Reader Agent"""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            if spreadsheet_id:
-                response = await client.post(
-                    f"{REPORT_READER_URL}/read/sheets",
-                    json={"spreadsheet_id": spreadsheet_id}
-                )
-            elif sheet_data:
-                files = {"file": ("report.xlsx", sheet_data)}
-                response = await client.post(
-                    f"{REPORT_READER_URL}/upload/excel",
-                    files=files
-                )
-            else:
-                raise ValueError("Either file_path, spreadsheet_id, or sheet_data required")
-            
-            response.raise_for_status()
-            return response.json()
-    
+        client = get_http_client()
+        if spreadsheet_id:
+            response = await client.post(
+                f"{REPORT_READER_URL}/read/sheets",
+                json={"spreadsheet_id": spreadsheet_id},
+                timeout=REPORT_READER_TIMEOUT
+            )
+        elif sheet_data:
+            files = {"file": ("report.xlsx", sheet_data)}
+            response = await client.post(
+                f"{REPORT_READER_URL}/upload/excel",
+                files=files,
+                timeout=REPORT_READER_TIMEOUT
+            )
+        else:
+            raise ValueError("Either file_path, spreadsheet_id, or sheet_data required")
+
+        response.raise_for_status()
+        return response.json()
+
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Report Reader failed: {str(e)}")
 
 async def call_logic_agent(query: str, report_id: str = None, context: Dict = None) -> Dict:
     """Call Logic Understanding Agent"""
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(
-                f"{LOGIC_AGENT_URL}/analyze",
-                json={
-                    "query": query,
-                    "report_id": report_id,
-                    "context": context
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-    
+        client = get_http_client()
+        response = await client.post(
+            f"{LOGIC_AGENT_URL}/analyze",
+            json={
+                "query": query,
+                "report_id": report_id,
+                "context": context
+            },
+            timeout=LOGIC_AGENT_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Logic Agent failed: {str(e)}")
 
 async def call_visualization_agent(chart_type: str, data: Dict, title: str) -> Dict:
     """Call Visualization Agent"""
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{VISUALIZATION_URL}/create",
-                json={
-                    "chart_type": chart_type,
-                    "data": data,
-                    "title": title,
-                    "save_to_storage": True
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-    
+        client = get_http_client()
+        response = await client.post(
+            f"{VISUALIZATION_URL}/create",
+            json={
+                "chart_type": chart_type,
+                "data": data,
+                "title": title,
+                "save_to_storage": True
+            },
+            timeout=VISUALIZATION_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Visualization Agent failed: {str(e)}")
 
@@ -370,7 +462,8 @@ async def health():
         "features": {
             "pubsub": pubsub_available,
             "workflows": list(WorkflowType)
-        }
+        },
+        "http_pool": http_pool_stats()
     }
 
 @app.post("/pubsub/push")
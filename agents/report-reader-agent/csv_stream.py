@@ -0,0 +1,113 @@
+"""Single-pass streaming summary of large CSV files
+
+Marketplace transaction dumps can be several GB, too large to load as one
+DataFrame. summarize_chunks reads a CSV chunk by chunk and keeps only:
+
+- a preview of the first rows
+- running per-column statistics: count, nulls, sum/min/max/mean for
+  numeric columns, an approximate distinct count (HyperLogLog) and the
+  most frequent values of text columns (Space-Saving)
+
+Memory use is bounded by the chunk size plus a few KB of sketches per column.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+from sketches import HyperLogLog, SpaceSaving
+from type_inference import infer_column_type, parse_numbers
+
+PREVIEW_ROWS = 100
+TOP_VALUES = 5
+
+
+class ColumnStats:
+    """Running statistics of one column, updated chunk by chunk"""
+
+    def __init__(self, name: str, numeric: bool):
+        self.name = name
+        self.numeric = numeric
+        self.count = 0
+        self.nulls = 0
+        self.non_numeric = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.numeric_count = 0
+        self.distinct = HyperLogLog()
+        self.top = SpaceSaving()
+
+    def update(self, values: pd.Series):
+        non_null = values.notna()
+        self.count += int(non_null.sum())
+        self.nulls += int((~non_null).sum())
+        self.distinct.update(values)
+
+        if not self.numeric:
+            self.top.update(values)
+            return
+        numbers = parse_numbers(values)
+        valid = numbers.dropna()
+        self.non_numeric += int((non_null & numbers.isna()).sum())
+        if valid.empty:
+            return
+        self.numeric_count += len(valid)
+        self.sum += float(valid.sum())
+        chunk_min, chunk_max = float(valid.min()), float(valid.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "type": "numeric" if self.numeric else "text",
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct_approx": self.distinct.estimate(),
+        }
+        if not self.numeric:
+            stats["top_values_approx"] = [
+                item for item in self.top.top(TOP_VALUES)
+                if item["count"] - item["error"] > self.top.floor
+            ]
+        if self.numeric:
+            stats.update({
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max,
+                "mean": self.sum / self.numeric_count if self.numeric_count else None,
+                "non_numeric": self.non_numeric,
+            })
+        return stats
+
+
+def summarize_chunks(chunks: Iterable[pd.DataFrame],
+                     preview_rows: int = PREVIEW_ROWS) -> Dict[str, Any]:
+    """Consume DataFrame chunks once; return total rows, preview and column stats
+
+    Column kinds (numeric or text) are inferred from the first chunk.
+    """
+    stats: Dict[str, ColumnStats] = {}
+    preview: Optional[pd.DataFrame] = None
+    rows = 0
+
+    for chunk in chunks:
+        if preview is None:
+            preview = chunk.head(preview_rows)
+            for col in chunk.columns:
+                kind = infer_column_type(chunk[col])
+                stats[str(col)] = ColumnStats(str(col), numeric=kind in ("int", "float"))
+        elif len(preview) < preview_rows:
+            preview = pd.concat([preview, chunk.head(preview_rows - len(preview))],
+                                ignore_index=True)
+
+        rows += len(chunk)
+        for col in chunk.columns:
+            column_stats = stats.get(str(col))
+            if column_stats is not None:
+                column_stats.update(chunk[col])
+
+    return {
+        "rows": rows,
+        "preview": preview if preview is not None else pd.DataFrame(),
+        "columns": {name: column_stats.to_dict() for name, column_stats in stats.items()},
+    }
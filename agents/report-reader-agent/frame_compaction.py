@@ -0,0 +1,84 @@
+"""Compact in-memory representation of parsed sheets
+
+Marketplace exports are dominated by repetitive text columns (Товар,
+Категория, Статус, Регион) and float64 money columns, so an object-dtype
+sheet takes several times its real size. compact_dataframe shrinks it
+without changing any value:
+
+- low-cardinality text -> category
+- other text -> repeated strings share one object (interning)
+- integers -> smallest integer dtype
+- whole-number floats without gaps -> integers; other floats are kept
+  as float64 (float32 would change money amounts)
+"""
+import sys
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_MAX_RATIO = 0.5
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Deep in-memory size of a DataFrame in bytes"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def intern_strings(series: pd.Series) -> pd.Series:
+    """Make equal strings share one object"""
+    codes, uniques = pd.factorize(series)
+    interned = np.array(
+        [sys.intern(value) if isinstance(value, str) else value for value in uniques] + [None],
+        dtype=object
+    )
+    result = pd.Series(interned[codes], index=series.index, name=series.name)
+    return result.where(series.notna(), series)
+
+
+def compact_series(series: pd.Series,
+                   category_max_ratio: float = CATEGORY_MAX_RATIO) -> pd.Series:
+    """Return the most compact lossless representation of a column"""
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(series):
+        if series.notna().all() and np.array_equal(series, np.round(series)):
+            return pd.to_numeric(series.astype("int64"), downcast="integer")
+        return series
+
+    if series.dtype == object:
+        non_null = series.notna().sum()
+        if non_null and pd.api.types.infer_dtype(series, skipna=True) == "string":
+            if series.nunique(dropna=True) <= non_null * category_max_ratio:
+                return series.astype("category")
+            return intern_strings(series)
+    return series
+
+
+def compact_dataframe(df: pd.DataFrame,
+                      category_max_ratio: float = CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """Compact every column and record memory before/after in df.attrs
+
+    An already compacted frame keeps its original "before" size.
+    """
+    previous = df.attrs.get("memory_compaction") or {}
+    before = previous.get("before_bytes") or memory_bytes(df)
+    compacted = df.copy(deep=False)
+    for col in compacted.columns:
+        compacted[col] = compact_series(compacted[col], category_max_ratio)
+    after = memory_bytes(compacted)
+
+    compacted.attrs["memory_compaction"] = compaction_report(before, after)
+    return compacted
+
+
+def compaction_report(before: int, after: int) -> Dict[str, Any]:
+    return {
+        "before_bytes": before,
+        "after_bytes": after,
+        "saved_ratio": round(1 - after / before, 4) if before else 0.0,
+    }
@@ -0,0 +1,115 @@
+"""Registry of open workbook handles with idle expiry
+
+A handle is a short ID for (bucket, file, generation) plus its sheet
+names, returned by POST /handles. Later requests of a conversation fetch
+columns, row ranges or aggregates through the handle. Sheets are loaded
+through the parse cache and Parquet sidecars, so a handle is a cheap
+reference, not a copy of the data.
+
+A handle pins the file generation: when the file is re-uploaded, reads
+through an old handle fail instead of silently mixing two versions.
+Handles expire after HANDLE_IDLE_SECONDS without use; the registry is
+also bounded in size (least recently used handles are closed first).
+Handles live in the memory of one instance; an unknown handle means the
+caller should open the file again.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class Handle:
+    """An open workbook: file identity and sheets; data stays in the parse cache"""
+
+    def __init__(self, handle_id: str, bucket: str, file_path: str,
+                 generation: Optional[int], sheets: Dict[str, Any], header_row: int = 0):
+        self.id = handle_id
+        self.bucket = bucket
+        self.file_path = file_path
+        self.generation = generation
+        self.sheets = sheets  # Display name -> sheet argument for load_sheet
+        self.header_row = header_row
+        self.opened_at = time.time()
+        self.last_used = time.monotonic()
+        self.reads = 0
+
+    def sheet(self, name: Optional[str] = None) -> Any:
+        """load_sheet argument of a sheet by name (default: first sheet)"""
+        if name is None:
+            return next(iter(self.sheets.values()))
+        if name not in self.sheets:
+            raise KeyError(name)
+        return self.sheets[name]
+
+    def to_dict(self, idle_seconds: float) -> Dict[str, Any]:
+        idle = time.monotonic() - self.last_used
+        return {
+            "handle_id": self.id,
+            "file_path": self.file_path,
+            "generation": self.generation,
+            "header_row": self.header_row,
+            "sheets": list(self.sheets),
+            "reads": self.reads,
+            "expires_in_seconds": max(0, int(idle_seconds - idle)),
+        }
+
+
+class HandleRegistry:
+    """Thread-safe handle registry with idle expiry and LRU bound"""
+
+    def __init__(self, idle_seconds: float, max_handles: int):
+        self.idle_seconds = idle_seconds
+        self.max_handles = max_handles
+        self._handles: "OrderedDict[str, Handle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _expire(self):
+        now = time.monotonic()
+        for handle_id in [h.id for h in self._handles.values()
+                          if now - h.last_used > self.idle_seconds]:
+            del self._handles[handle_id]
+            self.expired += 1
+
+    def open(self, bucket: str, file_path: str, generation: Optional[int],
+             sheets: Dict[str, Any], header_row: int = 0) -> Handle:
+        handle = Handle(secrets.token_urlsafe(12), bucket, file_path, generation,
+                        sheets, header_row)
+        with self._lock:
+            self._expire()
+            self._handles[handle.id] = handle
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+                self.evicted += 1
+            self.opened += 1
+        return handle
+
+    def get(self, handle_id: str) -> Optional[Handle]:
+        """Handle by ID (marks it as used), or None if unknown or expired"""
+        with self._lock:
+            self._expire()
+            handle = self._handles.get(handle_id)
+            if handle is not None:
+                handle.last_used = time.monotonic()
+                handle.reads += 1
+                self._handles.move_to_end(handle_id)
+            return handle
+
+    def close(self, handle_id: str) -> bool:
+        with self._lock:
+            return self._handles.pop(handle_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                "open": len(self._handles),
+                "opened": self.opened,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "idle_seconds": self.idle_seconds,
+            }
@@ -0,0 +1,224 @@
+"""Incremental re-ingest of updated reports
+
+Sellers often re-upload the same monthly report with a few days appended.
+Every ingested sheet keeps one 64-bit fingerprint per row (a hash of its
+key columns, by default all columns) next to the file's sidecars:
+
+    reports/<file>.sidecar/g<generation>/<sheet>.fingerprints.npy
+    reports/<file>.sidecar/g<generation>/ingest.json
+
+A new upload is compared with the previous version of the report, which
+is passed explicitly or found through an index of (owner, sheet schema):
+
+- identical: same rows in the same order
+- append: the previous rows are a prefix of the new ones
+- update: most previous rows are still there; rows were added/removed
+- new: unrelated content
+
+Only appended rows need to be profiled; their sketches are merged into
+the stored profile state. Appended CSV files are detected by a byte
+prefix hash, so only the new bytes are parsed.
+"""
+import hashlib
+import io
+import json
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from sidecar_store import sidecar_prefix
+from sketches import normalize_values
+
+INGEST_STATE = "ingest.json"
+INDEX_PREFIX = ".ingest-index"
+CSV_SHEET = "__csv__"  # State key of the single table of a CSV file
+UPDATE_MIN_OVERLAP = 0.5
+
+
+# ==========================================
+# Fingerprints
+# ==========================================
+
+def row_fingerprints(df: pd.DataFrame,
+                     key_columns: Optional[Sequence[str]] = None) -> np.ndarray:
+    """64-bit hash per row of the key columns (default: all columns)
+
+    Values are normalized like the sketches (numbers as float64, the rest
+    as text), so the same row hashes equally whatever dtypes a parse gives.
+    """
+    columns = [col for col in (key_columns or df.columns) if col in df.columns]
+    if not columns or df.empty:
+        return np.zeros(len(df), dtype=np.uint64)
+    normalized = pd.DataFrame({
+        str(col): normalize_values(df[col]).reindex(df.index) for col in columns
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy(dtype=np.uint64)
+
+
+def schema_signature(sheets: Dict[str, List[str]]) -> str:
+    """Stable hash of sheet names and their columns"""
+    text = json.dumps(sorted((name, list(columns)) for name, columns in sheets.items()),
+                      ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def matched_rows(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Mask of current rows that were in the previous version, counting duplicates
+
+    The k-th copy of a fingerprint in `current` matches only if `previous`
+    holds at least k copies, so a duplicated row that was added counts as
+    added.
+    """
+    values, counts = np.unique(previous, return_counts=True)
+    if not len(values) or not len(current):
+        return np.zeros(len(current), dtype=bool)
+    # Occurrence number of each row among the equal fingerprints before it
+    order = np.argsort(current, kind="stable")
+    ordered = current[order]
+    occurrence = np.empty(len(current), dtype=np.int64)
+    occurrence[order] = np.arange(len(current)) - np.searchsorted(ordered, ordered, side="left")
+    index = np.minimum(np.searchsorted(values, current), len(values) - 1)
+    available = np.where(values[index] == current, counts[index], 0)
+    return occurrence < available
+
+
+def diff_fingerprints(previous: np.ndarray, current: np.ndarray) -> Dict[str, Any]:
+    """Classify a new version of a sheet against the previous one
+
+    Returns kind (identical, append, update or new), row counts, and
+    `added`: positions of the rows that are not in the previous version.
+    """
+    n_prev, n_cur = len(previous), len(current)
+    result: Dict[str, Any] = {"previous_rows": n_prev, "rows": n_cur}
+
+    if n_cur >= n_prev and np.array_equal(current[:n_prev], previous):
+        added = np.arange(n_prev, n_cur)
+        result.update(kind="identical" if n_cur == n_prev else "append",
+                      unchanged=n_prev, removed=0)
+    else:
+        present = matched_rows(previous, current)
+        added = np.flatnonzero(~present)
+        unchanged = int(present.sum())
+        removed = n_prev - unchanged
+        overlap = unchanged / n_prev if n_prev else 0.0
+        result.update(kind="update" if overlap >= UPDATE_MIN_OVERLAP else "new",
+                      unchanged=unchanged, removed=removed)
+
+    result["added"] = added
+    return result
+
+
+def fingerprints_to_bytes(fingerprints: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, fingerprints.astype(np.uint64, copy=False))
+    return buffer.getvalue()
+
+
+def fingerprints_from_bytes(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(data))
+
+
+# ==========================================
+# Byte-level append detection (CSV)
+# ==========================================
+
+class HashingReader:
+    """File wrapper that hashes everything read through it
+
+    pandas reads CSV through it, so a file is hashed in the same pass as
+    it is parsed.
+    """
+
+    def __init__(self, stream, digest=None):
+        self.stream = stream
+        self.digest = digest or hashlib.sha256()
+        self.bytes_read = 0
+        self.last_byte = b""
+
+    def _seen(self, data: bytes) -> bytes:
+        if data:
+            self.digest.update(data)
+            self.bytes_read += len(data)
+            self.last_byte = data[-1:]
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        return self._seen(self.stream.read(size))
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._seen(self.stream.readline(size))
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def read_prefix_digest(stream, size: int, chunk_size: int = 8 * 1024 * 1024):
+    """Hash the first `size` bytes of a stream; returns the running digest
+
+    The digest can be continued for the rest of the file (HashingReader),
+    so the full-file hash of the new version costs no extra pass.
+    """
+    digest = hashlib.sha256()
+    remaining = size
+    while remaining > 0:
+        data = stream.read(min(chunk_size, remaining))
+        if not data:
+            break
+        digest.update(data)
+        remaining -= len(data)
+    return digest, size - remaining
+
+
+# ==========================================
+# Stored state
+# ==========================================
+
+def fingerprints_path(file_path: str, generation: Optional[int], sheet_name: Any) -> str:
+    sheet = quote(str(sheet_name), safe="")
+    return f"{sidecar_prefix(file_path, generation)}/{sheet}.fingerprints.npy"
+
+
+def state_path(file_path: str, generation: Optional[int]) -> str:
+    return f"{sidecar_prefix(file_path, generation)}/{INGEST_STATE}"
+
+
+def index_path(owner: str, signature: str) -> str:
+    """Latest ingested report of an owner with a given sheet schema"""
+    return f"{INDEX_PREFIX}/{quote(owner, safe='')}/{signature}.json"
+
+
+def write_json(backend, bucket: str, path: str, data: Dict[str, Any]):
+    backend.write_bytes(bucket, path, json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                        content_type="application/json")
+
+
+def read_json(backend, bucket: str, path: str) -> Optional[Dict[str, Any]]:
+    try:
+        source = backend.open_input(bucket, path)
+    except FileNotFoundError:
+        return None
+    with source:
+        return json.loads(source.read())
+
+
+def write_fingerprints(backend, bucket: str, file_path: str, generation: Optional[int],
+                       sheet_name: Any, fingerprints: np.ndarray) -> str:
+    path = fingerprints_path(file_path, generation, sheet_name)
+    backend.write_bytes(bucket, path, fingerprints_to_bytes(fingerprints),
+                        content_type="application/octet-stream")
+    return path
+
+
+def read_fingerprints(backend, bucket: str, file_path: str, generation: Optional[int],
+                      sheet_name: Any) -> Optional[np.ndarray]:
+    try:
+        source = backend.open_input(bucket, fingerprints_path(file_path, generation, sheet_name))
+    except FileNotFoundError:
+        return None
+    with source:
+        return fingerprints_from_bytes(source.read())
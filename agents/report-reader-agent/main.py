@@ -1,14 +1,92 @@
 """Report Reader Agent - Excel & Google Sheets Parser with Cloud Storage"""
 import os
-import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from typing import Dict, List, Any, Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.cloud import storage
+from google.api_core import exceptions as google_exceptions
+
+from parse_executor import ParseExecutor, parse_sheet, scan_workbook_parallel
+from csv_stream import summarize_chunks
+from sheets_client import SheetsClient, quote_sheet_name
+from storage_io import (
+    BlobInfo,
+    DownloadSpool,
+    get_blob_info,
+    download_bytes,
+    open_blob_stream
+)
+from parse_cache import ParsedFrameCache, make_key, RAW_BYTES, METADATA, TABLES, PROFILE
+from sidecar_store import (
+    GCSSidecarBackend,
+    LocalSidecarBackend,
+    arrow_available,
+    read_sidecar,
+    write_sidecar,
+    apply_filters
+)
+from row_stream import (
+    CursorError,
+    encode_cursor,
+    decode_cursor,
+    open_sidecar_batches,
+    frame_batches,
+    frame_record_batches,
+    frame_schema,
+    ndjson_stream,
+    arrow_stream,
+    NDJSON_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE
+)
+from type_inference import infer_schema, apply_schema
+from frame_compaction import compact_dataframe, memory_bytes
+from query_engine import QueryError, run_query, result_to_json
+from table_detection import SCAN_ROWS, detect_tables, parse_range
+from profiling import (
+    SheetProfiler,
+    frame_chunks,
+    merge_sheet_profiles,
+    new_profile,
+    profile_chunks,
+    read_profile,
+    read_profile_state,
+    write_profile,
+    write_profile_state
+)
+from handles import Handle, HandleRegistry
+from normalization import new_manifest, read_manifest, write_manifest
+from response_encoding import (
+    ARROW,
+    MSGPACK,
+    MSGPACK_MEDIA_TYPE,
+    available_formats,
+    encode_arrow,
+    encode_msgpack,
+    negotiate
+)
+from ingest import (
+    CSV_SHEET,
+    HashingReader,
+    diff_fingerprints,
+    index_path,
+    read_fingerprints,
+    read_json,
+    read_prefix_digest,
+    row_fingerprints,
+    schema_signature,
+    state_path,
+    write_fingerprints,
+    write_json
+)
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Report Reader Agent")
 
@@ -29,20 +107,88 @@ except Exception as e:
     storage_client = None
     storage_available = False
 
-# Google Sheets API Setup
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+# Files above the spool threshold are streamed to a bounded local copy on
+# disk instead of being held in memory as bytes
+STORAGE_SPOOL_THRESHOLD_MB = int(os.getenv("STORAGE_SPOOL_THRESHOLD_MB", "32"))
+STORAGE_SPOOL_DIR = os.getenv("STORAGE_SPOOL_DIR", "/tmp/report-downloads")
+STORAGE_SPOOL_MAX_MB = int(os.getenv("STORAGE_SPOOL_MAX_MB", "2048"))
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "100000"))
+
+download_spool = DownloadSpool(STORAGE_SPOOL_DIR, STORAGE_SPOOL_MAX_MB * 1024 * 1024)
+
+# Parsed workbook cache (raw bytes, metadata and sheets per file generation)
+PARSE_CACHE_MAX_MB = int(os.getenv("PARSE_CACHE_MAX_MB", "256"))
+PARSE_CACHE_TTL_SECONDS = float(os.getenv("PARSE_CACHE_TTL_SECONDS", "1800"))
+PARSE_CACHE_REVALIDATE_SECONDS = float(os.getenv("PARSE_CACHE_REVALIDATE_SECONDS", "60"))
+# Store cached sheets compacted (category/downcast); fits more reports per instance
+PARSE_CACHE_COMPACT = os.getenv("PARSE_CACHE_COMPACT", "false").lower() == "true"
+
+parse_cache = ParsedFrameCache(
+    max_bytes=PARSE_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=PARSE_CACHE_TTL_SECONDS,
+    revalidate_seconds=PARSE_CACHE_REVALIDATE_SECONDS
+)
+
+# Parquet sidecars (columnar copy of each parsed sheet next to the original)
+SIDECAR_ENABLED = os.getenv("SIDECAR_ENABLED", "true").lower() == "true"
+SIDECAR_BACKEND = os.getenv("SIDECAR_BACKEND", "gcs")  # gcs | local
+SIDECAR_LOCAL_DIR = os.getenv("SIDECAR_LOCAL_DIR", "/tmp/report-sidecars")
+
+if SIDECAR_BACKEND == "local":
+    sidecar_backend = LocalSidecarBackend(SIDECAR_LOCAL_DIR)
+else:
+    sidecar_backend = GCSSidecarBackend(storage_client) if storage_available else None
+
+sidecars_available = SIDECAR_ENABLED and arrow_available and sidecar_backend is not None
+
+# Column profiles (JSON, stored next to the sidecars) computed at ingestion
+PROFILE_TOP_K = int(os.getenv("PROFILE_TOP_K", "5"))
+profiles_available = sidecar_backend is not None
+
+# Row streaming page limits (/read/sheet/rows)
+ROWS_PAGE_MAX = int(os.getenv("ROWS_PAGE_MAX", "50000"))
+ROWS_BATCH_SIZE = int(os.getenv("ROWS_BATCH_SIZE", "1000"))
+
+# Sidecars are written off the request path by a single background worker
+sidecar_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sidecar-writer")
+
+# Sheet parsing runs in a bounded process pool (0 workers = parse inline)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_QUEUE_MAX = int(os.getenv("PARSE_QUEUE_MAX", "16"))
+PARSE_PARALLEL_MIN_BYTES = int(os.getenv("PARSE_PARALLEL_MIN_BYTES", str(1024 * 1024)))
+
+parse_executor = ParseExecutor(max_workers=PARSE_WORKERS, max_queue=PARSE_QUEUE_MAX)
+
+# Multi-file reads (/read/batch): files are loaded by a bounded thread pool,
+# parsing itself still goes through the parse pool
+BATCH_READ_CONCURRENCY = int(os.getenv("BATCH_READ_CONCURRENCY", "4"))
+BATCH_READ_MAX_FILES = int(os.getenv("BATCH_READ_MAX_FILES", "24"))
+batch_reader = ThreadPoolExecutor(max_workers=BATCH_READ_CONCURRENCY, thread_name_prefix="batch-read")
+
+# Workbook handles (/handles): closed after HANDLE_IDLE_SECONDS without use
+HANDLE_IDLE_SECONDS = float(os.getenv("HANDLE_IDLE_SECONDS", "1800"))
+HANDLE_MAX = int(os.getenv("HANDLE_MAX", "1000"))
+handle_registry = HandleRegistry(HANDLE_IDLE_SECONDS, HANDLE_MAX)
+
+# Rows included in read responses (the rest is described by metadata)
+PREVIEW_ROWS = 100
+
+# Header-row / table-region detection looks at the first rows of each sheet
+TABLE_SCAN_ROWS = int(os.getenv("TABLE_SCAN_ROWS", str(SCAN_ROWS)))
+
+# Google Sheets API Setup (one client per process, results cached per revision)
+SHEETS_REVISION_TTL_SECONDS = float(os.getenv("SHEETS_REVISION_TTL_SECONDS", "30"))
+SHEETS_PAGE_ROWS = int(os.getenv("SHEETS_PAGE_ROWS", "10000"))
+SHEETS_PAGE_CONCURRENCY = int(os.getenv("SHEETS_PAGE_CONCURRENCY", "4"))
+
+sheets_client = SheetsClient(GOOGLE_CREDENTIALS_PATH, parse_cache,
+                             revision_ttl_seconds=SHEETS_REVISION_TTL_SECONDS,
+                             page_rows=SHEETS_PAGE_ROWS,
+                             page_concurrency=SHEETS_PAGE_CONCURRENCY)
 
 def get_sheets_service():
-    """Initialize Google Sheets API service"""
-    try:
-        credentials = service_account.Credentials.from_service_account_file(
-            GOOGLE_CREDENTIALS_PATH, scopes=SCOPES
-        )
-        service = build('sheets', 'v4', credentials=credentials)
-        return service
-    except Exception as e:
-        print(f"Warning: Could not initialize Google Sheets API: {e}")
-        return None
+    """Shared Google Sheets API service (None if not configured)"""
+    return sheets_client.service()
 
 # ==========================================
 # Data Models
@@ -58,14 +204,21 @@ class ReadStorageRequest(BaseModel):
 
 class ReadSheetsRequest(BaseModel):
     spreadsheet_id: str
-    range: str = "A1:Z1000"
+    range: Optional[str] = None  # None = whole sheet, sized by its gridProperties
     sheet_name: Optional[str] = None
 
+class ReadSheetsBatchRequest(BaseModel):
+    """Several ranges/sheets of one spreadsheet in one API call"""
+    spreadsheet_id: str
+    ranges: List[str] = []  # A1 ranges, e.g. "Продажи!A1:H5000"
+    sheet_names: List[str] = []  # Whole sheets
+
 class DataCleaningOptions(BaseModel):
     remove_empty_rows: bool = True
     remove_empty_columns: bool = True
     fill_missing_values: bool = False
     convert_types: bool = True
+    compact_memory: bool = False  # category for repetitive text, downcast numerics
 
 class ReadResponse(BaseModel):
     status: str
@@ -80,6 +233,7 @@ class SheetMetadata(BaseModel):
     columns: List[str]
     sample_data: List[Dict[str, Any]]
     data_types: Dict[str, str]
+    tables: List[Dict[str, Any]] = []  # Detected table regions (see /analyze/tables)
 
 class FileMetadata(BaseModel):
     sheets_count: int
@@ -88,10 +242,122 @@ class FileMetadata(BaseModel):
     file_path: str
     top_sheets_summary: List[SheetMetadata]
 
+class OverviewRequest(BaseModel):
+    file_path: str
+    bucket: Optional[str] = None
+    max_preview_sheets: int = 5  # Larger workbooks get no preview (sheet selection first)
+
 class ReadSheetRequest(BaseModel):
     file_path: str
     sheet_name: str
     bucket: Optional[str] = None
+    columns: Optional[List[str]] = None  # Column projection
+    header_row: int = 0
+    table_range: Optional[str] = None  # "B4:H120", or "auto" for the largest detected table
+
+class BatchReadItem(BaseModel):
+    file_path: str
+    sheet_name: Optional[str] = None  # Default: first sheet
+    header_row: int = 0
+    table_range: Optional[str] = None  # As in /read/sheet
+    label: Optional[str] = None  # Source name in results; default: file name
+
+class ReadBatchRequest(BaseModel):
+    """Several files (e.g. monthly reports) read in one call"""
+    files: List[BatchReadItem]
+    bucket: Optional[str] = None
+    columns: Optional[List[str]] = None  # Column projection, applied to every file
+    align: bool = True  # Keep only the columns common to all files
+    concat: bool = False  # Also return one vertically concatenated frame
+    source_column: str = "source"
+
+class NormalizeRequest(BaseModel):
+    file_path: str
+    bucket: Optional[str] = None
+    force: bool = False  # Convert again even if a normalized copy exists
+
+class DetectTablesRequest(BaseModel):
+    file_path: str
+    bucket: Optional[str] = None
+    sheet_name: Optional[str] = None  # Default: all sheets
+
+class ProfileRequest(BaseModel):
+    file_path: str
+    bucket: Optional[str] = None
+    compute: bool = True   # False: only return a stored profile (404 if none)
+    refresh: bool = False  # Recompute even if a profile is stored
+
+class IngestRequest(BaseModel):
+    file_path: str
+    bucket: Optional[str] = None
+    owner: Optional[str] = None               # Previous versions are looked up per owner
+    previous_file_path: Optional[str] = None  # Explicit previous version
+    key_columns: Optional[List[str]] = None   # Row identity (default: all columns)
+
+class ReadRowsRequest(BaseModel):
+    """Cursor-paginated row access; a cursor overrides all other fields"""
+    file_path: Optional[str] = None
+    sheet_name: Optional[str] = None
+    bucket: Optional[str] = None
+    header_row: int = 0
+    columns: Optional[List[str]] = None
+    offset: int = 0
+    limit: int = 1000
+    cursor: Optional[str] = None
+    format: str = "ndjson"  # ndjson | arrow
+
+class QueryFilter(BaseModel):
+    column: str
+    op: str = "=="  # ==, !=, >, >=, <, <=, in, not_in, contains, between, is_null, not_null
+    value: Any = None
+
+class QueryDateBucket(BaseModel):
+    column: str
+    freq: str = "month"  # day, week, month, quarter, year
+    alias: Optional[str] = None
+
+class QueryAggregation(BaseModel):
+    column: str = "*"
+    func: str = "sum"  # sum, mean, min, max, count, nunique, median, size
+    alias: Optional[str] = None
+
+class QuerySort(BaseModel):
+    column: str
+    descending: bool = False
+
+class QuerySpec(BaseModel):
+    filters: List[QueryFilter] = []
+    date_bucket: Optional[QueryDateBucket] = None
+    group_by: List[str] = []
+    aggregations: List[QueryAggregation] = []
+    sort: List[QuerySort] = []
+    limit: int = 100
+
+class QueryRequest(BaseModel):
+    """Server-side aggregation over a parsed sheet"""
+    file_path: str
+    sheet_name: Optional[str] = None
+    bucket: Optional[str] = None
+    header_row: int = 0
+    query: QuerySpec
+
+class OpenHandleRequest(BaseModel):
+    file_path: str
+    bucket: Optional[str] = None
+    sheet_names: Optional[List[str]] = None  # Default: all sheets
+    header_row: int = 0
+    preload: bool = False  # Parse the sheets now instead of on first read
+
+class HandleReadRequest(BaseModel):
+    sheet_name: Optional[str] = None  # Default: first sheet
+    columns: Optional[List[str]] = None
+    offset: int = 0
+    limit: int = 1000
+    orient: str = "records"  # records | columns
+
+class HandleQueryRequest(BaseModel):
+    sheet_name: Optional[str] = None  # Default: first sheet
+    query: QuerySpec
 
 # ==========================================
 # Helper Functions
@@ -122,14 +388,15 @@ def clean_dataframe(df: pd.DataFrame, options: DataCleaningOptions) -> pd.DataFr
         df = df.fillna(0)
         warnings.append("Filled missing values with 0")
     
-    # Convert types
+    # Convert types (sample-based inference, one vectorized pass per column)
     if options.convert_types:
-        # Try to convert numeric columns
-        for col in df.columns:
-            try:
-                df[col] = pd.to_numeric(df[col])
-            except (ValueError, TypeError):
-                pass  # Keep as string if conversion fails
+        schema = infer_schema(df)
+        df = apply_schema(df, schema)
+        df.attrs["inferred_schema"] = schema
+    
+    # Compact in-memory representation
+    if options.compact_memory:
+        df = compact_dataframe(df)
     
     return df, warnings
 
@@ -140,45 +407,717 @@ def extract_metadata(df: pd.DataFrame) -> Dict[str, Any]:
         "columns": len(df.columns),
         "column_names": df.columns.tolist(),
         "column_types": {col: str(df[col].dtype) for col in df.columns},
-        "has_missing_values": df.isnull().any().any(),
+        "has_missing_values": bool(df.isnull().any().any()),
         "numeric_columns": df.select_dtypes(include=['number']).columns.tolist(),
-        "text_columns": df.select_dtypes(include=['object']).columns.tolist()
+        "text_columns": df.select_dtypes(include=['object', 'category']).columns.tolist(),
+        "inferred_schema": df.attrs.get("inferred_schema"),
+        "memory_usage_bytes": memory_bytes(df),
+        "memory_compaction": df.attrs.get("memory_compaction")
     }
 
-def dataframe_to_json(df: pd.DataFrame) -> Dict[str, Any]:
-    """Convert dataframe to structured JSON"""
-    return {
+def dataframe_to_json(df: pd.DataFrame, records: bool = True) -> Dict[str, Any]:
+    """Convert dataframe to structured JSON
+    
+    records=False leaves out the preview rows (sent as Arrow instead).
+    """
+    data = {
         "columns": df.columns.tolist(),
         "rows": len(df),
-        "data": df.head(100).to_dict(orient='records'),  # Ограничиваем до 100 строк
         "summary": {
             "total_rows": len(df),
             "numeric_columns": df.select_dtypes(include=['number']).columns.tolist()
         }
     }
+    if records:
+        preview = df.head(PREVIEW_ROWS)  # Ограничиваем до 100 строк
+        # NaN/NaT are not valid JSON - send them as null
+        preview = preview.astype(object).where(preview.notna(), None)
+        data["data"] = preview.to_dict(orient='records')
+    return data
+
+def read_response(response: ReadResponse, df: pd.DataFrame, fmt: str):
+    """Encode a read response in the negotiated format (JSON: returned as is)"""
+    if fmt == ARROW:
+        return Response(encode_arrow(df.head(PREVIEW_ROWS), response.model_dump()),
+                        media_type=ARROW_STREAM_MEDIA_TYPE)
+    if fmt == MSGPACK:
+        return Response(encode_msgpack(response.model_dump()), media_type=MSGPACK_MEDIA_TYPE)
+    return response
 
 # ==========================================
 # Core Functions
 # ==========================================
 
-def read_from_storage(file_path: str, bucket_name: Optional[str] = None) -> bytes:
+def get_file_info(file_path: str, bucket_name: Optional[str] = None) -> BlobInfo:
+    """Get current GCS generation and size of a file (remembered for a short window)"""
+    if not storage_available:
+        raise HTTPException(status_code=503, detail="Cloud Storage not available")
+    
+    bucket_name = bucket_name or REPORTS_BUCKET
+    recent = parse_cache.recent_blob(bucket_name, file_path)
+    if recent is not None:
+        return BlobInfo(*recent)
+    
+    try:
+        info = get_blob_info(storage_client, bucket_name, file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read from storage: {str(e)}")
+    
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+    
+    parse_cache.remember_generation(bucket_name, file_path, info.generation, info.size)
+    return info
+
+def get_file_generation(file_path: str, bucket_name: Optional[str] = None) -> Optional[int]:
+    """Get current GCS generation of a file (remembered for a short window)"""
+    return get_file_info(file_path, bucket_name).generation
+
+def read_from_storage(file_path: str, bucket_name: Optional[str] = None,
+                      generation: Optional[int] = None) -> bytes:
     """Read file from Cloud Storage"""
     if not storage_available:
         raise HTTPException(status_code=503, detail="Cloud Storage not available")
     
     try:
-        bucket_name = bucket_name or REPORTS_BUCKET
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(file_path)
-        
-        if not blob.exists():
-            raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
-        
-        return blob.download_as_bytes()
+        return download_bytes(storage_client, bucket_name or REPORTS_BUCKET, file_path, generation)
     
+    except google_exceptions.NotFound:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read from storage: {str(e)}")
 
+@contextmanager
+def load_file_source(file_path: str, bucket_name: str, info: BlobInfo):
+    """Read a file through the parse cache (small) or the download spool (large)
+    
+    Yields raw bytes, or the path of a local copy for large files; the copy
+    stays pinned in the spool until the block exits.
+    """
+    if info.size is not None and info.size > STORAGE_SPOOL_THRESHOLD_MB * 1024 * 1024:
+        with ExitStack() as stack:
+            try:
+                path = stack.enter_context(download_spool.pinned(
+                    storage_client, bucket_name, file_path, info.generation))
+            except google_exceptions.NotFound:
+                raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to read from storage: {str(e)}")
+            yield path
+        return
+    
+    key = make_key(bucket_name, file_path, info.generation, RAW_BYTES)
+    file_bytes = parse_cache.get(key)
+    if file_bytes is None:
+        file_bytes = read_from_storage(file_path, bucket_name, info.generation)
+        parse_cache.put(key, file_bytes)
+    yield file_bytes
+
+def read_csv_from_storage(file_path: str, bucket_name: str, generation: Optional[int],
+                          header_row: int = 0) -> pd.DataFrame:
+    """Parse a CSV file chunk by chunk while it is being downloaded"""
+    try:
+        with open_blob_stream(storage_client, bucket_name, file_path, generation) as stream:
+            chunks = pd.read_csv(stream, header=header_row, chunksize=CSV_CHUNK_ROWS)
+            return pd.concat(chunks, ignore_index=True)
+    except google_exceptions.NotFound:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+
+def parse_file_bytes(file_path: str, file_bytes: bytes, sheet_name=0,
+                     header_row: int = 0) -> pd.DataFrame:
+    """Parse one sheet of an Excel file (or a CSV file) in the parse pool
+    
+    file_bytes may also be the path of a local copy of a large file.
+    """
+    return parse_executor.run(parse_sheet, file_path, file_bytes, sheet_name, header_row)
+
+def summarize_csv_from_storage(file_path: str, bucket_name: Optional[str] = None,
+                               header_row: int = 0,
+                               columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Stream a CSV file once: total rows, preview and per-column statistics"""
+    bucket_name = bucket_name or REPORTS_BUCKET
+    generation = get_file_generation(file_path, bucket_name)
+    try:
+        with open_blob_stream(storage_client, bucket_name, file_path, generation) as stream:
+            chunks = pd.read_csv(stream, header=header_row, usecols=columns,
+                                 chunksize=CSV_CHUNK_ROWS)
+            return summarize_chunks(chunks)
+    except google_exceptions.NotFound:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+
+def load_sidecar(file_path: str, bucket_name: str, generation: Optional[int],
+                 sheet_name, header_row: int = 0,
+                 columns: Optional[List[str]] = None,
+                 filters: Optional[List] = None) -> Optional[pd.DataFrame]:
+    """Read a sheet from its Parquet sidecar; None if missing or unreadable"""
+    if not sidecars_available:
+        return None
+    try:
+        return read_sidecar(sidecar_backend, bucket_name, file_path, generation,
+                            sheet_name, header_row, columns, filters)
+    except Exception as e:
+        logger.warning(f"Sidecar read failed for {file_path} [{sheet_name}]: {e}")
+        return None
+
+def schedule_sidecar_write(file_path: str, bucket_name: str, generation: Optional[int],
+                           sheet_name, header_row: int, df: pd.DataFrame):
+    """Write the sidecar of a freshly parsed sheet in the background"""
+    if not sidecars_available:
+        return
+    
+    def _write():
+        try:
+            write_sidecar(sidecar_backend, bucket_name, file_path, generation,
+                          sheet_name, header_row, df)
+        except Exception as e:
+            logger.warning(f"Sidecar write failed for {file_path} [{sheet_name}]: {e}")
+    
+    sidecar_writer.submit(_write)
+
+def load_sheet(file_path: str, bucket_name: Optional[str] = None,
+               sheet_name=0, header_row: int = 0,
+               columns: Optional[List[str]] = None,
+               filters: Optional[List] = None) -> pd.DataFrame:
+    """Load a parsed sheet through the parse cache and Parquet sidecar
+    
+    Lookup order: parse cache -> sidecar -> download and parse (which then
+    writes the sidecar). With columns/filters, a sidecar read is projected
+    and skips row groups; the full frame is cached only for unfiltered reads.
+    Returns a copy, so callers may modify the frame freely.
+    """
+    bucket_name = bucket_name or REPORTS_BUCKET
+    info = get_file_info(file_path, bucket_name)
+    generation = info.generation
+    
+    key = make_key(bucket_name, file_path, generation, sheet_name, header_row)
+    df = parse_cache.get(key)
+    
+    if df is None and (columns or filters):
+        projected = load_sidecar(file_path, bucket_name, generation, sheet_name,
+                                 header_row, columns, filters)
+        if projected is not None:
+            return projected
+    
+    if df is None:
+        df = load_sidecar(file_path, bucket_name, generation, sheet_name, header_row)
+        if df is None:
+            if file_path.endswith('.csv'):
+                df = read_csv_from_storage(file_path, bucket_name, generation, header_row)
+            else:
+                with load_file_source(file_path, bucket_name, info) as source:
+                    df = parse_file_bytes(file_path, source, sheet_name, header_row)
+            schedule_sidecar_write(file_path, bucket_name, generation,
+                                   sheet_name, header_row, df)
+        if PARSE_CACHE_COMPACT:
+            df = compact_dataframe(df)
+        parse_cache.put(key, df)
+    
+    df = apply_filters(df, filters)
+    if columns:
+        df = df[columns]
+    return df.copy()
+
+def sheet_tables(scan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Detected tables of a scanned sheet (none if its raw rows were not kept)"""
+    if "head" not in scan:
+        return []
+    return detect_tables(scan["head"], scan["last_row"])
+
+def load_manifest(file_path: str, bucket_name: str,
+                  generation: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Manifest of the normalized copy of a file; None if missing or unreadable"""
+    if not sidecars_available or file_path.endswith('.csv'):
+        return None
+    try:
+        return read_manifest(sidecar_backend, bucket_name, file_path, generation)
+    except Exception as e:
+        logger.warning(f"Manifest read failed for {file_path}: {e}")
+        return None
+
+def sheet_metadata(scan: Dict[str, Any], tables: List[Dict[str, Any]]) -> SheetMetadata:
+    """Metadata of a scanned sheet (columns, 2 sample rows, dtypes, detected tables)"""
+    df = scan["sample"]
+    return SheetMetadata(
+        name=scan["name"],
+        rows=scan["rows"],
+        columns=[str(col) for col in df.columns],
+        sample_data=df.head(2).to_dict(orient='records'),
+        data_types={str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        tables=tables
+    )
+
+def file_metadata(file_path: str, file_size: int, sheets: List[SheetMetadata]) -> FileMetadata:
+    """File metadata with a summary of the top 5 largest sheets"""
+    return FileMetadata(
+        sheets_count=len(sheets),
+        sheet_names=[sheet.name for sheet in sheets],
+        file_size_bytes=file_size,
+        file_path=file_path,
+        top_sheets_summary=sorted(sheets, key=lambda sheet: sheet.rows, reverse=True)[:5]
+    )
+
+def load_file_metadata(file_path: str, bucket_name: Optional[str] = None) -> FileMetadata:
+    """Metadata of all sheets: parse cache -> normalized manifest -> one-pass scan"""
+    bucket_name = bucket_name or REPORTS_BUCKET
+    info = get_file_info(file_path, bucket_name)
+    metadata_key = make_key(bucket_name, file_path, info.generation, METADATA)
+    cached_metadata = parse_cache.get(metadata_key)
+    if cached_metadata is not None:
+        return cached_metadata
+    
+    manifest = load_manifest(file_path, bucket_name, info.generation)
+    if manifest is not None:
+        # Normalized at upload: no download or parse of the original
+        file_size = manifest["file_size_bytes"]
+        sheets = [SheetMetadata(**sheet) for sheet in manifest["sheets"]]
+    else:
+        # Read file from storage
+        with load_file_source(file_path, bucket_name, info) as source:
+            file_size = info.size if info.size is not None else len(source)
+            
+            # Scan all sheets in one pass (row counts + first 3 rows); large
+            # workbooks are split across the parse pool sheet by sheet
+            sheet_scans = scan_workbook_parallel(parse_executor, source, sample_rows=3,
+                                                 file_size=file_size,
+                                                 min_parallel_bytes=PARSE_PARALLEL_MIN_BYTES,
+                                                 head_rows=TABLE_SCAN_ROWS)
+        sheets = [sheet_metadata(scan, sheet_tables(scan)) for scan in sheet_scans]
+    
+    # Detected tables come from the same scan; keep them for table reads
+    tables = {sheet.name: sheet.tables for sheet in sheets}
+    parse_cache.put(make_key(bucket_name, file_path, info.generation, TABLES), tables)
+    
+    metadata = file_metadata(file_path, file_size, sheets)
+    parse_cache.put(metadata_key, metadata)
+    return metadata
+
+def sheet_preview(file_path: str, bucket_name: Optional[str] = None, sheet_name=0) -> Dict[str, Any]:
+    """First sheet (or the CSV) as /read/storage returns it in JSON"""
+    df = load_sheet(file_path, bucket_name, None if file_path.endswith('.csv') else sheet_name)
+    df, warnings = clean_dataframe(df, DataCleaningOptions())
+    metadata = extract_metadata(df)
+    metadata["file_path"] = file_path
+    return ReadResponse(
+        status="success",
+        data=dataframe_to_json(df),
+        metadata=metadata,
+        warnings=warnings
+    ).model_dump()
+
+def load_file_tables(file_path: str, bucket_name: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Detected tables of every sheet, cached per file generation
+    
+    CSV files are read with header_row as given and are not scanned.
+    """
+    bucket_name = bucket_name or REPORTS_BUCKET
+    info = get_file_info(file_path, bucket_name)
+    key = make_key(bucket_name, file_path, info.generation, TABLES)
+    tables = parse_cache.get(key)
+    if tables is None:
+        manifest = load_manifest(file_path, bucket_name, info.generation)
+        if manifest is not None:
+            tables = {sheet["name"]: sheet["tables"] for sheet in manifest["sheets"]}
+        elif file_path.endswith('.csv'):
+            tables = {}
+        else:
+            with load_file_source(file_path, bucket_name, info) as source:
+                scans = scan_workbook_parallel(parse_executor, source, sample_rows=0,
+                                               file_size=info.size,
+                                               min_parallel_bytes=PARSE_PARALLEL_MIN_BYTES,
+                                               head_rows=TABLE_SCAN_ROWS)
+            tables = {scan["name"]: sheet_tables(scan) for scan in scans}
+        parse_cache.put(key, tables)
+    return tables
+
+def load_table(file_path: str, bucket_name: Optional[str], sheet_name: str,
+               table_range: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load only the cells of one table region of a sheet
+    
+    The sheet is loaded with the table's header row (so the parse cache and
+    sidecars are shared with plain header_row reads) and cut to the range.
+    "auto" picks the largest detected table; without one, the whole sheet.
+    """
+    if table_range == "auto":
+        tables = load_file_tables(file_path, bucket_name).get(sheet_name) or []
+        if not tables:
+            return load_sheet(file_path, bucket_name, sheet_name, columns=columns)
+        table_range = max(tables, key=lambda table: table["rows"])["range"]
+    
+    try:
+        first_row, last_row, first_col, last_col = parse_range(table_range)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    df = load_sheet(file_path, bucket_name, sheet_name, header_row=first_row - 1)
+    df = df.iloc[:last_row - first_row, first_col:last_col + 1]
+    if columns:
+        df = df[columns]
+    return df
+
+def load_batch_item(item: BatchReadItem, bucket_name: Optional[str],
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load one file of a batch read, like /read/storage or /read/sheet with table_range"""
+    if not item.file_path.endswith(('.xlsx', '.xls', '.csv')):
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {item.file_path}")
+    sheet_name = None if item.file_path.endswith('.csv') else item.sheet_name or 0
+    if item.table_range:
+        return load_table(item.file_path, bucket_name, sheet_name, item.table_range, columns)
+    return load_sheet(item.file_path, bucket_name, sheet_name, item.header_row, columns)
+
+def common_columns(frames: List[pd.DataFrame]) -> List[Any]:
+    """Columns present in every frame, in the order of the first one"""
+    if not frames:
+        return []
+    shared = set(frames[0].columns).intersection(*(df.columns for df in frames[1:]))
+    return [col for col in frames[0].columns if col in shared]
+
+def profile_csv_from_storage(file_path: str, bucket_name: str,
+                             generation: Optional[int]) -> SheetProfiler:
+    """Profile a CSV file chunk by chunk while it is being downloaded"""
+    try:
+        with open_blob_stream(storage_client, bucket_name, file_path, generation) as stream:
+            chunks = pd.read_csv(stream, chunksize=CSV_CHUNK_ROWS)
+            return profile_chunks(chunks, PROFILE_TOP_K)
+    except google_exceptions.NotFound:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+
+def largest_table_frames(file_path: str, bucket_name: str):
+    """(sheet name, table range, frame) of every sheet, cut to its largest detected table"""
+    for sheet_name, tables in load_file_tables(file_path, bucket_name).items():
+        table_range = max(tables, key=lambda t: t["rows"])["range"] if tables else None
+        if table_range:
+            df = load_table(file_path, bucket_name, sheet_name, table_range)
+        else:
+            df = load_sheet(file_path, bucket_name, sheet_name)
+        yield sheet_name, table_range, df
+
+def build_file_profile(file_path: str, bucket_name: str, info: BlobInfo) -> Dict[str, Any]:
+    """Profile every sheet (its largest detected table) of a file
+    
+    CSV files are profiled from the download stream without loading them
+    as one DataFrame. Columns shared by several sheets are also profiled
+    file-wide by merging their sketches.
+    """
+    profile = new_profile(file_path, info.generation)
+    if file_path.endswith('.csv'):
+        profiler = profile_csv_from_storage(file_path, bucket_name, info.generation)
+        profile["sheets"].append({"name": os.path.basename(file_path), "table_range": None,
+                                  **profiler.to_dict()})
+        return profile
+    
+    profilers = []
+    for sheet_name, table_range, df in largest_table_frames(file_path, bucket_name):
+        profiler = profile_chunks(frame_chunks(df), PROFILE_TOP_K)
+        profilers.append(profiler)
+        profile["sheets"].append({"name": sheet_name, "table_range": table_range,
+                                  **profiler.to_dict()})
+    
+    profile["columns_across_sheets"] = merge_sheet_profiles(profilers)
+    return profile
+
+def load_file_profile(file_path: str, bucket_name: Optional[str] = None,
+                      compute: bool = True, refresh: bool = False) -> Optional[Dict[str, Any]]:
+    """Column profile of a file: parse cache -> stored JSON -> compute and store"""
+    bucket_name = bucket_name or REPORTS_BUCKET
+    info = get_file_info(file_path, bucket_name)
+    key = make_key(bucket_name, file_path, info.generation, PROFILE)
+    
+    if not refresh:
+        profile = parse_cache.get(key)
+        if profile is None and profiles_available:
+            profile = read_profile(sidecar_backend, bucket_name, file_path, info.generation)
+        if profile is not None:
+            parse_cache.put(key, profile)
+            return profile
+        if not compute:
+            return None
+    
+    profile = build_file_profile(file_path, bucket_name, info)
+    if profiles_available:
+        try:
+            write_profile(sidecar_backend, bucket_name, file_path, info.generation, profile)
+        except Exception as e:
+            logger.warning(f"Profile write failed for {file_path}: {e}")
+    parse_cache.put(key, profile)
+    return profile
+
+def find_previous_version(file_path: str, bucket_name: str, signature: str,
+                          owner: Optional[str] = None,
+                          previous_file_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Ingest state of the previous version of a report, or None
+    
+    Without an explicit previous file, the latest report ingested by the
+    same owner with the same sheets and columns is used.
+    """
+    if previous_file_path:
+        generation = get_file_info(previous_file_path, bucket_name).generation
+        return read_json(sidecar_backend, bucket_name, state_path(previous_file_path, generation))
+    if owner:
+        entry = read_json(sidecar_backend, bucket_name, index_path(owner, signature))
+        if entry and entry["file_path"] != file_path:
+            return read_json(sidecar_backend, bucket_name,
+                             state_path(entry["file_path"], entry["generation"]))
+    return None
+
+def ingest_frame(df: pd.DataFrame, key_columns: Optional[List[str]],
+                 previous_fingerprints, previous_profiler: Optional[SheetProfiler]):
+    """Fingerprint a sheet, diff it against its previous version and profile the delta
+    
+    Appended or added rows are merged into the previous profile. Sketches
+    cannot forget rows, so a sheet with removed rows is profiled again.
+    Returns (profiler, fingerprints, diff).
+    """
+    fingerprints = row_fingerprints(df, key_columns)
+    same_columns = (previous_profiler is not None and
+                    list(previous_profiler.columns) == [str(col) for col in df.columns])
+    if previous_fingerprints is None or not same_columns:
+        diff = {"kind": "new", "previous_rows": 0, "rows": len(df),
+                "unchanged": 0, "removed": 0, "added": range(len(df))}
+    else:
+        diff = diff_fingerprints(previous_fingerprints, fingerprints)
+    
+    if diff["kind"] != "new" and not diff["removed"]:
+        profiler = previous_profiler
+        delta = df.iloc[diff["added"]]
+        if len(delta):
+            for chunk in frame_chunks(delta):
+                profiler.update(chunk)
+        diff["profiled_rows"] = len(delta)
+    else:
+        profiler = profile_chunks(frame_chunks(df), PROFILE_TOP_K)
+        diff["profiled_rows"] = len(df)
+    return profiler, fingerprints, diff
+
+def read_csv_columns(file_path: str, bucket_name: str, generation: Optional[int]) -> List[str]:
+    try:
+        with open_blob_stream(storage_client, bucket_name, file_path, generation) as stream:
+            return [str(col) for col in pd.read_csv(stream, nrows=0).columns]
+    except google_exceptions.NotFound:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+
+def ingest_csv(file_path: str, bucket_name: str, info: BlobInfo,
+               key_columns: Optional[List[str]], previous: Optional[Dict[str, Any]],
+               previous_fingerprints, previous_profiler: Optional[SheetProfiler]):
+    """Ingest a CSV file, parsing only the appended bytes when possible
+    
+    If the previous version is a byte prefix of the new file (same size and
+    SHA-256 of the first bytes), only the rest is parsed and profiled.
+    Otherwise the file is streamed once: hashed, fingerprinted and profiled.
+    Returns (profiler, fingerprints, diff, csv state).
+    """
+    previous_csv = (previous or {}).get("csv")
+    try:
+        if (previous_csv and previous_csv["ends_with_newline"] and previous_profiler is not None
+                and previous_fingerprints is not None and info.size >= previous_csv["size"]):
+            with open_blob_stream(storage_client, bucket_name, file_path, info.generation) as stream:
+                digest, prefix_size = read_prefix_digest(stream, previous_csv["size"])
+                if prefix_size == previous_csv["size"] and digest.hexdigest() == previous_csv["sha256"]:
+                    reader = HashingReader(stream, digest)
+                    added = []
+                    if info.size > prefix_size:
+                        chunks = pd.read_csv(reader, header=None, names=previous_csv["columns"],
+                                             chunksize=CSV_CHUNK_ROWS)
+                        for chunk in chunks:
+                            previous_profiler.update(chunk)
+                            added.append(row_fingerprints(chunk, key_columns))
+                    delta = np.concatenate(added) if added else np.zeros(0, dtype=np.uint64)
+                    n_previous = len(previous_fingerprints)
+                    diff = {"kind": "append" if len(delta) else "identical",
+                            "previous_rows": n_previous, "rows": n_previous + len(delta),
+                            "unchanged": n_previous, "removed": 0, "added": delta,
+                            "profiled_rows": len(delta)}
+                    csv_state = {**previous_csv, "size": prefix_size + reader.bytes_read,
+                                 "sha256": reader.hexdigest(),
+                                 "ends_with_newline": (reader.last_byte or b"\n") == b"\n"}
+                    return (previous_profiler, np.concatenate([previous_fingerprints, delta]),
+                            diff, csv_state)
+        
+        with open_blob_stream(storage_client, bucket_name, file_path, info.generation) as stream:
+            reader = HashingReader(stream)
+            profiler = SheetProfiler(PROFILE_TOP_K)
+            parts, columns = [], []
+            for chunk in pd.read_csv(reader, chunksize=CSV_CHUNK_ROWS):
+                profiler.update(chunk)
+                parts.append(row_fingerprints(chunk, key_columns))
+                columns = [str(col) for col in chunk.columns]
+    except google_exceptions.NotFound:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+    
+    fingerprints = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+    if previous_fingerprints is None:
+        diff = {"kind": "new", "previous_rows": 0, "rows": len(fingerprints),
+                "unchanged": 0, "removed": 0, "added": fingerprints}
+    else:
+        diff = diff_fingerprints(previous_fingerprints, fingerprints)
+    diff["profiled_rows"] = len(fingerprints)
+    csv_state = {"size": reader.bytes_read, "sha256": reader.hexdigest(),
+                 "ends_with_newline": reader.last_byte == b"\n", "columns": columns}
+    return profiler, fingerprints, diff, csv_state
+
+def ingest_file(file_path: str, bucket_name: Optional[str] = None, owner: Optional[str] = None,
+                previous_file_path: Optional[str] = None,
+                key_columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Ingest a new upload incrementally against the previous version of the report
+    
+    Every sheet is fingerprinted row by row and classified against the
+    previous version (identical, append, update, new); only new rows are
+    profiled and merged into the stored sketches. Stores the fingerprints,
+    the profile (served by /profile) and its state for the next version.
+    """
+    if not profiles_available:
+        raise HTTPException(status_code=503, detail="Sidecar storage not available")
+    
+    bucket_name = bucket_name or REPORTS_BUCKET
+    info = get_file_info(file_path, bucket_name)
+    is_csv = file_path.endswith('.csv')
+    
+    if is_csv:
+        tables = None
+        signature = schema_signature({CSV_SHEET: read_csv_columns(file_path, bucket_name,
+                                                                  info.generation)})
+    else:
+        tables = load_file_tables(file_path, bucket_name)
+        signature = schema_signature({
+            name: max(sheet, key=lambda t: t["rows"])["columns"] if sheet else []
+            for name, sheet in tables.items()
+        })
+    
+    previous = find_previous_version(file_path, bucket_name, signature, owner, previous_file_path)
+    if previous is not None and previous.get("key_columns") != key_columns:
+        previous = None  # Fingerprints of other key columns are not comparable
+    previous_profilers: Dict[str, SheetProfiler] = {}
+    if previous is not None:
+        previous_profilers = read_profile_state(sidecar_backend, bucket_name,
+                                                previous["file_path"], previous["generation"])
+    
+    def previous_fingerprints(sheet_name):
+        if previous is None:
+            return None
+        return read_fingerprints(sidecar_backend, bucket_name, previous["file_path"],
+                                 previous["generation"], sheet_name)
+    
+    profile = new_profile(file_path, info.generation)
+    state: Dict[str, Any] = {
+        "file_path": file_path, "generation": info.generation, "owner": owner,
+        "signature": signature, "key_columns": key_columns,
+        "previous_file_path": previous["file_path"] if previous else None, "sheets": {},
+    }
+    profilers: Dict[str, SheetProfiler] = {}
+    summaries = []
+    
+    if is_csv:
+        profiler, fingerprints, diff, state["csv"] = ingest_csv(
+            file_path, bucket_name, info, key_columns, previous,
+            previous_fingerprints(CSV_SHEET), previous_profilers.get(CSV_SHEET)
+        )
+        sheets = [(CSV_SHEET, os.path.basename(file_path), None, profiler, fingerprints, diff)]
+    else:
+        sheets = []
+        for sheet_name, table_range, df in largest_table_frames(file_path, bucket_name):
+            profiler, fingerprints, diff = ingest_frame(
+                df, key_columns, previous_fingerprints(sheet_name),
+                previous_profilers.get(sheet_name)
+            )
+            sheets.append((sheet_name, sheet_name, table_range, profiler, fingerprints, diff))
+    
+    for key, name, table_range, profiler, fingerprints, diff in sheets:
+        write_fingerprints(sidecar_backend, bucket_name, file_path, info.generation,
+                           key, fingerprints)
+        profilers[key] = profiler
+        state["sheets"][key] = {"rows": profiler.rows, "table_range": table_range}
+        profile["sheets"].append({"name": name, "table_range": table_range, **profiler.to_dict()})
+        summaries.append({
+            "name": name, "kind": diff["kind"], "rows": diff["rows"],
+            "added": len(diff["added"]), "removed": diff["removed"],
+            "unchanged": diff["unchanged"], "profiled_rows": diff["profiled_rows"],
+        })
+    if not is_csv:
+        profile["columns_across_sheets"] = merge_sheet_profiles(list(profilers.values()))
+    
+    write_profile_state(sidecar_backend, bucket_name, file_path, info.generation, profilers)
+    write_profile(sidecar_backend, bucket_name, file_path, info.generation, profile)
+    parse_cache.put(make_key(bucket_name, file_path, info.generation, PROFILE), profile)
+    write_json(sidecar_backend, bucket_name, state_path(file_path, info.generation), state)
+    if owner:
+        write_json(sidecar_backend, bucket_name, index_path(owner, signature),
+                   {"file_path": file_path, "generation": info.generation})
+    
+    return {
+        "file_path": file_path,
+        "generation": info.generation,
+        "previous_file_path": state["previous_file_path"],
+        "sheets": summaries,
+    }
+
+def resolve_handle(handle_id: str) -> Handle:
+    """Open handle by ID; fails if it expired or its file was re-uploaded"""
+    handle = handle_registry.get(handle_id)
+    if handle is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired handle: {handle_id}")
+    if get_file_generation(handle.file_path, handle.bucket) != handle.generation:
+        handle_registry.close(handle.id)
+        raise HTTPException(status_code=409,
+                            detail=f"File changed since the handle was opened: {handle.file_path}")
+    return handle
+
+def load_handle_sheet(handle: Handle, sheet_name: Optional[str] = None,
+                      columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Sheet of an open handle, projected to columns (parse cache -> sidecar -> parse)"""
+    try:
+        sheet = handle.sheet(sheet_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Sheet not found: {sheet_name}")
+    
+    try:
+        return load_sheet(handle.file_path, handle.bucket, sheet, handle.header_row, columns)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {e}")
+
+def normalize_file(file_path: str, bucket_name: Optional[str] = None,
+                   force: bool = False) -> Dict[str, Any]:
+    """Convert a workbook to Parquet sidecars plus a scan manifest, once per generation
+    
+    Every sheet is written for header row 0 and for the header rows of its
+    detected tables; the manifest (sheet metadata and tables) goes last.
+    """
+    if not sidecars_available:
+        raise HTTPException(status_code=503, detail="Sidecar storage not available")
+    if not file_path.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Only .xlsx/.xls workbooks are normalized")
+    
+    bucket_name = bucket_name or REPORTS_BUCKET
+    info = get_file_info(file_path, bucket_name)
+    if not force:
+        manifest = load_manifest(file_path, bucket_name, info.generation)
+        if manifest is not None:
+            return {"file_path": file_path, "generation": info.generation,
+                    "status": "exists", "sheets": len(manifest["sheets"])}
+    
+    with load_file_source(file_path, bucket_name, info) as source:
+        file_size = info.size if info.size is not None else len(source)
+        scans = scan_workbook_parallel(parse_executor, source, sample_rows=3,
+                                       file_size=file_size,
+                                       min_parallel_bytes=PARSE_PARALLEL_MIN_BYTES,
+                                       head_rows=TABLE_SCAN_ROWS)
+        sheets = [sheet_metadata(scan, sheet_tables(scan)) for scan in scans]
+        parts = [(sheet.name, header_row) for sheet in sheets
+                 for header_row in sorted({0} | {table["header_row"] for table in sheet.tables})]
+        
+        def _convert(part):
+            sheet_name, header_row = part
+            df = parse_file_bytes(file_path, source, sheet_name, header_row)
+            return write_sidecar(sidecar_backend, bucket_name, file_path, info.generation,
+                                 sheet_name, header_row, df)
+        
+        written = [path for path in batch_reader.map(_convert, parts) if path is not None]
+    
+    write_manifest(sidecar_backend, bucket_name, file_path, info.generation,
+                   new_manifest(file_path, info.generation, file_size,
+                                [sheet.model_dump() for sheet in sheets]))
+    parse_cache.put(make_key(bucket_name, file_path, info.generation, TABLES),
+                    {sheet.name: sheet.tables for sheet in sheets})
+    return {"file_path": file_path, "generation": info.generation,
+            "status": "normalized", "sheets": len(sheets), "sidecars": len(written)}
+
 def read_excel_file(file_path: str, sheet_name: Optional[str] = None, 
                    header_row: int = 0) -> pd.DataFrame:
     """Read Excel file"""
@@ -191,34 +1130,67 @@ def read_excel_file(file_path: str, sheet_name: Optional[str] = None,
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read Excel file: {str(e)}")
 
-def read_google_sheets(spreadsheet_id: str, range_name: str = "A1:Z1000", 
-                       sheet_name: Optional[str] = None) -> pd.DataFrame:
-    """Read Google Sheets"""
+def values_to_dataframe(values: List[List[Any]]) -> pd.DataFrame:
+    """Convert Sheets API rows (first row = header) to a DataFrame
+    
+    The API omits trailing empty cells, so short rows are padded.
+    """
+    header = values[0]
+    width = max(len(header), max((len(row) for row in values[1:]), default=0))
+    columns = list(header) + [f"Unnamed: {i}" for i in range(len(header), width)]
+    rows = [row + [None] * (width - len(row)) for row in values[1:]]
+    return pd.DataFrame(rows, columns=columns)
+
+def read_google_sheets_batch(spreadsheet_id: str,
+                             ranges: List[str]) -> Dict[str, pd.DataFrame]:
+    """Read several ranges of one spreadsheet with a single batchGet call"""
     try:
-        service = get_sheets_service()
-        if not service:
+        if not sheets_client.available:
             raise HTTPException(status_code=503, detail="Google Sheets API not configured")
         
-        # Adjust range if sheet name provided
-        if sheet_name:
-            range_name = f"{sheet_name}!{range_name}"
-        
-        # Call the Sheets API
-        sheet = service.spreadsheets()
-        result = sheet.values().get(
-            spreadsheetId=spreadsheet_id,
-            range=range_name
-        ).execute()
+        results = sheets_client.batch_get(spreadsheet_id, ranges)
+        return {
+            range_name: values_to_dataframe(values) if values else pd.DataFrame()
+            for range_name, values in results.items()
+        }
+    
+    except HTTPException:
+        raise
+    except HttpError as e:
+        raise HTTPException(status_code=400, detail=f"Google Sheets API error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read Google Sheets: {str(e)}")
+
+def read_google_sheets(spreadsheet_id: str, range_name: Optional[str] = None,
+                       sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """Read Google Sheets
+    
+    Without range_name the whole sheet (first sheet by default) is read,
+    sized by its grid and fetched in parallel pages.
+    """
+    try:
+        if not sheets_client.available:
+            raise HTTPException(status_code=503, detail="Google Sheets API not configured")
         
-        values = result.get('values', [])
+        # Call the Sheets API (cached per spreadsheet revision)
+        if range_name:
+            # Adjust range if sheet name provided
+            if sheet_name:
+                range_name = f"{quote_sheet_name(sheet_name)}!{range_name}"
+            values = sheets_client.get_values(spreadsheet_id, range_name)
+        else:
+            try:
+                values = sheets_client.read_sheet(spreadsheet_id, sheet_name)
+            except KeyError as e:
+                raise HTTPException(status_code=404, detail=str(e.args[0]))
         
         if not values:
             raise HTTPException(status_code=404, detail="No data found in spreadsheet")
         
-        # Convert to DataFrame
-        df = pd.DataFrame(values[1:], columns=values[0])
-        return df
+        return values_to_dataframe(values)
     
+    except HTTPException:
+        raise
     except HttpError as e:
         raise HTTPException(status_code=400, detail=f"Google Sheets API error: {str(e)}")
     except Exception as e:
@@ -230,7 +1202,7 @@ def read_google_sheets(spreadsheet_id: str, range_name: str = "A1:Z1000",
 
 @app.get("/health")
 async def health():
-    sheets_available = get_sheets_service() is not None
+    sheets_available = sheets_client.available  # No API call
     return {
         "status": "healthy",
         "agent": "report-reader",
@@ -239,14 +1211,30 @@ async def health():
             "excel": True,
             "google_sheets": sheets_available,
             "cloud_storage": storage_available,
-            "multi_sheet": True  # NEW
-        }
+            "multi_sheet": True,  # NEW
+            "file_overview": True,
+            "parquet_sidecars": sidecars_available,
+            "upload_normalization": sidecars_available,
+            "column_profiles": profiles_available,
+            "incremental_ingest": profiles_available,
+            "response_formats": [fmt for fmt, ok in available_formats().items() if ok]
+        },
+        "parse_cache": parse_cache.stats(),
+        "handles": handle_registry.stats(),
+        "parse_executor": parse_executor.stats(),
+        "download_spool": download_spool.stats(),
+        "sheets_client": sheets_client.stats()
     }
 
+# Endpoints that download or parse files are plain `def`: FastAPI runs them in
+# its thread pool, so the event loop stays free while they wait on storage
+# and on the parse pool.
+
 @app.post("/analyze/metadata")
-async def get_file_metadata(request: ReadStorageRequest) -> FileMetadata:
+def get_file_metadata(request: ReadStorageRequest) -> FileMetadata:
     """Get metadata for all sheets in Excel file without loading full data
     
+    The workbook is parsed once (streaming, read-only) for all sheets.
     This endpoint scans all sheets and returns:
     - Total number of sheets
     - Sheet names
@@ -260,80 +1248,88 @@ async def get_file_metadata(request: ReadStorageRequest) -> FileMetadata:
         if not file_path:
             raise HTTPException(status_code=400, detail="file_path is required")
         
-        # Read file from storage
-        file_bytes = read_from_storage(file_path, bucket_name)
+        return load_file_metadata(file_path, bucket_name)
         
-        # Read all sheets (only first 3 rows for metadata)
-        all_sheets = pd.read_excel(
-            io.BytesIO(file_bytes),
-            sheet_name=None,  # Load all sheets
-            nrows=3  # Only first 3 rows for preview
-        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metadata extraction failed: {str(e)}")
+
+@app.post("/analyze/overview")
+def get_file_overview(request: OverviewRequest):
+    """Everything the first question about a file needs, in one call
+    
+    Returns the file generation, the workbook metadata, the stored column
+    profile (never computed here) and, for workbooks of up to
+    max_preview_sheets sheets without a profile, a /read/storage-style
+    preview of the first sheet.
+    The file is downloaded at most once for the metadata scan and the
+    preview, instead of once per /analyze/metadata and /read/storage call.
+    """
+    try:
+        bucket_name = request.bucket or REPORTS_BUCKET
+        metadata = None
+        sheets_count = 1
+        if request.file_path.endswith(('.xlsx', '.xls')):
+            metadata = load_file_metadata(request.file_path, bucket_name)
+            sheets_count = metadata.sheets_count
         
-        # Get full row counts by reading without nrows limit
-        sheet_row_counts = {}
-        for sheet_name in all_sheets.keys():
-            df_full = pd.read_excel(io.BytesIO(file_bytes), sheet_name=sheet_name)
-            sheet_row_counts[sheet_name] = len(df_full)
-        
-        # Sort sheets by size (row count)
-        sorted_sheets = sorted(
-            sheet_row_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]  # Top 5 largest sheets
-        
-        # Build detailed metadata for top sheets
-        top_sheets_summary = []
-        for sheet_name, row_count in sorted_sheets:
-            df = all_sheets[sheet_name]
-            
-            # Clean column names
-            columns = [str(col) for col in df.columns]
-            
-            # Get sample data (first 2 rows)
-            sample_data = df.head(2).to_dict(orient='records')
-            
-            # Get data types
-            data_types = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
-            
-            top_sheets_summary.append(SheetMetadata(
-                name=sheet_name,
-                rows=row_count,
-                columns=columns,
-                sample_data=sample_data,
-                data_types=data_types
-            ))
-        
-        return FileMetadata(
-            sheets_count=len(all_sheets),
-            sheet_names=list(all_sheets.keys()),
-            file_size_bytes=len(file_bytes),
-            file_path=file_path,
-            top_sheets_summary=top_sheets_summary
-        )
+        profile = load_file_profile(request.file_path, bucket_name, compute=False)
+        has_profile = profile is not None and any(sheet.get("rows") for sheet in profile.get("sheets", []))
         
+        preview = None
+        if sheets_count <= request.max_preview_sheets and not has_profile:
+            preview = sheet_preview(request.file_path, bucket_name)
+        
+        return {
+            "status": "success",
+            "file_path": request.file_path,
+            "generation": get_file_generation(request.file_path, bucket_name),
+            "metadata": metadata,
+            "profile": profile,
+            "preview": preview
+        }
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Metadata extraction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Overview failed: {str(e)}")
+
+@app.post("/normalize")
+def normalize_workbook(request: NormalizeRequest):
+    """Convert an uploaded workbook to the internal columnar format
+    
+    Called by the upload flows in the background, right after upload. Later
+    reads and metadata requests use the normalized copy instead of parsing
+    the original .xls/.xlsx again.
+    """
+    try:
+        return normalize_file(request.file_path, request.bucket, request.force)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Normalization failed: {str(e)}")
 
 @app.post("/read/sheet", response_model=ReadResponse)
-async def read_specific_sheet(
+def read_specific_sheet(
     request: ReadSheetRequest,
-    cleaning: DataCleaningOptions = DataCleaningOptions()
+    cleaning: DataCleaningOptions = DataCleaningOptions(),
+    accept: Optional[str] = Header(None)
 ):
     """Read specific sheet by name from Excel file
     
     Use this after getting metadata to load full data from a specific sheet.
+    Responds with Arrow or MessagePack if the Accept header asks for it.
     """
     try:
-        # Read file from storage
-        file_bytes = read_from_storage(request.file_path, request.bucket)
+        fmt = negotiate(accept)
         
-        # Read specific sheet
-        df = pd.read_excel(
-            io.BytesIO(file_bytes),
-            sheet_name=request.sheet_name
-        )
+        # Read specific sheet (cached per file generation)
+        if request.table_range:
+            df = load_table(request.file_path, request.bucket, request.sheet_name,
+                            request.table_range, request.columns)
+        else:
+            df = load_sheet(request.file_path, request.bucket, request.sheet_name,
+                            request.header_row, request.columns)
         
         # Clean data
         df, warnings = clean_dataframe(df, cleaning)
@@ -342,50 +1338,361 @@ async def read_specific_sheet(
         metadata = extract_metadata(df)
         metadata["file_path"] = request.file_path
         metadata["sheet_name"] = request.sheet_name
+        if request.table_range:
+            metadata["table_range"] = request.table_range
         
         # Convert to JSON
-        data = dataframe_to_json(df)
+        data = dataframe_to_json(df, records=fmt != ARROW)
         
-        return ReadResponse(
+        return read_response(ReadResponse(
             status="success",
             data=data,
             metadata=metadata,
             warnings=warnings
-        )
+        ), df, fmt)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read sheet: {str(e)}")
 
+@app.post("/analyze/tables")
+def analyze_tables(request: DetectTablesRequest):
+    """Detect header rows and table regions of messy sheets
+    
+    Title blocks, notes and several tables on one sheet are common in
+    marketplace exports. Each detected table has a bounding range that can
+    be passed to /read/sheet as table_range to load only the real data.
+    """
+    try:
+        tables = load_file_tables(request.file_path, request.bucket)
+        if request.sheet_name is not None:
+            if request.sheet_name not in tables:
+                raise HTTPException(status_code=404, detail=f"Sheet not found: {request.sheet_name}")
+            tables = {request.sheet_name: tables[request.sheet_name]}
+        
+        return {
+            "file_path": request.file_path,
+            "sheets": [{"name": name, "tables": sheet} for name, sheet in tables.items()]
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Table detection failed: {str(e)}")
+
+@app.post("/profile")
+def get_file_profile(request: ProfileRequest):
+    """Per-sheet column profile: types, null ratios, numeric stats, date ranges, top values
+    
+    Computed once per file generation (at upload) and stored as JSON next to
+    the file, so analysis prompts can describe the data without parsing it.
+    """
+    try:
+        profile = load_file_profile(request.file_path, request.bucket,
+                                    compute=request.compute, refresh=request.refresh)
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"No profile for: {request.file_path}")
+        return profile
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Profiling failed: {str(e)}")
+
+@app.post("/ingest")
+def ingest_report(request: IngestRequest):
+    """Ingest an upload incrementally against the previous version of the same report
+    
+    Re-uploads of a report with appended or edited rows are detected by
+    row fingerprints; only the new rows are profiled (for appended CSV
+    files, only the new bytes are parsed). Returns per-sheet diff counts.
+    """
+    try:
+        return ingest_file(request.file_path, request.bucket, request.owner,
+                           request.previous_file_path, request.key_columns)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ingest failed: {str(e)}")
+
+@app.post("/read/sheet/rows")
+def read_sheet_rows(request: ReadRowsRequest):
+    """Stream rows of a sheet page by page (NDJSON or Arrow IPC stream)
+    
+    Use X-Next-Cursor from the response headers to fetch the next page.
+    Memory use is bounded by the page size, not the sheet size: pages are
+    read from the Parquet sidecar row group by row group when available.
+    """
+    try:
+        if request.cursor:
+            position = decode_cursor(request.cursor)
+        else:
+            if not request.file_path:
+                raise HTTPException(status_code=400, detail="file_path or cursor is required")
+            position = {
+                "file_path": request.file_path,
+                "bucket": request.bucket or REPORTS_BUCKET,
+                "sheet_name": request.sheet_name if request.sheet_name is not None else 0,
+                "header_row": request.header_row,
+                "columns": request.columns,
+                "offset": request.offset,
+                "limit": request.limit,
+                "format": request.format
+            }
+        
+        if position["format"] not in ("ndjson", "arrow"):
+            raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'arrow'")
+        
+        file_path = position["file_path"]
+        bucket_name = position["bucket"]
+        sheet_name = position["sheet_name"]
+        header_row = position["header_row"]
+        columns = position["columns"]
+        offset = max(0, position["offset"])
+        limit = max(1, min(position["limit"], ROWS_PAGE_MAX))
+        
+        generation = get_file_generation(file_path, bucket_name)
+        if "generation" in position and position["generation"] != generation:
+            raise HTTPException(status_code=409, detail="File changed since cursor was issued")
+        
+        # Prefer the sidecar: only the row groups of this page are read
+        sidecar = None
+        if sidecars_available and parse_cache.get(
+                make_key(bucket_name, file_path, generation, sheet_name, header_row)) is None:
+            try:
+                sidecar = open_sidecar_batches(
+                    sidecar_backend, bucket_name, file_path, generation, sheet_name,
+                    header_row, columns, offset, limit, ROWS_BATCH_SIZE
+                )
+            except Exception as e:
+                logger.warning(f"Sidecar stream failed for {file_path}: {e}")
+        
+        if sidecar is not None:
+            total_rows, schema, batches = sidecar
+        else:
+            df = load_sheet(file_path, bucket_name, sheet_name, header_row, columns)
+            total_rows = len(df)
+            if position["format"] == "arrow":
+                schema = frame_schema(df)
+                batches = frame_record_batches(df, offset, limit, ROWS_BATCH_SIZE)
+            else:
+                batches = frame_batches(df, offset, limit, ROWS_BATCH_SIZE)
+        
+        headers = {"X-Total-Rows": str(total_rows)}
+        if offset + limit < total_rows:
+            headers["X-Next-Cursor"] = encode_cursor({
+                **position,
+                "generation": generation,
+                "offset": offset + limit,
+                "limit": limit
+            })
+        
+        if position["format"] == "arrow":
+            return StreamingResponse(arrow_stream(batches, schema), media_type=ARROW_STREAM_MEDIA_TYPE,
+                                     headers=headers)
+        return StreamingResponse(ndjson_stream(batches), media_type=NDJSON_MEDIA_TYPE,
+                                 headers=headers)
+    
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read rows: {str(e)}")
+
+@app.post("/query")
+def query_sheet(request: QueryRequest):
+    """Run a declarative query (filter, group-by, aggregate, sort, top-N)
+    
+    The query runs next to the cached data; only the aggregated result is
+    returned, e.g. revenue by category per month.
+    """
+    try:
+        spec = request.query.model_dump()
+        sheet_name = request.sheet_name if request.sheet_name is not None else 0
+        
+        # Full sheet goes through the parse cache, so follow-up queries are cheap
+        df = load_sheet(request.file_path, request.bucket, sheet_name, request.header_row)
+        source_rows = len(df)
+        
+        result = run_query(df, spec)
+        
+        return {
+            "status": "success",
+            "result": result_to_json(result),
+            "metadata": {
+                "file_path": request.file_path,
+                "sheet_name": request.sheet_name,
+                "source_rows": source_rows
+            }
+        }
+    
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
+@app.post("/handles")
+def open_handle(request: OpenHandleRequest):
+    """Open a workbook once and get a handle for later column, row and aggregate reads
+    
+    A conversation keeps the handle instead of re-sending file paths; every
+    read through it is served from the parse cache or the Parquet sidecar.
+    Handles close after HANDLE_IDLE_SECONDS without use.
+    """
+    try:
+        bucket_name = request.bucket or REPORTS_BUCKET
+        generation = get_file_generation(request.file_path, bucket_name)
+        
+        if request.file_path.endswith('.csv'):
+            sheets = {os.path.basename(request.file_path): None}
+        elif request.file_path.endswith(('.xlsx', '.xls')):
+            # Sheet names come from the (cached) workbook scan, no full parse
+            names = list(load_file_tables(request.file_path, bucket_name))
+            if request.sheet_names is not None:
+                unknown = [name for name in request.sheet_names if name not in names]
+                if unknown:
+                    raise HTTPException(status_code=404, detail=f"Sheets not found: {unknown}")
+                names = request.sheet_names
+            sheets = {name: name for name in names}
+        else:
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+        if not sheets:
+            raise HTTPException(status_code=400, detail="No sheets to open")
+        
+        handle = handle_registry.open(bucket_name, request.file_path, generation,
+                                      sheets, request.header_row)
+        response = handle.to_dict(HANDLE_IDLE_SECONDS)
+        
+        if request.preload:
+            frames = batch_reader.map(lambda name: load_handle_sheet(handle, name), sheets)
+            response["loaded"] = {
+                name: {"rows": len(df), "columns": [str(col) for col in df.columns]}
+                for name, df in zip(sheets, frames)
+            }
+        return response
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to open file: {str(e)}")
+
+@app.get("/handles/{handle_id}")
+def get_handle(handle_id: str):
+    """Handle details; also keeps the handle alive"""
+    return resolve_handle(handle_id).to_dict(HANDLE_IDLE_SECONDS)
+
+@app.delete("/handles/{handle_id}")
+def close_handle(handle_id: str):
+    if not handle_registry.close(handle_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired handle: {handle_id}")
+    return {"status": "closed", "handle_id": handle_id}
+
+@app.post("/handles/{handle_id}/read")
+def read_handle(handle_id: str, request: HandleReadRequest):
+    """Rows [offset, offset + limit) of selected columns of an open sheet"""
+    try:
+        if request.orient not in ("records", "columns"):
+            raise HTTPException(status_code=400, detail=f"Unsupported orient: {request.orient}")
+        if request.offset < 0 or not 0 < request.limit <= ROWS_PAGE_MAX:
+            raise HTTPException(status_code=400,
+                                detail=f"offset must be >= 0 and limit in 1..{ROWS_PAGE_MAX}")
+        
+        handle = resolve_handle(handle_id)
+        df = load_handle_sheet(handle, request.sheet_name, request.columns)
+        page = df.iloc[request.offset:request.offset + request.limit]
+        # NaN/NaT are not valid JSON - send them as null
+        page = page.astype(object).where(page.notna(), None)
+        
+        if request.orient == "columns":
+            data = {str(col): page[col].tolist() for col in page.columns}
+        else:
+            data = page.to_dict(orient='records')
+        
+        return {
+            "handle_id": handle.id,
+            "sheet_name": request.sheet_name,
+            "columns": [str(col) for col in page.columns],
+            "offset": request.offset,
+            "rows": len(page),
+            "total_rows": len(df),
+            "data": data,
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read handle: {str(e)}")
+
+@app.post("/handles/{handle_id}/query")
+def query_handle(handle_id: str, request: HandleQueryRequest):
+    """Aggregate an open sheet (same query spec as /query)"""
+    try:
+        handle = resolve_handle(handle_id)
+        df = load_handle_sheet(handle, request.sheet_name)
+        result = run_query(df, request.query.model_dump())
+        
+        return {
+            "status": "success",
+            "result": result_to_json(result),
+            "metadata": {
+                "handle_id": handle.id,
+                "file_path": handle.file_path,
+                "sheet_name": request.sheet_name,
+                "source_rows": len(df)
+            }
+        }
+    
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
 @app.post("/read/storage", response_model=ReadResponse)
-async def read_from_cloud_storage(request: ReadStorageRequest,
-                                   cleaning: DataCleaningOptions = DataCleaningOptions()):
+def read_from_cloud_storage(request: ReadStorageRequest,
+                             cleaning: DataCleaningOptions = DataCleaningOptions(),
+                             accept: Optional[str] = Header(None)):
     """Read and parse file from Cloud Storage (reads first sheet only)
     
-    For multi-sheet files, use /analyze/metadata first, then /read/sheet
+    For multi-sheet files, use /analyze/metadata first, then /read/sheet.
+    For large CSV files, pass "mode": "stream" to get per-column statistics
+    of the whole file plus a preview, computed in one pass without loading
+    the file into memory. Responds with Arrow or MessagePack if the Accept
+    header asks for it.
     """
     try:
+        fmt = negotiate(accept)
+        
         # Extract parameters from nested request structure
         file_path = request.request.get("file_path")
         bucket_name = request.request.get("bucket")
         sheet_name = request.request.get("sheet_name")
         header_row = request.request.get("header_row", 0)
+        columns = request.request.get("columns")  # Optional column projection
+        mode = request.request.get("mode", "full")  # full | stream (CSV only)
         
         if not file_path:
             raise HTTPException(status_code=400, detail="file_path is required")
         
-        # Read file from storage
-        file_bytes = read_from_storage(file_path, bucket_name)
+        summary = None
         
-        # Determine file type and read
-        if file_path.endswith(('.xlsx', '.xls')):
+        # Determine file type and read (cached per file generation)
+        if mode == "stream":
+            if not file_path.endswith('.csv'):
+                raise HTTPException(status_code=400, detail="Streaming mode supports CSV files only")
+            summary = summarize_csv_from_storage(file_path, bucket_name, header_row, columns)
+            df = summary["preview"]
+        elif file_path.endswith(('.xlsx', '.xls')):
             # For Excel, read first sheet by default or specified sheet
-            df = pd.read_excel(
-                io.BytesIO(file_bytes), 
-                sheet_name=sheet_name or 0,  # First sheet if not specified
-                header=header_row
-            )
+            df = load_sheet(file_path, bucket_name, sheet_name or 0, header_row, columns)
         elif file_path.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(file_bytes))
+            df = load_sheet(file_path, bucket_name, None, header_row, columns)
         else:
             raise HTTPException(status_code=400, detail="Unsupported file type")
         
@@ -399,23 +1706,99 @@ async def read_from_cloud_storage(request: ReadStorageRequest,
             metadata["sheet_name"] = sheet_name
         
         # Convert to JSON
-        data = dataframe_to_json(df)
+        data = dataframe_to_json(df, records=fmt != ARROW)
         
-        return ReadResponse(
+        if summary is not None:
+            # Stats cover the whole file, the data is a preview
+            data["rows"] = summary["rows"]
+            data["summary"]["total_rows"] = summary["rows"]
+            metadata["rows"] = summary["rows"]
+            metadata["column_stats"] = summary["columns"]
+        
+        return read_response(ReadResponse(
             status="success",
             data=data,
             metadata=metadata,
             warnings=warnings
-        )
+        ), df, fmt)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/read/batch")
+def read_batch(request: ReadBatchRequest,
+               cleaning: DataCleaningOptions = DataCleaningOptions()):
+    """Read several files at once, e.g. January and February reports for comparison
+    
+    Files are downloaded and parsed concurrently (BATCH_READ_CONCURRENCY at
+    a time) and aligned on the columns they share. With concat, the aligned
+    frames are also returned as one frame with a source column; per-file
+    results then carry only metadata.
+    """
+    try:
+        if not request.files:
+            raise HTTPException(status_code=400, detail="files is required")
+        if len(request.files) > BATCH_READ_MAX_FILES:
+            raise HTTPException(status_code=400,
+                                detail=f"At most {BATCH_READ_MAX_FILES} files per batch")
+        
+        labels = [item.label or os.path.basename(item.file_path) for item in request.files]
+        if len(set(labels)) != len(labels):
+            # The same file read twice (e.g. two sheets): tell sources apart by sheet
+            labels = [f"{label}:{item.sheet_name or item.table_range or 0}"
+                      for label, item in zip(labels, request.files)]
+        
+        frames = list(batch_reader.map(
+            lambda item: load_batch_item(item, request.bucket, request.columns), request.files
+        ))
+        cleaned = [clean_dataframe(df, cleaning) for df in frames]
+        
+        columns = common_columns([df for df, _ in cleaned])
+        results = []
+        for label, item, (df, warnings) in zip(labels, request.files, cleaned):
+            metadata = extract_metadata(df)
+            metadata["file_path"] = item.file_path
+            if item.sheet_name:
+                metadata["sheet_name"] = item.sheet_name
+            result = {
+                "source": label,
+                "metadata": metadata,
+                "extra_columns": [col for col in df.columns if col not in columns],
+                "warnings": warnings,
+            }
+            if not request.concat:
+                result["data"] = dataframe_to_json(df[columns] if request.align else df)
+            results.append(result)
+        
+        response = {
+            "status": "success",
+            "common_columns": columns,
+            "files": results,
+        }
+        if request.concat:
+            parts = [(df[columns] if request.align else df).assign(**{request.source_column: label})
+                     for label, (df, _) in zip(labels, cleaned)]
+            combined = pd.concat(parts, ignore_index=True)
+            response["combined"] = dataframe_to_json(combined)
+            response["combined"]["rows_by_source"] = {label: len(df) for label, (df, _)
+                                                      in zip(labels, cleaned)}
+        return response
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/read/excel", response_model=ReadResponse)
 async def read_excel(request: ReadExcelRequest, 
-                    cleaning: DataCleaningOptions = DataCleaningOptions()):
-    """Read and parse Excel file"""
+                    cleaning: DataCleaningOptions = DataCleaningOptions(),
+                    accept: Optional[str] = Header(None)):
+    """Read and parse Excel file (Arrow or MessagePack if the Accept header asks)"""
     try:
+        fmt = negotiate(accept)
+        
         # Read file
         df = read_excel_file(request.file_path, request.sheet_name, request.header_row)
         
@@ -426,23 +1809,26 @@ async def read_excel(request: ReadExcelRequest,
         metadata = extract_metadata(df)
         
         # Convert to JSON
-        data = dataframe_to_json(df)
+        data = dataframe_to_json(df, records=fmt != ARROW)
         
-        return ReadResponse(
+        return read_response(ReadResponse(
             status="success",
             data=data,
             metadata=metadata,
             warnings=warnings
-        )
+        ), df, fmt)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/read/sheets", response_model=ReadResponse)
-async def read_sheets(request: ReadSheetsRequest,
-                     cleaning: DataCleaningOptions = DataCleaningOptions()):
-    """Read and parse Google Sheets"""
+def read_sheets(request: ReadSheetsRequest,
+                cleaning: DataCleaningOptions = DataCleaningOptions(),
+                accept: Optional[str] = Header(None)):
+    """Read and parse Google Sheets (Arrow or MessagePack if the Accept header asks)"""
     try:
+        fmt = negotiate(accept)
+        
         # Read Google Sheets
         df = read_google_sheets(request.spreadsheet_id, request.range, request.sheet_name)
         
@@ -453,26 +1839,58 @@ async def read_sheets(request: ReadSheetsRequest,
         metadata = extract_metadata(df)
         
         # Convert to JSON
-        data = dataframe_to_json(df)
+        data = dataframe_to_json(df, records=fmt != ARROW)
         
-        return ReadResponse(
+        return read_response(ReadResponse(
             status="success",
             data=data,
             metadata=metadata,
             warnings=warnings
-        )
+        ), df, fmt)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/upload/excel")
-async def upload_excel(file: UploadFile = File(...),
+@app.post("/read/sheets/batch")
+def read_sheets_batch(request: ReadSheetsBatchRequest,
                       cleaning: DataCleaningOptions = DataCleaningOptions()):
+    """Read several ranges or whole sheets of a spreadsheet in one API call"""
+    try:
+        # A quoted sheet name as range means the whole sheet
+        ranges = list(request.ranges) + [quote_sheet_name(name) for name in request.sheet_names]
+        if not ranges:
+            raise HTTPException(status_code=400, detail="ranges or sheet_names is required")
+        
+        frames = read_google_sheets_batch(request.spreadsheet_id, ranges)
+        
+        results = {}
+        for range_name, df in frames.items():
+            df, warnings = clean_dataframe(df, cleaning)
+            results[range_name] = {
+                "data": dataframe_to_json(df),
+                "metadata": extract_metadata(df),
+                "warnings": warnings
+            }
+        
+        return {
+            "status": "success",
+            "spreadsheet_id": request.spreadsheet_id,
+            "ranges": results
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/upload/excel")
+def upload_excel(file: UploadFile = File(...),
+                cleaning: DataCleaningOptions = DataCleaningOptions()):
     """Upload and parse Excel file"""
     try:
         # Read uploaded file
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
+        contents = file.file.read()
+        df = parse_executor.run(parse_sheet, file.filename or "upload.xlsx", contents)
         
         # Clean data
         df, warnings = clean_dataframe(df, cleaning)
@@ -495,15 +1913,15 @@ async def upload_excel(file: UploadFile = File(...),
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @app.get("/sheets/{spreadsheet_id}/info")
-async def get_sheets_info(spreadsheet_id: str):
+def get_sheets_info(spreadsheet_id: str):
     """Get information about Google Sheets spreadsheet"""
     try:
         service = get_sheets_service()
         if not service:
             raise HTTPException(status_code=503, detail="Google Sheets API not configured")
         
-        # Get spreadsheet metadata
-        spreadsheet = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+        # Get spreadsheet metadata (cached per revision)
+        spreadsheet = sheets_client.sheet_properties(spreadsheet_id)
         
         sheets = []
         for sheet in spreadsheet.get('sheets', []):
@@ -0,0 +1,65 @@
+"""Upload-time normalization of workbooks to the internal columnar format
+
+Parsing .xls (xlrd) and large .xlsx (openpyxl) files is slow, so every
+uploaded workbook is converted once, right after upload: each sheet is
+written as a Parquet sidecar (sidecar_store.py) for the header rows that
+reads use (row 0 and the header rows of detected tables), and the
+workbook scan - sheet names, row counts, columns, samples and detected
+tables - is stored as a manifest:
+
+    reports/<file>.xlsx.sidecar/g<generation>/normalized.json
+
+The manifest is written last, so its presence means the normalized copy
+is complete. Reads use the normalized copy and fall back to the original
+file when it is missing.
+"""
+import datetime
+import json
+from typing import Any, Dict, List, Optional
+
+from sidecar_store import sidecar_prefix
+
+MANIFEST_NAME = "normalized.json"
+
+
+def manifest_path(file_path: str, generation: Optional[int]) -> str:
+    return f"{sidecar_prefix(file_path, generation)}/{MANIFEST_NAME}"
+
+
+def _json_default(value: Any) -> Any:
+    """Sample values as FastAPI sends them (ISO dates)"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def new_manifest(file_path: str, generation: Optional[int], file_size: Optional[int],
+                 sheets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "file_path": file_path,
+        "generation": generation,
+        "file_size_bytes": file_size,
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "sheets": sheets,
+    }
+
+
+def write_manifest(backend, bucket: str, file_path: str, generation: Optional[int],
+                   manifest: Dict[str, Any]) -> str:
+    path = manifest_path(file_path, generation)
+    data = json.dumps(manifest, ensure_ascii=False, default=_json_default).encode("utf-8")
+    backend.write_bytes(bucket, path, data, content_type="application/json")
+    return path
+
+
+def read_manifest(backend, bucket: str, file_path: str,
+                  generation: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Manifest of a normalized file generation, or None if not normalized"""
+    try:
+        source = backend.open_input(bucket, manifest_path(file_path, generation))
+    except FileNotFoundError:
+        return None
+    with source:
+        return json.loads(source.read())
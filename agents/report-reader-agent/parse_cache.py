@@ -0,0 +1,159 @@
+"""Content-addressed cache of parsed workbooks for the Report Reader
+
+Entries are keyed on (bucket, path, generation, sheet, header_row), so a new
+upload to the same path (new GCS generation) never hits a stale entry.
+The cache is bounded by total size in bytes (LRU eviction) and by entry age
+(TTL), and keeps hit/miss/eviction counters for /health.
+
+Besides parsed DataFrames the same cache holds the raw file bytes and the
+/analyze/metadata result of a file, so the metadata-then-sheet flow of the
+logic agent downloads and parses a file only once.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+# Special "sheet" values for non-DataFrame entries of a file
+RAW_BYTES = "__raw__"
+METADATA = "__metadata__"
+TABLES = "__tables__"
+PROFILE = "__profile__"
+
+CacheKey = Tuple[str, str, Optional[int], Hashable, Optional[int]]
+
+
+def make_key(bucket: str, path: str, generation: Optional[int],
+             sheet: Hashable = None, header_row: Optional[int] = None) -> CacheKey:
+    """Build a cache key for a file (and optionally a sheet of it)"""
+    return (bucket, path, generation, sheet, header_row)
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate in-memory size of a cached value in bytes
+
+    Containers (metadata, tables and profile dicts, pydantic models) are
+    sized deeply, so they count against the byte bound like DataFrames.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), seen)
+    return size
+
+
+class ParsedFrameCache:
+    """Thread-safe LRU cache bounded by total bytes and entry TTL"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float,
+                 revalidate_seconds: float = 0.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, int, float]]" = OrderedDict()
+        self._generations: Dict[Tuple[str, str], Tuple[Optional[int], Optional[int], float]] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return cached value or None; expired entries are dropped"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: CacheKey, value: Any, size: Optional[int] = None) -> bool:
+        """Store a value; returns False if it is larger than the whole cache"""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def recent_blob(self, bucket: str, path: str) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        """Return (generation, size) if the file was checked recently, else None
+
+        Lets follow-up reads skip the GCS metadata round trip entirely
+        within the revalidation window.
+        """
+        with self._lock:
+            entry = self._generations.get((bucket, path))
+            if entry is None:
+                return None
+            generation, size, checked_at = entry
+            if time.monotonic() - checked_at > self.revalidate_seconds:
+                del self._generations[(bucket, path)]
+                return None
+            return generation, size
+
+    def remember_generation(self, bucket: str, path: str, generation: Optional[int],
+                            size: Optional[int] = None):
+        """Record the generation (and size) seen for a file during a storage lookup"""
+        with self._lock:
+            self._generations[(bucket, path)] = (generation, size, time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key: CacheKey):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
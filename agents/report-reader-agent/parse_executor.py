@@ -0,0 +1,240 @@
+"""Bounded process pool for CPU-bound sheet parsing
+
+Parsing Excel is pure CPU work and holds the GIL, so running it inside the
+request handlers blocks every other request of the instance. ParseExecutor
+runs parse tasks in worker processes instead:
+
+- the pool size is bounded (PARSE_WORKERS), 0 parses inline
+- the number of pending tasks is bounded (PARSE_QUEUE_MAX); callers wait
+  for a free slot instead of piling work onto the pool
+- independent sheets of one workbook are parsed in parallel
+- queue depth, queue wait and parse latency are kept for /health
+
+Task functions must be importable module-level functions, because they are
+pickled into the worker processes.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from workbook_scanner import FileSource, is_xlsx_source, open_source, scan_workbook
+
+LATENCY_WINDOW = 512
+
+
+# ==========================================
+# Worker Tasks
+# ==========================================
+
+def parse_sheet(file_path: str, file_bytes: FileSource, sheet_name=0,
+                header_row: int = 0) -> pd.DataFrame:
+    """Parse one sheet of an Excel file (or a CSV file) from raw bytes
+
+    Large files are passed as the path of a local copy instead of bytes,
+    so they are not pickled into the worker process.
+    """
+    if file_path.endswith('.csv'):
+        return pd.read_csv(open_source(file_bytes), header=header_row)
+    return pd.read_excel(open_source(file_bytes), sheet_name=sheet_name, header=header_row)
+
+
+def list_sheet_names(file_bytes: FileSource) -> List[str]:
+    """Sheet names of an .xlsx workbook without reading any rows"""
+    workbook = load_workbook(open_source(file_bytes), read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def _timed(fn: Callable, args: Tuple) -> Tuple[float, Any]:
+    """Run a task in the worker and measure its pure parse time"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+# ==========================================
+# Executor
+# ==========================================
+
+class ParseExecutor:
+    """Process pool with bounded pending tasks and latency stats"""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(0, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, self.max_workers) + self.max_queue)
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._parse_seconds: deque = deque(maxlen=LATENCY_WINDOW)
+        self._wait_seconds: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created lazily; spawn avoids forking a process with live threads
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def map(self, fn: Callable, arg_list: Sequence[Tuple]) -> List[Any]:
+        """Run fn(*args) for every args tuple in parallel; results in order
+
+        Blocks the calling thread (call it from a worker thread, not from
+        the event loop). When no slot is free, the oldest task of this call
+        is collected before waiting, so a map with more tasks than slots (or
+        several concurrent maps) cannot block on its own slots.
+        """
+        pending: deque = deque()
+        results = []
+        pool = None
+        try:
+            for args in arg_list:
+                while pending and not self._slots.acquire(blocking=False):
+                    submitted_at, future = pending[0]
+                    results.append(self._collect(submitted_at, future))
+                    pending.popleft()
+                if not pending:
+                    self._slots.acquire()
+                with self._stats_lock:
+                    self._in_flight += 1
+                try:
+                    future = self._submit(fn, args)
+                except Exception:
+                    self._finish(failed=True)
+                    raise
+                pending.append((time.perf_counter(), future))
+                pool = self._pool
+
+            while pending:
+                submitted_at, future = pending[0]
+                results.append(self._collect(submitted_at, future))
+                pending.popleft()
+            return results
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time
+            self._discard_pool(pool)
+            raise
+        finally:
+            # Tasks not collected because of an error still free their slots
+            for _, future in pending:
+                self._finish(failed=True)
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Run a single task and wait for its result"""
+        return self.map(fn, [args])[0]
+
+    def _submit(self, fn: Callable, args: Tuple):
+        if self.max_workers == 0:
+            return _InlineFuture(fn, args)
+        return self._get_pool().submit(_timed, fn, args)
+
+    def _collect(self, submitted_at: float, future) -> Any:
+        parse_seconds, result = future.result()
+        total_seconds = time.perf_counter() - submitted_at
+        with self._stats_lock:
+            self._parse_seconds.append(parse_seconds)
+            self._wait_seconds.append(max(0.0, total_seconds - parse_seconds))
+        self._finish(failed=False)
+        return result
+
+    def _finish(self, failed: bool):
+        with self._stats_lock:
+            self._in_flight -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - max(1, self.max_workers)),
+                "completed": self.completed,
+                "failed": self.failed,
+                "parse_ms": _latency_summary(self._parse_seconds),
+                "queue_wait_ms": _latency_summary(self._wait_seconds),
+            }
+
+    def _discard_pool(self, pool: Optional[ProcessPoolExecutor] = None):
+        """Shut down the pool (only if it is still the given one)"""
+        with self._pool_lock:
+            if self._pool is not None and (pool is None or self._pool is pool):
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def shutdown(self):
+        self._discard_pool()
+
+
+class _InlineFuture:
+    """Future-like wrapper that runs the task in the calling thread"""
+
+    def __init__(self, fn: Callable, args: Tuple):
+        self._fn = fn
+        self._args = args
+
+    def result(self):
+        return _timed(self._fn, self._args)
+
+
+def _latency_summary(samples) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+    }
+
+
+# ==========================================
+# Workbook Helpers
+# ==========================================
+
+def scan_workbook_parallel(executor: ParseExecutor, file_bytes: FileSource,
+                           sample_rows: int = 3, file_size: Optional[int] = None,
+                           min_parallel_bytes: int = 0,
+                           head_rows: int = 0) -> List[Dict[str, Any]]:
+    """scan_workbook with the sheets split across the pool workers
+
+    Small files and single-sheet workbooks are scanned as one task, where
+    process start-up would cost more than it saves.
+    """
+    if file_size is None:
+        file_size = len(file_bytes) if isinstance(file_bytes, bytes) else 0
+    if (executor.max_workers < 2 or file_size < min_parallel_bytes
+            or not is_xlsx_source(file_bytes)):
+        return executor.run(scan_workbook, file_bytes, sample_rows, None, head_rows)
+
+    sheet_names = list_sheet_names(file_bytes)
+    if len(sheet_names) < 2:
+        return executor.run(scan_workbook, file_bytes, sample_rows, None, head_rows)
+
+    groups = [sheet_names[i::executor.max_workers]
+              for i in range(min(executor.max_workers, len(sheet_names)))]
+    results = executor.map(scan_workbook, [(file_bytes, sample_rows, group, head_rows)
+                                          for group in groups])
+
+    # Restore workbook order
+    scans = {scan["name"]: scan for group_scans in results for scan in group_scans}
+    return [scans[name] for name in sheet_names if name in scans]
@@ -0,0 +1,389 @@
+"""Per-sheet column profiles computed once at ingestion time
+
+A profile describes every column of a sheet without its rows: inferred
+type, null ratio, min/max/mean/quantiles for numbers, the date range for
+dates and the most frequent values. It is computed with vectorized
+NumPy/pandas operations right after upload, chunk by chunk with mergeable
+sketches (sketches.py), so memory stays bounded for multi-million-row
+files and columns like transaction IDs. It is stored as JSON next to the
+file's sidecars:
+
+    reports/<file>.xlsx.sidecar/g<generation>/profile.json
+
+so question-time prompts can describe the data without parsing anything.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from sidecar_store import sidecar_prefix
+from sketches import CountMinSketch, HyperLogLog, ReservoirSample, SpaceSaving, hash_values
+from type_inference import apply_schema, infer_schema, parse_numbers
+
+PROFILE_NAME = "profile.json"
+PROFILE_STATE_NAME = "profile.state.json"
+TOP_K = 5
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+FLOAT_DIGITS = 4
+CHUNK_ROWS = 100000
+HEAVY_HITTER_CAPACITY = 64
+
+
+def profile_path(file_path: str, generation: Optional[int]) -> str:
+    """Object path of the profile of one file generation"""
+    return f"{sidecar_prefix(file_path, generation)}/{PROFILE_NAME}"
+
+
+def profile_state_path(file_path: str, generation: Optional[int]) -> str:
+    """Object path of the serialized sketches behind a profile"""
+    return f"{sidecar_prefix(file_path, generation)}/{PROFILE_STATE_NAME}"
+
+
+def to_json_value(value: Any) -> Any:
+    """Plain JSON value for a NumPy/pandas scalar"""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS) if np.isfinite(value) else None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _numbers(series: pd.Series) -> np.ndarray:
+    """Non-null values of a numeric column as float64"""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        series = parse_numbers(series)
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+def _dates(series: pd.Series) -> pd.Series:
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        series = pd.to_datetime(series, errors="coerce", dayfirst=True)
+    return series.dropna()
+
+
+class ColumnProfiler:
+    """Mergeable profile of one column, updated chunk by chunk
+
+    Memory is bounded by the sketches, not by the number of rows or
+    distinct values: distinct counts come from HyperLogLog, top values from
+    Space-Saving (counts tightened with Count-Min) and quantiles from a
+    reservoir sample. Count, nulls, min/max/sum/mean/std are exact.
+    """
+
+    def __init__(self, kind: str, dtype: str = "object", top_k: int = TOP_K):
+        self.kind = kind
+        self.dtype = dtype
+        self.top_k = top_k
+        self.count = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.frequencies = CountMinSketch()
+        self.heavy_hitters = SpaceSaving(max(HEAVY_HITTER_CAPACITY, 4 * top_k))
+        self.sample = ReservoirSample()
+        self.numbers = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations (Chan et al. parallel variance)
+        self.min: Optional[Any] = None
+        self.max: Optional[Any] = None
+
+    @property
+    def numeric(self) -> bool:
+        return self.kind in ("int", "float")
+
+    def _add_moments(self, n: int, total: float, mean: float, m2: float):
+        if not n:
+            return
+        delta = mean - self.mean
+        combined = self.numbers + n
+        self.mean += delta * n / combined
+        self.m2 += m2 + delta * delta * self.numbers * n / combined
+        self.numbers = combined
+        self.sum += total
+
+    def _add_range(self, low, high):
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def update(self, series: pd.Series):
+        non_null = int(series.notna().sum())
+        self.count += non_null
+        self.nulls += len(series) - non_null
+        hashes = hash_values(series)
+        self.distinct.add_hashes(hashes)
+        self.frequencies.add_hashes(hashes)
+        if self.kind != "float":
+            self.heavy_hitters.update(series)
+
+        if self.numeric:
+            values = _numbers(series)
+            if len(values):
+                mean = float(values.mean())
+                self._add_moments(len(values), float(values.sum()), mean,
+                                  float(((values - mean) ** 2).sum()))
+                self._add_range(float(values.min()), float(values.max()))
+                self.sample.update(values)
+        elif self.kind == "datetime":
+            dates = _dates(series)
+            if len(dates):
+                self._add_range(dates.min(), dates.max())
+
+    def merge(self, other: "ColumnProfiler"):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        self.frequencies.merge(other.frequencies)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        self.sample.merge(other.sample)
+        self._add_moments(other.numbers, other.sum, other.mean, other.m2)
+        if other.min is not None:
+            self._add_range(other.min, other.max)
+
+    def top_values(self) -> list:
+        """Most frequent values; counts are exact unless "error" is given
+
+        Values whose guaranteed count does not exceed the bound of untracked
+        values are left out, so unique columns (IDs) report no top values.
+        """
+        floor = self.heavy_hitters.floor
+        top = [item for item in self.heavy_hitters.top(self.top_k)
+               if item["count"] - item["error"] > floor]
+        if not top:
+            return []
+        # Both sketches overestimate, so the smaller count is the tighter bound
+        values = pd.Series([item["value"] for item in top])
+        estimates = self.frequencies.estimate_hashes(hash_values(values))
+        results = []
+        for item, estimate in zip(top, estimates):
+            count = min(item["count"], int(estimate))
+            error = min(item["error"], count)
+            value = item["value"]
+            if self.kind == "int" and isinstance(value, float) and value.is_integer():
+                value = int(value)
+            result = {"value": to_json_value(value), "count": count}
+            if error:
+                result["error"] = error
+            results.append(result)
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.count + self.nulls
+        profile: Dict[str, Any] = {
+            "type": self.kind,
+            "dtype": self.dtype,
+            "count": self.count,
+            "null_ratio": round(self.nulls / total, 4) if total else 0.0,
+            "distinct": min(self.distinct.estimate(), self.count),
+        }
+        if self.numeric and self.numbers:
+            exact = int if self.kind == "int" else float
+            quantiles = self.sample.quantiles(QUANTILES)
+            profile.update({
+                "min": to_json_value(exact(self.min)),
+                "max": to_json_value(exact(self.max)),
+                "mean": to_json_value(self.mean),
+                "std": to_json_value(float(np.sqrt(self.m2 / self.numbers))),
+                "sum": to_json_value(exact(self.sum)),
+                "quantiles": {f"p{int(q * 100)}": to_json_value(v)
+                              for q, v in zip(QUANTILES, quantiles)},
+            })
+        elif self.kind == "datetime" and self.min is not None:
+            profile["date_range"] = {
+                "min": self.min.isoformat(),
+                "max": self.max.isoformat(),
+                "days": int((self.max - self.min).days) + 1,
+            }
+        if self.kind != "float":
+            profile["top_values"] = self.top_values()
+        return profile
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializable state (sketches included) to continue profiling later"""
+        bounds = [value.isoformat() if isinstance(value, pd.Timestamp) else value
+                  for value in (self.min, self.max)]
+        return {
+            "kind": self.kind, "dtype": self.dtype, "top_k": self.top_k,
+            "count": self.count, "nulls": self.nulls,
+            "distinct": self.distinct.to_dict(),
+            "frequencies": self.frequencies.to_dict(),
+            "heavy_hitters": self.heavy_hitters.to_dict(),
+            "sample": self.sample.to_dict(),
+            "numbers": self.numbers, "sum": self.sum, "mean": self.mean, "m2": self.m2,
+            "min": bounds[0], "max": bounds[1],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ColumnProfiler":
+        profiler = cls(state["kind"], state["dtype"], state["top_k"])
+        profiler.count, profiler.nulls = state["count"], state["nulls"]
+        profiler.distinct = HyperLogLog.from_dict(state["distinct"])
+        profiler.frequencies = CountMinSketch.from_dict(state["frequencies"])
+        profiler.heavy_hitters = SpaceSaving.from_dict(state["heavy_hitters"])
+        profiler.sample = ReservoirSample.from_dict(state["sample"])
+        profiler.numbers, profiler.sum = state["numbers"], state["sum"]
+        profiler.mean, profiler.m2 = state["mean"], state["m2"]
+        profiler.min, profiler.max = state["min"], state["max"]
+        if profiler.kind == "datetime" and profiler.min is not None:
+            profiler.min, profiler.max = pd.Timestamp(profiler.min), pd.Timestamp(profiler.max)
+        return profiler
+
+
+class SheetProfiler:
+    """Column profilers of one sheet (or CSV file), fed in row chunks
+
+    The schema is inferred from the first chunk. Profilers of sheets or
+    files with the same columns can be merged.
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.rows = 0
+        self.schema: Optional[Dict[str, str]] = None
+        self.columns: Dict[str, ColumnProfiler] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        if self.schema is None:
+            self.schema = infer_schema(chunk)
+        converted = apply_schema(chunk, self.schema)
+        self.rows += len(chunk)
+        for col in converted.columns:
+            name = str(col)
+            profiler = self.columns.get(name)
+            if profiler is None:
+                profiler = ColumnProfiler(self.schema.get(name, "string"),
+                                          str(converted[col].dtype), self.top_k)
+                self.columns[name] = profiler
+            elif profiler.kind == "int" and self.schema.get(name) == "float":
+                # Fractional values after all-integer chunks
+                profiler.kind, profiler.dtype = "float", str(converted[col].dtype)
+            profiler.update(converted[col])
+
+    def merge(self, other: "SheetProfiler"):
+        self.rows += other.rows
+        for name, profiler in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(profiler)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "columns": {name: profiler.to_dict() for name, profiler in self.columns.items()},
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "top_k": self.top_k,
+            "rows": self.rows,
+            "schema": self.schema,
+            "columns": {name: profiler.to_state() for name, profiler in self.columns.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SheetProfiler":
+        """Profiler that continues from a stored state (e.g. with appended rows)"""
+        profiler = cls(state["top_k"])
+        profiler.rows = state["rows"]
+        profiler.schema = state["schema"]
+        profiler.columns = {name: ColumnProfiler.from_state(column)
+                            for name, column in state["columns"].items()}
+        return profiler
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], top_k: int = TOP_K) -> SheetProfiler:
+    """Profile a stream of row chunks (e.g. pd.read_csv(chunksize=...)) in one pass"""
+    profiler = SheetProfiler(top_k)
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler
+
+
+def frame_chunks(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def profile_dataframe(df: pd.DataFrame, top_k: int = TOP_K) -> Dict[str, Any]:
+    """Profile of every column of a parsed sheet"""
+    return profile_chunks(frame_chunks(df), top_k).to_dict()
+
+
+def merge_sheet_profiles(profilers: List[SheetProfiler]) -> Dict[str, Any]:
+    """Combined profile of columns that appear in more than one sheet
+
+    Monthly or per-warehouse sheets often share their columns; merged
+    sketches give file-wide distinct counts and top values.
+    """
+    owners: Dict[str, List[ColumnProfiler]] = {}
+    for profiler in profilers:
+        for name, column in profiler.columns.items():
+            owners.setdefault(name, []).append(column)
+
+    combined = {}
+    for name, columns in owners.items():
+        kinds = {column.kind for column in columns}
+        if len(columns) < 2 or len(kinds) > 1:
+            continue
+        merged = ColumnProfiler(columns[0].kind, columns[0].dtype, columns[0].top_k)
+        for column in columns:
+            merged.merge(column)
+        combined[name] = {"sheets": len(columns), **merged.to_dict()}
+    return combined
+
+
+def new_profile(file_path: str, generation: Optional[int]) -> Dict[str, Any]:
+    return {
+        "file_path": file_path,
+        "generation": generation,
+        "created_at": datetime.utcnow().isoformat(),
+        "sheets": [],
+    }
+
+
+def write_profile(backend, bucket: str, file_path: str, generation: Optional[int],
+                  profile: Dict[str, Any]) -> str:
+    """Store a file profile as JSON next to the sidecars and return its path"""
+    path = profile_path(file_path, generation)
+    data = json.dumps(profile, ensure_ascii=False).encode("utf-8")
+    backend.write_bytes(bucket, path, data, content_type="application/json")
+    return path
+
+
+def write_profile_state(backend, bucket: str, file_path: str, generation: Optional[int],
+                        profilers: Dict[str, SheetProfiler]) -> str:
+    """Store the sketches of every sheet so later versions can be profiled incrementally"""
+    path = profile_state_path(file_path, generation)
+    state = {name: profiler.to_state() for name, profiler in profilers.items()}
+    backend.write_bytes(bucket, path, json.dumps(state, ensure_ascii=False).encode("utf-8"),
+                        content_type="application/json")
+    return path
+
+
+def read_profile_state(backend, bucket: str, file_path: str,
+                       generation: Optional[int]) -> Dict[str, SheetProfiler]:
+    """Stored sheet profilers of a file generation ({} if there are none)"""
+    try:
+        source = backend.open_input(bucket, profile_state_path(file_path, generation))
+    except FileNotFoundError:
+        return {}
+    with source:
+        state = json.loads(source.read())
+    return {name: SheetProfiler.from_state(sheet) for name, sheet in state.items()}
+
+
+def read_profile(backend, bucket: str, file_path: str,
+                 generation: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Stored profile of a file generation, or None if there is none"""
+    try:
+        source = backend.open_input(bucket, profile_path(file_path, generation))
+    except FileNotFoundError:
+        return None
+    with source:
+        return json.loads(source.read())
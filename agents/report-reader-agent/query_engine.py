@@ -0,0 +1,176 @@
+"""Declarative query engine for parsed sheets (/query)
+
+Runs a small query spec - filters, date bucketing, group-by, aggregations,
+sort and top-N - as vectorized pandas operations next to the cached data,
+so only the compact result travels back to the caller.
+
+Spec format (all parts optional):
+
+    {
+        "filters": [{"column": "Статус", "op": "==", "value": "Продажа"}],
+        "date_bucket": {"column": "Дата", "freq": "month", "alias": "Месяц"},
+        "group_by": ["Категория", "Месяц"],
+        "aggregations": [{"column": "Выручка", "func": "sum", "alias": "revenue"}],
+        "sort": [{"column": "revenue", "descending": true}],
+        "limit": 10
+    }
+"""
+import json
+from typing import Any, Dict, List
+
+import pandas as pd
+
+AGGREGATIONS = {"sum", "mean", "min", "max", "count", "nunique", "median", "size"}
+NUMERIC_AGGREGATIONS = {"sum", "mean", "median"}
+DATE_FREQUENCIES = {"day": "D", "week": "W", "month": "M", "quarter": "Q", "year": "Y"}
+FILTER_OPERATORS = {
+    "==", "!=", ">", ">=", "<", "<=", "in", "not_in",
+    "contains", "between", "is_null", "not_null"
+}
+MAX_RESULT_ROWS = 10000
+
+
+class QueryError(ValueError):
+    """Raised for invalid query specs"""
+
+
+def _require_columns(df: pd.DataFrame, columns) -> None:
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise QueryError(f"Unknown columns: {', '.join(map(str, missing))}")
+
+
+def _as_numeric(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series, errors="coerce")
+
+
+def _filter_mask(df: pd.DataFrame, condition: Dict[str, Any]) -> pd.Series:
+    column, op = condition["column"], condition.get("op", "==")
+    value = condition.get("value")
+    series = df[column]
+
+    if op not in FILTER_OPERATORS:
+        raise QueryError(f"Unsupported filter operator: {op}")
+    if op == "is_null":
+        return series.isna()
+    if op == "not_null":
+        return series.notna()
+    if op == "in":
+        return series.isin(value if isinstance(value, list) else [value])
+    if op == "not_in":
+        return ~series.isin(value if isinstance(value, list) else [value])
+    if op == "contains":
+        return series.astype(str).str.contains(str(value), case=False, regex=False, na=False)
+
+    # Comparisons: compare numerically when the value is a number
+    if isinstance(value, (int, float)) or (
+            op == "between" and all(isinstance(v, (int, float)) for v in value or [])):
+        series = _as_numeric(series)
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise QueryError("'between' expects [low, high]")
+        return series.between(value[0], value[1])
+    if op == "==":
+        return series == value
+    if op == "!=":
+        return series != value
+    try:
+        if op == ">":
+            return series > value
+        if op == ">=":
+            return series >= value
+        if op == "<":
+            return series < value
+        return series <= value
+    except TypeError as e:
+        raise QueryError(f"Cannot compare column '{column}' with {value!r}: {e}")
+
+
+def apply_date_bucket(df: pd.DataFrame, bucket: Dict[str, Any]) -> pd.DataFrame:
+    """Add a period label column (e.g. "2024-01" for month)"""
+    column = bucket["column"]
+    freq = bucket.get("freq", "month")
+    if freq not in DATE_FREQUENCIES:
+        raise QueryError(f"Unsupported date bucket: {freq}")
+    _require_columns(df, [column])
+
+    dates = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce", dayfirst=True)
+    alias = bucket.get("alias") or column
+    df = df.copy(deep=False)
+    df[alias] = dates.dt.to_period(DATE_FREQUENCIES[freq]).astype(str).where(dates.notna())
+    return df
+
+
+def run_query(df: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Execute a query spec against a DataFrame and return the result frame"""
+    filters = spec.get("filters") or []
+    _require_columns(df, [f["column"] for f in filters])
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        for condition in filters:
+            mask &= _filter_mask(df, condition)
+        df = df[mask]
+
+    if spec.get("date_bucket"):
+        df = apply_date_bucket(df, spec["date_bucket"])
+
+    group_by: List[str] = spec.get("group_by") or []
+    aggregations = spec.get("aggregations") or []
+    _require_columns(df, group_by)
+
+    if aggregations:
+        named = {}
+        for agg in aggregations:
+            func = agg.get("func", "sum")
+            if func not in AGGREGATIONS:
+                raise QueryError(f"Unsupported aggregation: {func}")
+            column = agg.get("column") or "*"
+            alias = agg.get("alias") or (f"{func}_{column}" if column != "*" else "count")
+            if column == "*" or func == "size":
+                named[alias] = ("__row__", "size")
+                continue
+            _require_columns(df, [column])
+            named[alias] = (column, func)
+
+        df = df.copy(deep=False)
+        df["__row__"] = 1
+        for alias, (column, func) in named.items():
+            if func in NUMERIC_AGGREGATIONS:
+                df[column] = _as_numeric(df[column])
+
+        if group_by:
+            result = df.groupby(group_by, dropna=False, observed=True, sort=False).agg(**named)
+            result = result.reset_index()
+        else:
+            result = pd.DataFrame([{
+                alias: len(df) if func == "size" else df[column].agg(func)
+                for alias, (column, func) in named.items()
+            }])
+    else:
+        result = df[group_by].drop_duplicates() if group_by else df
+
+    sort = spec.get("sort") or []
+    if sort:
+        _require_columns(result, [s["column"] for s in sort])
+        result = result.sort_values(
+            by=[s["column"] for s in sort],
+            ascending=[not s.get("descending", False) for s in sort],
+            na_position="last"
+        )
+
+    limit = min(int(spec.get("limit") or 100), MAX_RESULT_ROWS)
+    return result.head(limit)
+
+
+def result_to_json(result: pd.DataFrame) -> Dict[str, Any]:
+    """Serialize a query result (NaN -> null, dates -> ISO strings)"""
+    records = json.loads(result.to_json(orient="records", date_format="iso", force_ascii=False))
+    return {
+        "columns": [str(col) for col in result.columns],
+        "rows": len(records),
+        "data": records,
+    }
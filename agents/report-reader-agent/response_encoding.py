@@ -0,0 +1,94 @@
+"""Binary encodings of read responses, chosen by the Accept header
+
+JSON stays the default. Callers that send
+
+    Accept: application/vnd.apache.arrow.stream
+
+get the preview rows as an Arrow IPC stream; the rest of the response
+(status, metadata, warnings, row counts) travels as JSON in the schema
+metadata under "envelope", so no per-row Python objects are built on
+either side. Callers that send
+
+    Accept: application/msgpack
+
+get the same structure as the JSON response, encoded with MessagePack.
+Dates are sent as ISO strings, like in JSON. An encoding whose library
+is not installed is never negotiated.
+"""
+import datetime
+import decimal
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from row_stream import ARROW_STREAM_MEDIA_TYPE
+from sidecar_store import to_arrow_table
+
+JSON = "json"
+ARROW = "arrow"
+MSGPACK = "msgpack"
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ENVELOPE_KEY = b"envelope"
+
+MEDIA_TYPES = {
+    ARROW_STREAM_MEDIA_TYPE: ARROW,
+    MSGPACK_MEDIA_TYPE: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/json": JSON,
+}
+
+
+def available_formats() -> Dict[str, bool]:
+    return {JSON: True, ARROW: pa is not None, MSGPACK: msgpack is not None}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Response format for an Accept header (first supported media type wins)"""
+    available = available_formats()
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        fmt = MEDIA_TYPES.get(media_type)
+        if fmt is not None and available[fmt]:
+            return fmt
+    return JSON
+
+
+def plain_value(value: Any) -> Any:
+    """MessagePack fallback for values JSON responses send as strings or numbers"""
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return str(value)
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    return msgpack.packb(payload, default=plain_value)
+
+
+def encode_arrow(rows: pd.DataFrame, envelope: Dict[str, Any]) -> bytes:
+    """Rows as an Arrow IPC stream with the response envelope in the schema metadata"""
+    table = to_arrow_table(rows)
+    metadata = dict(table.schema.metadata or {})
+    metadata[ENVELOPE_KEY] = json.dumps(envelope, ensure_ascii=False,
+                                        default=plain_value).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
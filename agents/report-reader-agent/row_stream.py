@@ -0,0 +1,230 @@
+"""Cursor-paginated row streaming for /read/sheet/rows
+
+Rows are produced in small batches and encoded one batch at a time, either
+as NDJSON (one JSON object per line) or as an Arrow IPC stream, so memory
+use per request is bounded by the batch size rather than the sheet size.
+
+The cursor token is a URL-safe base64 encoding of the page position. It
+pins the file generation, so a cursor never silently continues over a
+re-uploaded file.
+"""
+import base64
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from sidecar_store import restore_object_columns, sidecar_path, to_arrow_table
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class CursorError(ValueError):
+    """Raised for malformed cursor tokens"""
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a page position as a stable, opaque cursor token"""
+    payload = json.dumps(position, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# Keys of a page position and their accepted types
+CURSOR_FIELDS = {
+    "file_path": (str,),
+    "bucket": (str,),
+    "sheet_name": (str, int),
+    "header_row": (int,),
+    "offset": (int,),
+    "limit": (int,),
+    "format": (str,),
+}
+OPTIONAL_CURSOR_FIELDS = {
+    "columns": (list, type(None)),
+    "generation": (int, type(None)),
+}
+
+
+def _check_field(position: Dict[str, Any], key: str, types) -> None:
+    value = position[key]
+    # bool is an int subclass but never a valid offset, row or sheet index
+    if isinstance(value, bool) or not isinstance(value, types):
+        raise CursorError(f"Invalid cursor: bad {key}")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode and validate a cursor token produced by encode_cursor
+
+    Every key the stream reads is checked here, so a tampered or truncated
+    cursor raises CursorError rather than failing later in the request.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise CursorError(f"Invalid cursor: {e}")
+    if not isinstance(position, dict):
+        raise CursorError("Invalid cursor: not an object")
+    for key, types in CURSOR_FIELDS.items():
+        if key not in position:
+            raise CursorError(f"Invalid cursor: missing {key}")
+        _check_field(position, key, types)
+    for key, types in OPTIONAL_CURSOR_FIELDS.items():
+        if key in position:
+            _check_field(position, key, types)
+    columns = position.get("columns")
+    if columns is not None and not all(isinstance(col, str) for col in columns):
+        raise CursorError("Invalid cursor: bad columns")
+    return position
+
+
+# ==========================================
+# Batch Sources
+# ==========================================
+
+def open_sidecar_batches(backend, bucket: str, file_path: str, generation: Optional[int],
+                         sheet_name: Any, header_row: int,
+                         columns: Optional[List[str]], offset: int, limit: int,
+                         batch_size: int):
+    """Return (total_rows, schema, batch iterator) reading only the needed row groups
+
+    Returns None if the sheet has no sidecar.
+    """
+    path = sidecar_path(file_path, generation, sheet_name, header_row)
+    try:
+        source = backend.open_input(bucket, path)
+    except FileNotFoundError:
+        return None
+
+    parquet_file = pq.ParquetFile(source)
+    total_rows = parquet_file.metadata.num_rows
+    schema = parquet_file.schema_arrow
+    if columns is not None:
+        schema = pa.schema([schema.field(col) for col in columns])
+
+    def _batches():
+        with source:
+            # Skip whole row groups that end before the requested offset
+            row_groups = []
+            skip = offset
+            first_row = 0
+            for index in range(parquet_file.num_row_groups):
+                group_rows = parquet_file.metadata.row_group(index).num_rows
+                if first_row + group_rows > offset:
+                    row_groups.append(index)
+                else:
+                    skip -= group_rows
+                first_row += group_rows
+            if not row_groups:
+                return
+
+            remaining = limit
+            for batch in parquet_file.iter_batches(batch_size=batch_size,
+                                                   row_groups=row_groups,
+                                                   columns=columns):
+                if skip:
+                    if skip >= batch.num_rows:
+                        skip -= batch.num_rows
+                        continue
+                    batch = batch.slice(skip)
+                    skip = 0
+                if batch.num_rows > remaining:
+                    batch = batch.slice(0, remaining)
+                remaining -= batch.num_rows
+                yield batch
+                if not remaining:
+                    return
+
+    return total_rows, schema, _batches()
+
+
+def frame_batches(df: pd.DataFrame, offset: int, limit: int,
+                  batch_size: int) -> Iterator[pd.DataFrame]:
+    """Yield row slices of an in-memory DataFrame"""
+    end = min(offset + limit, len(df))
+    for start in range(offset, end, batch_size):
+        yield df.iloc[start:min(start + batch_size, end)]
+
+
+# ==========================================
+# Encoders
+# ==========================================
+
+def ndjson_stream(batches) -> Iterator[bytes]:
+    """Encode DataFrame or Arrow batches as NDJSON lines"""
+    for batch in batches:
+        if pa is not None and isinstance(batch, pa.RecordBatch):
+            chunk = restore_object_columns(batch.to_pandas(), batch.schema.metadata)
+        else:
+            chunk = batch
+        if chunk.empty:
+            continue
+        yield chunk.to_json(orient="records", lines=True, date_format="iso",
+                            force_ascii=False).rstrip("\n").encode("utf-8") + b"\n"
+
+
+class _ChunkSink:
+    """Minimal writable file object collecting Arrow IPC output"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def arrow_stream(batches, schema: "pa.Schema") -> Iterator[bytes]:
+    """Encode Arrow record batches as one Arrow IPC stream
+
+    The stream takes the schema of the first batch; an empty page is a
+    valid stream of `schema` with zero batches.
+    """
+    sink = _ChunkSink()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.drain()
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, schema)
+    writer.close()
+    yield sink.drain()
+
+
+def frame_record_batches(df: pd.DataFrame, offset: int, limit: int,
+                         batch_size: int) -> Iterator["pa.RecordBatch"]:
+    """Convert one page of a DataFrame to Arrow record batches
+
+    The page is converted as a whole so every batch shares one schema.
+    """
+    page = df.iloc[offset:offset + limit]
+    if page.empty:
+        return iter(())
+    return iter(to_arrow_table(page).to_batches(max_chunksize=batch_size))
+
+
+def frame_schema(df: pd.DataFrame) -> "pa.Schema":
+    """Arrow schema of a DataFrame page, for pages without rows"""
+    return to_arrow_table(df.iloc[:0]).schema
@@ -0,0 +1,257 @@
+"""Process-wide Google Sheets client with revision-keyed caching
+
+Building service-account credentials and the discovery client is slow, so
+it happens once per process instead of on every request (and every health
+probe). Value reads go through values.batchGet, so several ranges or
+sheets cost one API call.
+
+Without an explicit range, a sheet is read by its actual grid size
+(gridProperties) in page-sized row ranges fetched in parallel, instead of
+a fixed A1:Z1000 that truncates large sheets.
+
+Results are cached on (spreadsheet, Drive file version, range). The Drive
+version changes on every edit, so a re-read of an unchanged spreadsheet is
+served from memory after one cheap metadata call; the version itself is
+remembered for a short window (SHEETS_REVISION_TTL_SECONDS).
+
+The discovery client is shared, but httplib2 is not thread-safe: every
+thread executes requests on its own authorized HTTP object.
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+
+from parse_cache import ParsedFrameCache, make_key
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    'https://www.googleapis.com/auth/drive.metadata.readonly'
+]
+
+# Failed initialization is retried at most this often
+INIT_RETRY_SECONDS = 60.0
+
+PROPERTIES = "__properties__"
+
+
+def column_letter(index: int) -> str:
+    """1-based column index to A1 letters (1 -> A, 27 -> AA)"""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def quote_sheet_name(sheet_name: str) -> str:
+    """Sheet name for A1 notation ('' escapes a quote)"""
+    return "'{}'".format(sheet_name.replace("'", "''"))
+
+
+def estimate_values_size(values: List[List[Any]]) -> int:
+    """Approximate in-memory size of a values response in bytes"""
+    return sys.getsizeof(values) + sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(cell) for cell in row) for row in values
+    )
+
+
+class SheetsClient:
+    """Lazily initialized, shared Sheets/Drive API client"""
+
+    def __init__(self, credentials_path: str, cache: ParsedFrameCache,
+                 revision_ttl_seconds: float = 30.0,
+                 page_rows: int = 10000, page_concurrency: int = 4):
+        self.credentials_path = credentials_path
+        self.cache = cache
+        self.revision_ttl_seconds = revision_ttl_seconds
+        self.page_rows = page_rows
+        self._pages = ThreadPoolExecutor(max_workers=page_concurrency,
+                                         thread_name_prefix="sheets-page")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._credentials = None
+        self._sheets = None
+        self._drive = None
+        self._init_error: Optional[str] = None
+        self._init_failed_at = 0.0
+        self._revisions: Dict[str, tuple] = {}
+        self.api_calls = 0
+        self.revision_calls = 0
+
+    # ==========================================
+    # Initialization
+    # ==========================================
+
+    def _ensure_initialized(self) -> bool:
+        if self._sheets is not None:
+            return True
+        with self._lock:
+            if self._sheets is not None:
+                return True
+            if self._init_error and time.monotonic() - self._init_failed_at < INIT_RETRY_SECONDS:
+                return False
+            try:
+                credentials = service_account.Credentials.from_service_account_file(
+                    self.credentials_path, scopes=SCOPES
+                )
+                self._drive = build('drive', 'v3', credentials=credentials, cache_discovery=False)
+                self._sheets = build('sheets', 'v4', credentials=credentials, cache_discovery=False)
+                self._credentials = credentials
+                self._init_error = None
+                return True
+            except Exception as e:
+                print(f"Warning: Could not initialize Google Sheets API: {e}")
+                self._init_error = str(e)
+                self._init_failed_at = time.monotonic()
+                return False
+
+    @property
+    def available(self) -> bool:
+        """True if the client is (or can be) initialized; no API call"""
+        return self._ensure_initialized()
+
+    def service(self):
+        """The shared Sheets discovery client, or None if not configured"""
+        return self._sheets if self._ensure_initialized() else None
+
+    def http(self):
+        """Authorized HTTP object of the calling thread"""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self._credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def execute(self, request):
+        """Execute an API request on the calling thread's HTTP object"""
+        self.api_calls += 1
+        return request.execute(http=self.http())
+
+    # ==========================================
+    # Reads
+    # ==========================================
+
+    def revision(self, spreadsheet_id: str) -> Optional[str]:
+        """Drive file version of a spreadsheet (remembered for a short window)
+
+        Returns None if the version cannot be read; results are then not cached.
+        """
+        entry = self._revisions.get(spreadsheet_id)
+        if entry is not None and time.monotonic() - entry[1] < self.revision_ttl_seconds:
+            return entry[0]
+        try:
+            self.revision_calls += 1
+            metadata = self._drive.files().get(
+                fileId=spreadsheet_id, fields="version", supportsAllDrives=True
+            ).execute(http=self.http())
+        except Exception as e:
+            print(f"Warning: Could not read revision of {spreadsheet_id}: {e}")
+            return None
+        revision = metadata.get("version")
+        self._revisions[spreadsheet_id] = (revision, time.monotonic())
+        return revision
+
+    def batch_get(self, spreadsheet_id: str, ranges: List[str]) -> Dict[str, List[List[Any]]]:
+        """Values of several ranges, fetching only uncached ones in one batchGet call
+
+        Returns {requested range: rows}.
+        """
+        if not self._ensure_initialized():
+            raise RuntimeError(f"Google Sheets API not configured: {self._init_error}")
+
+        revision = self.revision(spreadsheet_id)
+        results: Dict[str, List[List[Any]]] = {}
+        missing = []
+        for range_name in ranges:
+            cached = None
+            if revision is not None:
+                cached = self.cache.get(make_key("sheets", spreadsheet_id, revision, range_name))
+            if cached is not None:
+                results[range_name] = cached
+            else:
+                missing.append(range_name)
+
+        if missing:
+            response = self.execute(self._sheets.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=missing
+            ))
+            # valueRanges come back in request order
+            for range_name, value_range in zip(missing, response.get('valueRanges', [])):
+                values = value_range.get('values', [])
+                results[range_name] = values
+                if revision is not None:
+                    self.cache.put(make_key("sheets", spreadsheet_id, revision, range_name),
+                                   values, size=estimate_values_size(values))
+
+        return {range_name: results[range_name] for range_name in ranges}
+
+    def get_values(self, spreadsheet_id: str, range_name: str) -> List[List[Any]]:
+        return self.batch_get(spreadsheet_id, [range_name])[range_name]
+
+    def sheet_properties(self, spreadsheet_id: str) -> Dict[str, Any]:
+        """Spreadsheet title, locale and per-sheet properties (incl. gridProperties)"""
+        if not self._ensure_initialized():
+            raise RuntimeError(f"Google Sheets API not configured: {self._init_error}")
+
+        revision = self.revision(spreadsheet_id)
+        key = make_key("sheets", spreadsheet_id, revision, PROPERTIES)
+        properties = self.cache.get(key) if revision is not None else None
+        if properties is None:
+            properties = self.execute(self._sheets.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields="properties(title,locale),sheets.properties"
+            ))
+            if revision is not None:
+                self.cache.put(key, properties)
+        return properties
+
+    def read_sheet(self, spreadsheet_id: str,
+                   sheet_name: Optional[str] = None) -> List[List[Any]]:
+        """All rows of a sheet, sized by its grid and read in parallel pages"""
+        sheets = self.sheet_properties(spreadsheet_id).get("sheets", [])
+        if not sheets:
+            return []
+        if sheet_name is None:
+            properties = sheets[0]["properties"]
+        else:
+            matches = [s["properties"] for s in sheets if s["properties"].get("title") == sheet_name]
+            if not matches:
+                raise KeyError(f"Sheet not found: {sheet_name}")
+            properties = matches[0]
+
+        grid = properties.get("gridProperties", {})
+        row_count = grid.get("rowCount", 0)
+        last_column = column_letter(max(1, grid.get("columnCount", 1)))
+        title = quote_sheet_name(properties["title"])
+
+        ranges = [
+            f"{title}!A{start}:{last_column}{min(start + self.page_rows - 1, row_count)}"
+            for start in range(1, row_count + 1, self.page_rows)
+        ]
+        pages = list(self._pages.map(lambda r: self.get_values(spreadsheet_id, r), ranges))
+
+        # The API drops trailing empty rows of each range; pad every page
+        # that is followed by data so row positions stay aligned
+        last_page = max((i for i, page in enumerate(pages) if page), default=-1)
+        values: List[List[Any]] = []
+        for i, page in enumerate(pages[:last_page + 1]):
+            values.extend(page)
+            if i < last_page:
+                values.extend([] for _ in range(self.page_rows - len(page)))
+        return values
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "initialized": self._sheets is not None,
+            "init_error": self._init_error,
+            "api_calls": self.api_calls,
+            "revision_calls": self.revision_calls,
+        }
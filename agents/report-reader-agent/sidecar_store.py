@@ -0,0 +1,233 @@
+"""Columnar Parquet sidecars for parsed report sheets
+
+Excel parsing is the most expensive step of the Report Reader, so the first
+parse of a sheet is written as a Parquet file next to the original upload:
+
+    reports/<file>.xlsx.sidecar/g<generation>/<sheet>.h<header_row>.parquet
+
+The GCS generation is part of the path, so a re-upload to the same path
+never reads a stale sidecar. Later reads load the sidecar with column
+projection and filters (row groups are skipped using Parquet statistics).
+A sheet with a column mixing numbers and text gets no sidecar, since
+Parquet stores one type per column and a sidecar must not change values.
+
+Two storage backends are provided: GCS (the reports bucket, also works with
+the fake-gcs emulator via STORAGE_EMULATOR_HOST) and the local filesystem.
+"""
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    arrow_available = True
+except ImportError:
+    pa = None
+    pq = None
+    arrow_available = False
+
+SIDECAR_SUFFIX = ".sidecar"
+ROW_GROUP_SIZE = int(os.getenv("SIDECAR_ROW_GROUP_SIZE", "65536"))
+
+# Object columns of these kinds (pandas.api.types.infer_dtype) convert to one
+# Arrow type without changing their values; the kind of each object column is
+# kept in the schema metadata under OBJECT_KINDS_KEY to restore it on read
+NATIVE_OBJECT_KINDS = ("string", "empty", "bytes", "boolean", "date", "decimal",
+                       "integer", "floating", "time", "datetime")
+OBJECT_KINDS_KEY = b"object_kinds"
+
+# Filters use pyarrow's DNF format: [(column, op, value), ...] (AND-ed)
+Filter = Tuple[str, str, Any]
+
+
+def sidecar_prefix(file_path: str, generation: Optional[int]) -> str:
+    """Directory-like prefix holding all sidecars of one file generation"""
+    return f"{file_path}{SIDECAR_SUFFIX}/g{generation or 0}"
+
+
+def sidecar_path(file_path: str, generation: Optional[int],
+                 sheet_name: Any, header_row: int = 0) -> str:
+    """Object path of the sidecar for one sheet"""
+    sheet = quote(str(sheet_name), safe="")
+    return f"{sidecar_prefix(file_path, generation)}/{sheet}.h{header_row}.parquet"
+
+
+# ==========================================
+# Storage Backends
+# ==========================================
+
+class GCSSidecarBackend:
+    """Sidecars stored in the same bucket as the original file"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def open_input(self, bucket: str, path: str):
+        """Open a seekable reader, so Parquet reads only the needed ranges"""
+        blob = self.client.bucket(bucket).get_blob(path)
+        if blob is None:
+            raise FileNotFoundError(path)
+        return blob.open("rb")
+
+    def write_bytes(self, bucket: str, path: str, data: bytes,
+                    content_type: str = "application/vnd.apache.parquet"):
+        blob = self.client.bucket(bucket).blob(path)
+        blob.upload_from_string(data, content_type=content_type)
+
+
+class LocalSidecarBackend:
+    """Sidecars stored under a local directory as <root>/<bucket>/<path>"""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _local_path(self, bucket: str, path: str) -> str:
+        return os.path.join(self.root_dir, bucket, path)
+
+    def open_input(self, bucket: str, path: str):
+        return open(self._local_path(bucket, path), "rb")
+
+    def write_bytes(self, bucket: str, path: str, data: bytes,
+                    content_type: Optional[str] = None):
+        local_path = self._local_path(bucket, path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial file
+        tmp_path = f"{local_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, local_path)
+
+
+# ==========================================
+# Conversion
+# ==========================================
+
+class LossyColumnError(ValueError):
+    """Raised when a column cannot be stored in Arrow without changing its values"""
+
+
+def to_arrow_table(df: pd.DataFrame, lossless: bool = False) -> "pa.Table":
+    """Convert a parsed sheet to an Arrow table
+
+    Excel columns often mix numbers and text; Arrow needs one type per
+    column, so mixed object columns are stored as strings, or rejected
+    with LossyColumnError if lossless is set.
+    """
+    df = df.copy(deep=False)
+    df.columns = [str(col) for col in df.columns]
+    kinds: Dict[str, str] = {}
+    for col in df.columns:
+        if df[col].dtype == object:
+            kind = pd.api.types.infer_dtype(df[col], skipna=True)
+            if kind not in NATIVE_OBJECT_KINDS:
+                if lossless:
+                    raise LossyColumnError(f"Column {col!r} mixes value types ({kind})")
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+                kind = "string"
+            kinds[col] = kind
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        if lossless:
+            raise LossyColumnError(str(e))
+        raise
+    metadata = dict(table.schema.metadata or {})
+    metadata[OBJECT_KINDS_KEY] = json.dumps(kinds, ensure_ascii=False).encode("utf-8")
+    return table.replace_schema_metadata(metadata)
+
+
+def restore_object_columns(df: pd.DataFrame, metadata: Optional[Dict[bytes, bytes]]) -> pd.DataFrame:
+    """Give columns stored from object columns their object dtype and values back
+
+    Integer columns with missing cells come back from Arrow as floats;
+    their values are turned back into ints.
+    """
+    if not metadata or OBJECT_KINDS_KEY not in metadata:
+        return df
+    kinds = json.loads(metadata[OBJECT_KINDS_KEY])
+    for col in df.columns:
+        kind = kinds.get(str(col))
+        if kind is None or df[col].dtype == object:
+            continue
+        values = df[col].astype(object)
+        if kind == "integer" and df[col].dtype.kind == "f":
+            present = df[col].notna()
+            values[present] = df[col][present].astype("int64").tolist()
+        df[col] = values
+    return df
+
+
+def write_sidecar(backend, bucket: str, file_path: str, generation: Optional[int],
+                  sheet_name: Any, header_row: int, df: pd.DataFrame) -> Optional[str]:
+    """Write one sheet as a Parquet sidecar and return its path
+
+    Returns None (no sidecar) if the sheet has a column that Parquet cannot
+    store without changing its values; reads of it keep parsing the original.
+    """
+    try:
+        table = to_arrow_table(df, lossless=True)
+    except LossyColumnError:
+        return None
+    path = sidecar_path(file_path, generation, sheet_name, header_row)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, row_group_size=ROW_GROUP_SIZE)
+    backend.write_bytes(bucket, path, buffer.getvalue())
+    return path
+
+
+def read_sidecar(backend, bucket: str, file_path: str, generation: Optional[int],
+                 sheet_name: Any, header_row: int = 0,
+                 columns: Optional[List[str]] = None,
+                 filters: Optional[Sequence[Filter]] = None) -> Optional[pd.DataFrame]:
+    """Read a sheet from its sidecar, or return None if there is none
+
+    Only the requested columns are read, and row groups whose statistics
+    cannot match the filters are skipped.
+    """
+    path = sidecar_path(file_path, generation, sheet_name, header_row)
+    try:
+        source = backend.open_input(bucket, path)
+    except FileNotFoundError:
+        return None
+
+    with source:
+        table = pq.read_table(
+            source,
+            columns=columns,
+            filters=list(filters) if filters else None
+        )
+    return restore_object_columns(table.to_pandas(), table.schema.metadata)
+
+
+def apply_filters(df: pd.DataFrame, filters: Optional[Sequence[Filter]]) -> pd.DataFrame:
+    """Apply sidecar-style filters to an in-memory DataFrame"""
+    if not filters:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        series = df[column]
+        if op in ("=", "=="):
+            mask &= series == value
+        elif op == "!=":
+            mask &= series != value
+        elif op == "<":
+            mask &= series < value
+        elif op == "<=":
+            mask &= series <= value
+        elif op == ">":
+            mask &= series > value
+        elif op == ">=":
+            mask &= series >= value
+        elif op == "in":
+            mask &= series.isin(value)
+        elif op == "not in":
+            mask &= ~series.isin(value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return df[mask]
@@ -0,0 +1,290 @@
+"""Mergeable streaming sketches for single-pass column statistics
+
+Sketches summarize a column chunk by chunk in bounded memory, and two
+sketches of the same kind can be merged (e.g. chunks of one file, sheets
+of one workbook, or files of one report set). All of them serialize to
+plain JSON-compatible dicts.
+
+- HyperLogLog: approximate distinct count (~1.6% error at precision 12)
+- CountMinSketch: frequency upper bound of any value
+- SpaceSaving: top-N most frequent values (heavy hitters) with error bounds
+- ReservoirSample: uniform sample of values for approximate quantiles
+"""
+import base64
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION = 12
+DEFAULT_CM_WIDTH = 2048
+DEFAULT_CM_DEPTH = 4
+DEFAULT_CAPACITY = 64
+DEFAULT_RESERVOIR_SIZE = 10000
+
+
+def encode_array(array: np.ndarray) -> str:
+    """Compact JSON-safe encoding of a NumPy array (zlib + base64)"""
+    return base64.b64encode(zlib.compress(array.tobytes())).decode("ascii")
+
+
+def decode_array(data: str, dtype, shape=None) -> np.ndarray:
+    array = np.frombuffer(zlib.decompress(base64.b64decode(data)), dtype=dtype).copy()
+    return array.reshape(shape) if shape is not None else array
+
+
+def normalize_values(values: pd.Series) -> pd.Series:
+    """Non-null values in the form that is hashed and counted
+
+    Numbers become float64 and everything else text, so the same value is
+    counted once even when chunks of one column get different dtypes.
+    """
+    values = values.dropna()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Convert the categories only; rows keep their codes
+        categories = normalize_values(pd.Series(values.cat.categories))
+        if categories.is_unique and len(categories) == len(values.cat.categories):
+            return pd.Series(pd.Categorical.from_codes(values.cat.codes, categories),
+                             index=values.index)
+        values = values.astype(object)
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype(str)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+    return values.astype(str)
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-null values of a column (see normalize_values)"""
+    values = normalize_values(values)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with vectorized updates"""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # rho = position of the first 1-bit in the remaining 64-p bits
+        remaining_bits = 64 - self.precision
+        remaining = hashes & np.uint64((1 << remaining_bits) - 1)
+        with np.errstate(divide="ignore"):
+            highest_bit = np.floor(np.log2(remaining.astype(np.float64)))
+        rho = np.where(remaining == 0, remaining_bits + 1,
+                       remaining_bits - highest_bit).astype(np.uint8)
+        np.maximum.at(self.registers, index, rho)
+
+    def update(self, values: pd.Series):
+        """Add the non-null values of a column chunk"""
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": encode_array(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        sketch.registers = decode_array(data["registers"], np.uint8)
+        return sketch
+
+
+class CountMinSketch:
+    """Count-Min sketch: frequency upper bounds in width x depth counters
+
+    Overestimates a count by at most ~2N/width with high probability,
+    where N is the total number of values added.
+    """
+
+    def __init__(self, width: int = DEFAULT_CM_WIDTH, depth: int = DEFAULT_CM_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint64)
+
+    def _indexes(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2 (Kirsch-Mitzenmacher)
+        hashes = hashes.astype(np.uint64, copy=False)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((low[None, :] + rows * high[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def add_hashes(self, hashes: np.ndarray, counts: Optional[np.ndarray] = None):
+        if not len(hashes):
+            return
+        for row, index in enumerate(self._indexes(hashes)):
+            self.table[row] += np.bincount(index, weights=counts,
+                                           minlength=self.width).astype(np.uint64)
+
+    def update(self, values: pd.Series):
+        """Add the non-null values of a column chunk"""
+        self.add_hashes(hash_values(values))
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(hashes):
+            return np.zeros(0, dtype=np.uint64)
+        index = self._indexes(hashes)
+        return self.table[np.arange(self.depth)[:, None], index].min(axis=0)
+
+    def merge(self, other: "CountMinSketch"):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different size")
+        self.table += other.table
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"width": self.width, "depth": self.depth, "table": encode_array(self.table)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"])
+        sketch.table = decode_array(data["table"], np.uint64, (sketch.depth, sketch.width))
+        return sketch
+
+
+class SpaceSaving:
+    """Mergeable Space-Saving summary of the most frequent values
+
+    Keeps at most `capacity` counters. Counts are upper bounds; count - error
+    is a guaranteed lower bound. `floor` bounds the count of any value that
+    is not tracked. Chunks are added as exact value counts and merged in one
+    vectorized step, instead of one counter update per row.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="float64")
+        self.errors = pd.Series(dtype="float64")
+        self.floor = 0.0
+
+    def _combine(self, counts: pd.Series, errors: pd.Series, floor: float):
+        index = self.counts.index.union(counts.index)
+        merged = (self.counts.reindex(index).fillna(self.floor)
+                  + counts.reindex(index).fillna(floor))
+        merged_errors = (self.errors.reindex(index).fillna(self.floor)
+                         + errors.reindex(index).fillna(floor))
+        merged = merged.sort_values(ascending=False, kind="stable")
+        dropped = merged.iloc[self.capacity:]
+        kept = merged.iloc[:self.capacity]
+        self.floor = max(self.floor + floor, float(dropped.max()) if len(dropped) else 0.0)
+        self.counts = kept
+        self.errors = merged_errors.reindex(kept.index)
+
+    def update(self, values: pd.Series):
+        """Add the non-null values of a column chunk"""
+        counts = normalize_values(values).value_counts(sort=False)
+        counts = counts[counts > 0].astype("float64")  # Unused categories count 0
+        counts.index = pd.Index(counts.index.astype(object))
+        floor = 0.0
+        if len(counts) > self.capacity:
+            # Only the chunk's top values can enter the summary; tracked
+            # values keep their exact chunk counts
+            top = counts.nlargest(self.capacity + 1)
+            floor = float(top.iloc[-1])
+            tracked = counts.reindex(self.counts.index).dropna()
+            counts = pd.concat([top.iloc[:self.capacity],
+                                tracked[~tracked.index.isin(top.index[:self.capacity])]])
+        self._combine(counts, pd.Series(0.0, index=counts.index), floor)
+
+    def merge(self, other: "SpaceSaving"):
+        self._combine(other.counts, other.errors, other.floor)
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """Top k values as {"value", "count", "error"}, by count"""
+        return [
+            {"value": value, "count": int(count), "error": int(self.errors[value])}
+            for value, count in self.counts.iloc[:k].items()
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "floor": self.floor,
+            "items": [[value, float(count), float(self.errors[value])]
+                      for value, count in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SpaceSaving":
+        sketch = cls(data["capacity"])
+        items = data["items"]
+        index = pd.Index([item[0] for item in items])
+        sketch.counts = pd.Series([item[1] for item in items], index=index, dtype="float64")
+        sketch.errors = pd.Series([item[2] for item in items], index=index, dtype="float64")
+        sketch.floor = data["floor"]
+        return sketch
+
+
+class ReservoirSample:
+    """Uniform sample of at most `size` numbers, for approximate quantiles
+
+    Exact while fewer than `size` values were seen. Merging draws from both
+    samples in proportion to how many values each one represents.
+    """
+
+    def __init__(self, size: int = DEFAULT_RESERVOIR_SIZE, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.values = np.zeros(0, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def _combine(self, values: np.ndarray, seen: int):
+        total = self.seen + seen
+        combined = np.concatenate([self.values, values])
+        if len(combined) > self.size:
+            # Each kept value stands for seen / len(sample) original values
+            weights = np.concatenate([
+                np.full(len(self.values), self.seen / max(len(self.values), 1)),
+                np.full(len(values), seen / max(len(values), 1)),
+            ])
+            keep = self._rng.choice(len(combined), size=self.size, replace=False,
+                                    p=weights / weights.sum())
+            combined = combined[keep]
+        self.values = combined
+        self.seen = total
+
+    def update(self, values: np.ndarray):
+        """Add a chunk of non-null numbers"""
+        values = np.asarray(values, dtype=np.float64)
+        self._combine(values, len(values))
+
+    def merge(self, other: "ReservoirSample"):
+        self._combine(other.values, other.seen)
+
+    def quantiles(self, q) -> Optional[np.ndarray]:
+        if not len(self.values):
+            return None
+        return np.quantile(self.values, q)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "seen": self.seen, "values": encode_array(self.values)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReservoirSample":
+        sample = cls(data["size"])
+        sample.seen = data["seen"]
+        sample.values = decode_array(data["values"], np.float64)
+        return sample
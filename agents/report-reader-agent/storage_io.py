@@ -0,0 +1,155 @@
+"""Cloud Storage I/O for the Report Reader
+
+One metadata request (get_blob) per file gives the generation and size,
+which are reused for every later step; downloads then address the exact
+generation and handle NotFound directly instead of probing with exists().
+
+How a file is fetched depends on its size:
+
+- small files are downloaded into memory (and cached as raw bytes)
+- large files are streamed in chunks into a local copy on disk, bounded
+  by DownloadSpool; parsers and pool workers open the copy by path, so
+  the file is never held as one bytes object and never pickled
+- CSV files can be read as a chunked stream and parsed while downloading
+"""
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+
+class BlobInfo(NamedTuple):
+    generation: Optional[int]
+    size: Optional[int]
+
+
+def get_blob_info(client, bucket_name: str, file_path: str) -> Optional[BlobInfo]:
+    """Generation and size of a blob in one request; None if it does not exist"""
+    blob = client.bucket(bucket_name).get_blob(file_path)
+    if blob is None:
+        return None
+    return BlobInfo(blob.generation, blob.size)
+
+
+def download_bytes(client, bucket_name: str, file_path: str,
+                   generation: Optional[int] = None) -> bytes:
+    """Download a (specific generation of a) blob into memory"""
+    return client.bucket(bucket_name).blob(file_path, generation=generation).download_as_bytes()
+
+
+def open_blob_stream(client, bucket_name: str, file_path: str,
+                     generation: Optional[int] = None, chunk_size: int = 8 * 1024 * 1024):
+    """Open a blob as a buffered file object that downloads in chunks"""
+    blob = client.bucket(bucket_name).blob(file_path, generation=generation)
+    return blob.open("rb", chunk_size=chunk_size)
+
+
+class DownloadSpool:
+    """Local copies of large files, bounded by total size on disk (LRU)
+
+    Copies are keyed on (bucket, path, generation), so a re-upload is
+    downloaded again. Files are written under a temporary name and
+    renamed, so readers never see a partial copy. A copy is pinned while
+    a caller holds it (see pinned) and is never evicted while pinned; the
+    budget can be exceeded until the pins are released.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self._files: "OrderedDict[Tuple[str, str, Optional[int]], Tuple[str, int]]" = OrderedDict()
+        self._pins: Dict[Tuple[str, str, Optional[int]], int] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.downloads = 0
+        self.evictions = 0
+
+    def _local_path(self, bucket_name: str, file_path: str, generation: Optional[int]) -> str:
+        # Keep the extension last: openpyxl picks the format by file name
+        stem, extension = os.path.splitext(file_path)
+        name = quote(f"{bucket_name}/{stem}", safe="")
+        return os.path.join(self.root_dir, f"{name}.g{generation or 0}{extension}")
+
+    def _evict(self):
+        """Remove the oldest unpinned copies until within budget (lock held)"""
+        # Keep the newest copy even if it alone exceeds the budget
+        for key in list(self._files)[:-1]:
+            if self._bytes <= self.max_bytes:
+                break
+            if self._pins.get(key):
+                continue
+            old_path, old_size = self._files.pop(key)
+            self._bytes -= old_size
+            self.evictions += 1
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _acquire(self, client, bucket_name: str, file_path: str,
+                 generation: Optional[int]) -> str:
+        """Return the path of a pinned local copy, downloading it if needed"""
+        key = (bucket_name, file_path, generation)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None and os.path.exists(entry[0]):
+                self._files.move_to_end(key)
+                self._pins[key] = self._pins.get(key, 0) + 1
+                self.hits += 1
+                return entry[0]
+
+        local_path = self._local_path(bucket_name, file_path, generation)
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = f"{local_path}.{uuid.uuid4().hex}.part"
+        try:
+            blob = client.bucket(bucket_name).blob(file_path, generation=generation)
+            with open(tmp_path, "wb") as f:
+                blob.download_to_file(f)  # Streams in chunks
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        size = os.path.getsize(local_path)
+        with self._lock:
+            if key in self._files:
+                self._bytes -= self._files.pop(key)[1]
+            self._files[key] = (local_path, size)
+            self._pins[key] = self._pins.get(key, 0) + 1
+            self._bytes += size
+            self.downloads += 1
+            self._evict()
+        return local_path
+
+    def _release(self, key: Tuple[str, str, Optional[int]]):
+        with self._lock:
+            pins = self._pins.pop(key) - 1
+            if pins:
+                self._pins[key] = pins
+            else:
+                self._evict()
+
+    @contextmanager
+    def pinned(self, client, bucket_name: str, file_path: str, generation: Optional[int]):
+        """Path of a local copy that is kept on disk until the block exits"""
+        path = self._acquire(client, bucket_name, file_path, generation)
+        try:
+            yield path
+        finally:
+            self._release((bucket_name, file_path, generation))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "pinned": len(self._pins),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "downloads": self.downloads,
+                "evictions": self.evictions,
+            }
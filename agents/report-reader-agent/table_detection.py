@@ -0,0 +1,207 @@
+"""Header-row and table-region detection for messy report sheets
+
+Wildberries/Ozon exports often start with a title block ("Отчет о продажах
+за период ..."), have merged cells, or hold several tables on one sheet.
+detect_tables looks at the first rows of a sheet and returns the real
+tables as bounding ranges:
+
+1. Split the scanned rows into regions separated by empty rows and empty
+   columns (stacked and side-by-side tables), recursively.
+2. Within a region, score every candidate header row among the first
+   rows: a good header is mostly filled with text that differs from the
+   values below it, and the columns below it have consistent types
+   (numbers under "Сумма", dates under "Дата").
+3. Rows above the best header (titles, notes) are dropped; single-column
+   regions (titles, merged captions) and regions without data rows are
+   ignored. A region without a header directly below a table, within its
+   columns, continues that table (data interrupted by an empty row).
+
+A table that reaches the end of the scanned window is assumed to extend
+to the last non-empty row of the sheet.
+"""
+import datetime
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from workbook_scanner import build_column_names
+
+SCAN_ROWS = 200
+HEADER_CANDIDATES = 10
+CONSISTENCY_ROWS = 20
+MIN_SCORE = 0.3
+MIN_COLUMNS = 2
+
+NUMBER_PATTERN = re.compile(r"^[-−]?[\d\s ]+([.,]\d+)?\s*(₽|руб\.?|%)?$")
+DATE_PATTERN = re.compile(r"^\d{1,4}[./-]\d{1,2}[./-]\d{1,4}")
+
+
+def column_letter(index: int) -> str:
+    """0-based column index to A1 letters (0 -> A, 26 -> AA)"""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """A1 letters to a 0-based column index (A -> 0, AA -> 26)"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - ord("A") + 1
+    return index - 1
+
+
+def parse_range(table_range: str) -> Tuple[int, int, int, int]:
+    """"B4:H120" -> (first_row, last_row, first_col, last_col); rows 1-based, cols 0-based"""
+    match = re.match(r"^([A-Za-z]+)(\d+):([A-Za-z]+)(\d+)$", table_range.strip())
+    if not match:
+        raise ValueError(f"Invalid table range: {table_range}")
+    first_col, first_row, last_col, last_row = match.groups()
+    return int(first_row), int(last_row), column_index(first_col), column_index(last_col)
+
+
+def cell_kind(value: Any) -> Optional[str]:
+    """Classify a cell as number, date, bool or text (None if empty)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return "date"
+    text = str(value).strip()
+    if not text:
+        return None
+    if NUMBER_PATTERN.match(text):
+        return "number"
+    if DATE_PATTERN.match(text):
+        return "date"
+    return "text"
+
+
+def _split_runs(flags: Sequence[bool], offset: int = 0) -> List[Tuple[int, int]]:
+    """Runs of consecutive True flags as inclusive (start, end) pairs"""
+    runs = []
+    start = None
+    for i, flag in enumerate(flags):
+        if flag and start is None:
+            start = i
+        elif not flag and start is not None:
+            runs.append((offset + start, offset + i - 1))
+            start = None
+    if start is not None:
+        runs.append((offset + start, offset + len(flags) - 1))
+    return runs
+
+
+def _regions(kinds: List[List[Optional[str]]], top: int, bottom: int,
+             left: int, right: int) -> List[Tuple[int, int, int, int]]:
+    """Non-empty (top, bottom, left, right) regions split by empty rows and columns"""
+    row_runs = _split_runs([any(row[left:right + 1]) for row in kinds[top:bottom + 1]], top)
+    if row_runs != [(top, bottom)]:
+        return [region for start, end in row_runs
+                for region in _regions(kinds, start, end, left, right)]
+    col_runs = _split_runs(
+        [any(row[col] for row in kinds[top:bottom + 1]) for col in range(left, right + 1)], left
+    )
+    if col_runs != [(left, right)]:
+        return [region for start, end in col_runs
+                for region in _regions(kinds, top, bottom, start, end)]
+    return [(top, bottom, left, right)]
+
+
+def score_header(kinds: List[List[Optional[str]]], header: int) -> float:
+    """Score row `header` of a region (cell kinds) as its header row
+
+    Mean contrast per column x (0.5 + 0.5 x type consistency below).
+    Contrast is 1 for a text cell over a non-text column, 0.5 for text over
+    text and 0 for an empty or non-text cell, so a data row or a sparse
+    title row does not look like a header.
+    """
+    row = kinds[header]
+    width = len(row)
+    below = [r for r in kinds[header + 1:header + 1 + CONSISTENCY_ROWS] if any(r)]
+    if not any(row) or not below:
+        return 0.0
+
+    contrast = 0.0
+    consistencies = []
+    for col in range(width):
+        column = [r[col] for r in below if r[col] is not None]
+        majority = max(set(column), key=column.count) if column else None
+        if column:
+            consistencies.append(column.count(majority) / len(column))
+        if row[col] == "text":
+            contrast += 0.5 if majority in ("text", None) else 1.0
+
+    consistency = sum(consistencies) / len(consistencies) if consistencies else 0.0
+    return contrast / width * (0.5 + 0.5 * consistency)
+
+
+def detect_tables(rows: Sequence[Sequence[Any]], sheet_last_row: Optional[int] = None,
+                  min_score: float = MIN_SCORE) -> List[Dict[str, Any]]:
+    """Detect tables in the first rows of a sheet
+
+    Args:
+        rows: Row value tuples starting at cell A1 (e.g. first SCAN_ROWS rows)
+        sheet_last_row: 1-based last non-empty row of the whole sheet
+        min_score: Minimum header score for a region to count as a table
+
+    Returns:
+        Tables in sheet order with range ("B4:H120"), header_row (0-based,
+        for header=), first_row/last_row (1-based), columns and score
+    """
+    width = max((len(row) for row in rows), default=0)
+    kinds = [[cell_kind(row[i]) if i < len(row) else None for i in range(width)] for row in rows]
+    scanned_last_row = len(rows)
+
+    tables: List[Dict[str, Any]] = []
+    if not width:
+        return tables
+    for top, bottom, left, right in _regions(kinds, 0, len(kinds) - 1, 0, width - 1):
+        region = [row[left:right + 1] for row in kinds[top:bottom + 1]]
+        scored = [(score_header(region, h), h)
+                  for h in range(min(HEADER_CANDIDATES, len(region) - 1))]
+        score, header = max(scored, key=lambda item: (item[0], -item[1]), default=(0.0, 0))
+
+        last_row = bottom + 1
+        if last_row == scanned_last_row and sheet_last_row and sheet_last_row > last_row:
+            last_row = sheet_last_row  # Continues past the scanned window
+
+        if score < min_score:
+            # Headerless rows below a table within its columns continue it
+            above = [t for t in tables
+                     if t["left"] <= left and right <= t["right"] and t["bottom"] < top]
+            if above:
+                table = max(above, key=lambda t: t["bottom"])
+                table["bottom"], table["last_row"] = bottom, last_row
+            continue
+        if right - left + 1 < MIN_COLUMNS:
+            continue
+
+        tables.append({
+            "top": top + header, "bottom": bottom, "left": left, "right": right,
+            "last_row": last_row, "score": score,
+        })
+
+    results = []
+    for table in tables:
+        first_row = table["top"] + 1
+        left, right = table["left"], table["right"]
+        first_column, last_column = column_letter(left), column_letter(right)
+        results.append({
+            "range": f"{first_column}{first_row}:{last_column}{table['last_row']}",
+            "header_row": first_row - 1,
+            "first_row": first_row,
+            "last_row": table["last_row"],
+            "first_column": first_column,
+            "last_column": last_column,
+            "columns": build_column_names(list(rows[table["top"]])[left:right + 1],
+                                          right - left + 1),
+            "rows": table["last_row"] - first_row,
+            "score": round(table["score"], 3),
+        })
+    return results
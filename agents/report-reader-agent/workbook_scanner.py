@@ -0,0 +1,181 @@
+"""Single-pass workbook scanner for /analyze/metadata
+
+Reads every sheet of a workbook exactly once and collects what the metadata
+endpoint needs: row count, header, a few sample rows and their dtypes.
+
+.xlsx files are streamed with openpyxl in read-only mode, so memory stays
+bounded by the sample size regardless of how many rows a sheet has.
+Legacy .xls files (not a zip container) fall back to one pandas parse of
+all sheets, which is still a single pass instead of one parse per sheet.
+
+With head_rows, the first raw rows of each sheet are kept as well, for
+header-row and table-region detection (table_detection.py).
+"""
+import io
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# XLSX is an OOXML zip container, legacy XLS is an OLE2 compound file
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Raw file bytes, or the path of a local copy of a large file
+FileSource = Union[bytes, str]
+
+
+def is_xlsx_bytes(file_bytes: bytes) -> bool:
+    """Return True if the bytes look like an XLSX (zip) workbook"""
+    return file_bytes[:4] == ZIP_MAGIC
+
+
+def is_xlsx_source(source: FileSource) -> bool:
+    """is_xlsx_bytes for raw bytes or a local file path"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return is_xlsx_bytes(f.read(4))
+    return is_xlsx_bytes(source)
+
+
+def open_source(source: FileSource):
+    """Input accepted by pandas/openpyxl for raw bytes or a local file path"""
+    return source if isinstance(source, str) else io.BytesIO(source)
+
+
+def build_column_names(header: Sequence[Any], width: int) -> List[str]:
+    """Build column names the same way pandas.read_excel(header=0) does
+
+    Empty header cells become "Unnamed: N", duplicates get ".1", ".2" suffixes.
+    """
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i in range(width):
+        value = header[i] if i < len(header) else None
+        name = f"Unnamed: {i}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            deduped = f"{name}.{seen[name]}"
+            while deduped in seen:
+                seen[name] += 1
+                deduped = f"{name}.{seen[name]}"
+            seen[deduped] = 0
+            name = deduped
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _row_width(row: Sequence[Any]) -> int:
+    """Width of a row ignoring trailing empty cells"""
+    width = len(row)
+    while width and (row[width - 1] is None or row[width - 1] == ""):
+        width -= 1
+    return width
+
+
+def scan_sheet_rows(name: str, rows, sample_rows: int = 3,
+                    head_rows: int = 0) -> Dict[str, Any]:
+    """Scan an iterator of row tuples, keeping only the header and samples
+
+    Row count matches len(pd.read_excel(...)) for header=0: trailing empty
+    rows are dropped, empty rows in the middle of the data are counted.
+    With head_rows, the first head_rows raw rows (from A1) are kept as "head".
+    """
+    header: Sequence[Any] = ()
+    samples: List[Sequence[Any]] = []
+    head: List[Sequence[Any]] = []
+    width = 0
+    last_data_row = 0  # 1-based index of the last non-empty data row
+    seen_header = False
+
+    for index, row in enumerate(rows):
+        row_width = _row_width(row)
+        if index < head_rows:
+            head.append(row[:row_width])
+        if not seen_header:
+            header = row
+            seen_header = True
+            width = max(width, row_width)
+            continue
+
+        if row_width:
+            last_data_row = index
+            width = max(width, row_width)
+        if len(samples) < sample_rows:
+            samples.append(row)
+
+    # Samples may include trailing empty rows of a tiny sheet - drop them
+    samples = samples[:last_data_row]
+    columns = build_column_names(header, width)
+    padded = [
+        list(row[:width]) + [None] * (width - len(row[:width]))
+        for row in samples
+    ]
+    sample_df = pd.DataFrame(padded, columns=columns)
+
+    result = {
+        "name": name,
+        "rows": last_data_row,
+        "columns": columns,
+        "sample": sample_df,
+    }
+    if head_rows:
+        result["head"] = head[:last_data_row + 1]
+        result["last_row"] = last_data_row + 1 if (last_data_row or _row_width(header)) else 0
+    return result
+
+
+def scan_workbook(file_bytes: FileSource, sample_rows: int = 3,
+                  sheet_names: Optional[List[str]] = None,
+                  head_rows: int = 0) -> List[Dict[str, Any]]:
+    """Scan all sheets of a workbook in a single pass
+
+    Args:
+        file_bytes: Raw workbook bytes (.xlsx or .xls) or a local file path
+        sample_rows: Number of data rows to keep per sheet
+        sheet_names: Optional subset of sheets to scan (default: all)
+        head_rows: Number of raw rows to keep per sheet for table detection
+            (.xlsx only; the .xls fallback does not keep raw rows)
+
+    Returns:
+        List of dicts in workbook order with keys: name, rows, columns,
+        sample (DataFrame with up to sample_rows rows), and with head_rows
+        also head (raw rows from A1) and last_row (1-based last non-empty row)
+    """
+    if not is_xlsx_source(file_bytes):
+        return _scan_with_pandas(file_bytes, sample_rows, sheet_names)
+
+    workbook = load_workbook(open_source(file_bytes), read_only=True, data_only=True)
+    try:
+        results = []
+        for worksheet in workbook.worksheets:
+            if sheet_names is not None and worksheet.title not in sheet_names:
+                continue
+            # Read-only worksheets trust the <dimension> tag, which some
+            # exporters write incorrectly - reset it and stream every row
+            worksheet.reset_dimensions()
+            results.append(scan_sheet_rows(
+                worksheet.title,
+                worksheet.iter_rows(values_only=True),
+                sample_rows,
+                head_rows
+            ))
+        return results
+    finally:
+        workbook.close()
+
+
+def _scan_with_pandas(file_bytes: FileSource, sample_rows: int,
+                      sheet_names: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Fallback for legacy .xls: one pandas parse of all requested sheets"""
+    all_sheets = pd.read_excel(open_source(file_bytes), sheet_name=sheet_names)
+    return [
+        {
+            "name": name,
+            "rows": len(df),
+            "columns": [str(col) for col in df.columns],
+            "sample": df.head(sample_rows),
+        }
+        for name, df in all_sheets.items()
+    ]
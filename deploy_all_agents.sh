@@ -77,9 +77,17 @@ SERVICES=(
   "visualization-agent"
 )
 
+# Services that run upload follow-up work after the response keep their CPU
+ALWAYS_ON_CPU=("frontend-service" "logic-understanding-agent")
+
 for service in "${SERVICES[@]}"; do
   echo "Deploying $service..."
   
+  CPU_FLAG="--cpu-throttling"
+  if [[ " ${ALWAYS_ON_CPU[*]} " == *" $service "* ]]; then
+    CPU_FLAG="--no-cpu-throttling"
+  fi
+  
   gcloud run deploy $service \
     --image=$REGISTRY/$PROJECT_ID/financial-reports/$service:latest \
     --region=$REGION \
@@ -91,6 +99,7 @@ for service in "${SERVICES[@]}"; do
     --timeout=300 \
     --max-instances=10 \
     --min-instances=0 \
+    $CPU_FLAG \
     --project=$PROJECT_ID \
     --quiet
   
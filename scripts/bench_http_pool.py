@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Latency of inter-agent calls: one httpx client per call vs a shared pooled client
+
+Starts local stub servers standing in for the Report Reader and the Logic
+Agent, then sends the same request mix twice:
+
+- per_call: `async with httpx.AsyncClient()` around every request (the old
+  pattern - a new connection per call)
+- pooled:   one long-lived client with keep-alive limits (the pattern the
+  services use now, see create_http_client in their main.py)
+
+Stubs sleep --connect-delay-ms on every new connection to model the TLS
+handshake to Cloud Run (plain TCP on localhost is nearly free); use 0 to
+measure the local TCP cost only.
+
+Usage:
+    python scripts/bench_http_pool.py --requests 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+RESPONSE_BODY = json.dumps({"status": "success", "data": {"rows": 3, "columns": ["a", "b"]}}).encode()
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server answering every request with RESPONSE_BODY"""
+
+    def __init__(self, connect_delay: float, response_delay: float):
+        self.connect_delay = connect_delay
+        self.response_delay = response_delay
+        self.connections = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(self.response_delay)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(RESPONSE_BODY), RESPONSE_BODY))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+
+async def run(mode: str, urls, requests: int, concurrency: int):
+    latencies = []
+    pooled = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+        timeout=30.0
+    ) if mode == "pooled" else None
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(urls[i % len(urls)])
+
+    async def call(url: str):
+        payload = {"file_path": "reports/bench.xlsx"}
+        if pooled is not None:
+            response = await pooled.post(url, json=payload)
+        else:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(url, json=payload)
+        response.raise_for_status()
+
+    async def worker():
+        while not queue.empty():
+            url = queue.get_nowait()
+            started = time.perf_counter()
+            await call(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    if pooled is not None:
+        await pooled.aclose()
+    return latencies, elapsed
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--connect-delay-ms", type=float, default=15.0,
+                        help="delay per new connection (models the TLS handshake)")
+    parser.add_argument("--response-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    stubs = [StubServer(args.connect_delay_ms / 1000, args.response_delay_ms / 1000)
+             for _ in ("report-reader", "logic-agent")]
+    urls = [f"{await stub.start()}/read/storage" for stub in stubs]
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"connect delay {args.connect_delay_ms} ms, response delay {args.response_delay_ms} ms")
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>10}{'connections':>13}")
+    for mode in ("per_call", "pooled"):
+        before = sum(stub.connections for stub in stubs)
+        latencies, elapsed = await run(mode, urls, args.requests, args.concurrency)
+        connections = sum(stub.connections for stub in stubs) - before
+        print(f"{mode:<10}{percentile(latencies, 0.5):>10.2f}{percentile(latencies, 0.99):>10.2f}"
+              f"{statistics.mean(latencies):>10.2f}{len(latencies) / elapsed:>10.0f}{connections:>13}")
+
+    for stub in stubs:
+        stub.server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,30 +8,35 @@ locals {
       cpu         = "1"
       memory      = "512Mi"
       concurrency = 80
+      cpu_idle    = false # Upload follow-up work runs after the response
     }
     orchestrator = {
       name        = "orchestrator-agent"
       cpu         = "1"
       memory      = "512Mi"
       concurrency = 80
+      cpu_idle    = true
     }
     report_reader = {
       name        = "report-reader-agent"
       cpu         = "2"
       memory      = "1Gi"
       concurrency = 40
+      cpu_idle    = true
     }
     logic_understanding = {
       name        = "logic-understanding-agent"
       cpu         = "2"
       memory      = "2Gi"
       concurrency = 20
+      cpu_idle    = false # Upload follow-up work runs after the response
     }
     visualization = {
       name        = "visualization-agent"
       cpu         = "1"
       memory      = "1Gi"
       concurrency = 40
+      cpu_idle    = true
     }
   }
 }
@@ -55,6 +60,7 @@ resource "google_cloud_run_v2_service" "services" {
           cpu    = each.value.cpu
           memory = each.value.memory
         }
+        cpu_idle = each.value.cpu_idle
       }
 
       # Environment variables
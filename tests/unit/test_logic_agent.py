@@ -141,6 +141,168 @@ class TestGetReportData:
 
 
 @pytest.mark.asyncio
+class TestRequestStore:
+    """Test the bounded request store with a shared backend"""
+    
+    def test_local_lru_bounded_by_bytes_and_ttl(self):
+        """Test byte-size eviction of least recently used entries and TTL expiry"""
+        from agents.logic_understanding_agent.request_store import LocalRequestStore
+        
+        store = LocalRequestStore(max_bytes=250, ttl_seconds=60)
+        for request_id in ("a", "b"):
+            store.put(request_id, {"prompt": "x" * 80})
+        store.get("a")  # "b" is now the least recently used
+        store.put("c", {"prompt": "x" * 80})
+        
+        assert store.get("b") is None
+        assert store.get("a") is not None and store.get("c") is not None
+        assert store.stats()["evictions"] == 1 and store.stats()["bytes"] <= 250
+        assert not store.put("huge", {"prompt": "x" * 1000})
+        
+        store.ttl_seconds = 0
+        assert store.get("a") is None
+        assert store.stats()["expirations"] == 1
+    
+    def test_shared_backend_serves_other_instances(self):
+        """Test that an entry written on one instance is found on another"""
+        import asyncio
+        from agents.logic_understanding_agent.request_store import (
+            InMemoryRequestBackend, LocalRequestStore, RequestStore
+        )
+        
+        shared = InMemoryRequestBackend()
+        first = RequestStore(LocalRequestStore(1024 * 1024, 60), shared)
+        second = RequestStore(LocalRequestStore(1024 * 1024, 60), shared)
+        entry = {"query": "Выручка по складам", "prompt": "...", "response": "..."}
+        
+        asyncio.run(first.put("request-1", entry))
+        
+        assert asyncio.run(second.get("request-1")) == entry
+        assert asyncio.run(second.get("request-2")) is None
+        assert second.stats()["shared"]["hits"] == 1
+        assert second.local.get("request-1") == entry  # Filled on read
+
+class TestResponseCache:
+    """Test the cache of answers to repeated questions"""
+    
+    def test_exact_and_similar_questions(self):
+        """Test normalized exact matches, similar matches and the numbers guard"""
+        from agents.logic_understanding_agent.response_cache import EXACT, SIMILAR, ResponseCache
+        
+        cache = ResponseCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.85)
+        scope = ("v1", "reports/ozon.xlsx", 1, None)
+        cache.store(scope, "Какая выручка за октябрь 2024?", {"insights": "1 200 000 ₽"})
+        
+        assert cache.lookup(scope, "какая  выручка за октябрь 2024") == ({"insights": "1 200 000 ₽"}, EXACT)
+        assert cache.lookup(scope, "Какая была выручка за октябрь 2024?")[1] == SIMILAR
+        assert cache.lookup(scope, "Какая выручка за октябрь 2023?") is None
+        assert cache.lookup(("v1", "reports/ozon.xlsx", 1, "Лист1"), "Какая выручка за октябрь 2024?") is None
+        
+        stats = cache.stats()
+        assert (stats["exact_hits"], stats["similar_hits"], stats["misses"]) == (1, 1, 2)
+        assert stats["hit_ratio"] == 0.5
+    
+    def test_new_generation_and_prompt_version_invalidate(self):
+        """Test that a re-uploaded file or a new system prompt drops old answers"""
+        from agents.logic_understanding_agent.response_cache import ResponseCache
+        
+        cache = ResponseCache(max_entries=10, ttl_seconds=60)
+        cache.store(("v1", "reports/a.xlsx", 1, None), "Топ товаров", {"insights": "old"})
+        cache.store(("v1", "reports/b.xlsx", 7, None), "Топ товаров", {"insights": "b"})
+        
+        assert cache.lookup(("v1", "reports/a.xlsx", 2, None), "Топ товаров") is None
+        assert cache.lookup(("v1", "reports/a.xlsx", 1, None), "Топ товаров") is None
+        assert cache.lookup(("v1", "reports/b.xlsx", 7, None), "Топ товаров") is not None
+        
+        assert cache.lookup(("v2", "reports/b.xlsx", 7, None), "Топ товаров") is None
+        assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 2
+
+class TestMetadataCache:
+    """Test the file metadata cache keyed on path and GCS generation"""
+    
+    def test_concurrent_requests_share_one_fetch(self):
+        """Test single-flight loading, caching and invalidation on re-upload"""
+        import asyncio
+        from agents.logic_understanding_agent.metadata_cache import MetadataCache
+        
+        cache = MetadataCache(max_entries=10)
+        fetches = []
+        
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return {"sheets_count": 3, "generation": len(fetches)}
+        
+        async def scenario():
+            first = await asyncio.gather(*[cache.get("reports/a.xlsx", 1, fetch) for _ in range(5)])
+            again = await cache.get("reports/a.xlsx", 1, fetch)
+            reuploaded = await cache.get("reports/a.xlsx", 2, fetch)
+            return first, again, reuploaded
+        
+        first, again, reuploaded = asyncio.run(scenario())
+        
+        assert len(fetches) == 2
+        assert all(result == {"sheets_count": 3, "generation": 1} for result in first + [again])
+        assert reuploaded["generation"] == 2
+        stats = cache.stats()
+        assert (stats["misses"], stats["joined_in_flight"], stats["hits"]) == (2, 4, 1)
+        assert stats["entries"] == 1 and stats["invalidations"] == 1
+    
+    def test_put_seeds_cache_for_later_gets(self):
+        """Test that metadata from a file overview serves the next turn"""
+        import asyncio
+        from agents.logic_understanding_agent.metadata_cache import MetadataCache
+        
+        cache = MetadataCache(max_entries=10)
+        cache.put("reports/a.xlsx", 1, {"sheets_count": 2})
+        
+        async def fetch():
+            raise AssertionError("metadata was cached")
+        
+        assert cache.peek("reports/a.xlsx", 1) == {"sheets_count": 2}
+        assert asyncio.run(cache.get("reports/a.xlsx", 1, fetch)) == {"sheets_count": 2}
+        assert cache.peek("reports/a.xlsx", 2) is None
+    
+    def test_concurrent_overviews_share_one_fetch(self):
+        """Test first questions about a new file start one overview scan"""
+        import asyncio
+        from agents.logic_understanding_agent.metadata_cache import MetadataCache
+        
+        cache = MetadataCache(max_entries=10)
+        fetches = []
+        
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return {"generation": 3, "metadata": {"sheets_count": 2}, "profile": None, "preview": None}
+        
+        async def scenario():
+            return await asyncio.gather(*[cache.get_overview("reports/a.xlsx", None, fetch)
+                                          for _ in range(5)])
+        
+        overviews = asyncio.run(scenario())
+        
+        assert len(fetches) == 1
+        assert all(overview["generation"] == 3 for overview in overviews)
+        assert cache.generation("reports/a.xlsx") == 3
+        assert cache.peek("reports/a.xlsx", 3) == {"sheets_count": 2}
+        assert cache.stats()["joined_in_flight"] == 4 and cache.stats()["in_flight"] == 0
+    
+    def test_errors_are_not_cached(self):
+        """Test that a failed fetch is retried on the next request"""
+        import asyncio
+        from agents.logic_understanding_agent.metadata_cache import MetadataCache
+        
+        cache = MetadataCache(max_entries=10)
+        results = iter([{"error": "Client error: 503"}, {"sheets_count": 1}])
+        
+        async def fetch():
+            return next(results)
+        
+        assert "error" in asyncio.run(cache.get("reports/a.xlsx", 1, fetch))
+        assert asyncio.run(cache.get("reports/a.xlsx", 1, fetch)) == {"sheets_count": 1}
+        assert cache.stats()["entries"] == 1
+
 class TestAPI:
     """Test API endpoints"""
     
@@ -159,6 +321,30 @@ class TestAPI:
         assert "tools" in data
         assert "google_search" in data["tools"]
     
+    @pytest.mark.parametrize("user_id", [None, "seller-42"])
+    def test_upload_complete_queues_ingest(self, user_id):
+        """Test upload completion with and without user_id starts the background ingest"""
+        from unittest.mock import AsyncMock
+        from agents.logic_understanding_agent.main import app
+        from fastapi.testclient import TestClient
+        
+        client = TestClient(app)
+        mock_bucket = MagicMock()
+        mock_bucket.blob.return_value.size = 2048
+        payload = {"file_id": "f-1", "file_path": "reports/oct.xlsx"}
+        if user_id:
+            payload["user_id"] = user_id
+        
+        with patch('agents.logic_understanding_agent.main.storage_client', MagicMock()), \
+             patch('agents.logic_understanding_agent.main.storage_bucket', mock_bucket), \
+             patch('agents.logic_understanding_agent.main.trigger_file_normalization', new_callable=AsyncMock), \
+             patch('agents.logic_understanding_agent.main.trigger_file_profile', new_callable=AsyncMock) as mock_profile:
+            response = client.post("/upload/complete", json=payload)
+        
+        assert response.status_code == 200
+        assert response.json()["profiling"] == "started"
+        mock_profile.assert_awaited_once_with("reports/oct.xlsx", user_id)
+    
     async def test_chat_endpoint_mock(self):
         """Test chat endpoint with mocked Gemini"""
         from agents.logic_understanding_agent.main import app
@@ -92,6 +92,948 @@ class TestDataframeConversion:
         assert result["summary"]["total_rows"] == 3
 
 
+class TestWorkbookScanner:
+    """Test single-pass workbook scanning for /analyze/metadata"""
+    
+    def test_scan_workbook_matches_pandas(self):
+        """Test row counts and columns match a full pandas parse"""
+        from agents.report_reader_agent.workbook_scanner import scan_workbook
+        
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer) as writer:
+            pd.DataFrame({"A": range(50), "B": ["x"] * 50}).to_excel(writer, sheet_name="Big", index=False)
+            pd.DataFrame({"C": [1, None, 3]}).to_excel(writer, sheet_name="Small", index=False)
+        file_bytes = buffer.getvalue()
+        
+        scans = scan_workbook(file_bytes, sample_rows=3)
+        
+        assert [scan["name"] for scan in scans] == ["Big", "Small"]
+        for scan in scans:
+            full = pd.read_excel(io.BytesIO(file_bytes), sheet_name=scan["name"])
+            assert scan["rows"] == len(full)
+            assert scan["columns"] == [str(col) for col in full.columns]
+            assert len(scan["sample"]) <= 3
+    
+    def test_build_column_names_like_pandas(self):
+        """Test unnamed and duplicate header handling"""
+        from agents.report_reader_agent.workbook_scanner import build_column_names
+        
+        names = build_column_names(["A", None, "A"], 4)
+        
+        assert names == ["A", "Unnamed: 1", "A.1", "Unnamed: 3"]
+
+
+class TestParseCache:
+    """Test the parsed workbook cache"""
+    
+    def test_hit_and_miss_counters(self, sample_dataframe):
+        """Test lookups update hit/miss counters"""
+        from agents.report_reader_agent.parse_cache import ParsedFrameCache, make_key
+        
+        cache = ParsedFrameCache(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+        key = make_key("bucket", "reports/a.xlsx", 1, "Sheet1", 0)
+        
+        assert cache.get(key) is None
+        cache.put(key, sample_dataframe)
+        assert cache.get(key) is sample_dataframe
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+    
+    def test_lru_eviction_by_size(self):
+        """Test least recently used entries are evicted when over budget"""
+        from agents.report_reader_agent.parse_cache import ParsedFrameCache, make_key
+        
+        cache = ParsedFrameCache(max_bytes=250, ttl_seconds=60)
+        first = make_key("bucket", "a.xlsx", 1, "S1", 0)
+        second = make_key("bucket", "a.xlsx", 1, "S2", 0)
+        third = make_key("bucket", "a.xlsx", 1, "S3", 0)
+        
+        cache.put(first, b"x" * 100)
+        cache.put(second, b"x" * 100)
+        cache.get(first)  # first becomes most recently used
+        cache.put(third, b"x" * 100)
+        
+        assert cache.get(second) is None
+        assert cache.get(first) is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_nested_values_sized_deeply(self):
+        """Test that metadata and profile dicts count their contents against the bound"""
+        from agents.report_reader_agent.main import FileMetadata, SheetMetadata
+        from agents.report_reader_agent.parse_cache import estimate_size
+        
+        profile = {"sheets": [{"name": f"Лист{i}", "columns": {f"c{j}": {"top_values": [f"{i}-{j}-{k}" * 30 for k in range(10)]}
+                                                                   for j in range(20)}}
+                              for i in range(5)]}
+        sheet = SheetMetadata(name="Продажи", rows=10, columns=[f"Товар {i}" for i in range(200)],
+                              sample_data=[{"Товар": str(i) * 500} for i in range(3)], data_types={})
+        metadata = FileMetadata(sheets_count=1, sheet_names=["Продажи"], file_size_bytes=1,
+                                file_path="a.xlsx", top_sheets_summary=[sheet])
+        
+        assert estimate_size(profile) > 100 * 1000
+        assert estimate_size(metadata) > 2000
+    
+    def test_new_generation_misses(self, sample_dataframe):
+        """Test a re-upload (new generation) does not hit the old entry"""
+        from agents.report_reader_agent.parse_cache import ParsedFrameCache, make_key
+        
+        cache = ParsedFrameCache(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+        cache.put(make_key("bucket", "a.xlsx", 1, "S1", 0), sample_dataframe)
+        
+        assert cache.get(make_key("bucket", "a.xlsx", 2, "S1", 0)) is None
+    
+    def test_ttl_expiration(self, sample_dataframe):
+        """Test entries older than TTL are dropped"""
+        from agents.report_reader_agent.parse_cache import ParsedFrameCache, make_key
+        
+        cache = ParsedFrameCache(max_bytes=10 * 1024 * 1024, ttl_seconds=0)
+        key = make_key("bucket", "a.xlsx", 1, "S1", 0)
+        cache.put(key, sample_dataframe)
+        
+        with patch("agents.report_reader_agent.parse_cache.time.monotonic",
+                   side_effect=lambda: float("inf")):
+            assert cache.get(key) is None
+        assert cache.stats()["expirations"] == 1
+
+
+class TestSidecarStore:
+    """Test Parquet sidecars with the local filesystem backend"""
+    
+    def test_sidecar_roundtrip_with_projection(self, tmp_path, sample_dataframe):
+        """Test writing a sidecar and reading selected columns back"""
+        from agents.report_reader_agent.sidecar_store import (
+            LocalSidecarBackend, write_sidecar, read_sidecar
+        )
+        
+        backend = LocalSidecarBackend(str(tmp_path))
+        write_sidecar(backend, "bucket", "reports/a.xlsx", 7, "Продажи", 0, sample_dataframe)
+        
+        df = read_sidecar(backend, "bucket", "reports/a.xlsx", 7, "Продажи", 0,
+                          columns=["Revenue"], filters=[("Revenue", ">", 120000)])
+        
+        assert df.columns.tolist() == ["Revenue"]
+        assert df["Revenue"].tolist() == [150000, 180000]
+    
+    def test_missing_sidecar_returns_none(self, tmp_path):
+        """Test another generation has no sidecar"""
+        from agents.report_reader_agent.sidecar_store import LocalSidecarBackend, read_sidecar
+        
+        backend = LocalSidecarBackend(str(tmp_path))
+        
+        assert read_sidecar(backend, "bucket", "reports/a.xlsx", 8, "Sheet1") is None
+    
+    def test_object_columns_keep_value_types(self, tmp_path):
+        """Test numbers and times in object columns read back unchanged"""
+        import datetime
+        from agents.report_reader_agent.sidecar_store import (
+            LocalSidecarBackend, write_sidecar, read_sidecar
+        )
+        
+        backend = LocalSidecarBackend(str(tmp_path))
+        df = pd.DataFrame({
+            "Количество": pd.Series([100, None, 3], dtype=object),
+            "Время": pd.Series([datetime.time(9, 30), None, datetime.time(18, 0)], dtype=object),
+        })
+        write_sidecar(backend, "bucket", "a.xlsx", 1, 0, 0, df)
+        
+        result = read_sidecar(backend, "bucket", "a.xlsx", 1, 0, 0)
+        assert result["Количество"].dtype == object
+        assert result["Количество"].tolist()[0] == 100 and type(result["Количество"][0]) is int
+        assert pd.isna(result["Количество"][1]) and result["Количество"][2] == 3
+        assert result["Время"].tolist()[::2] == [datetime.time(9, 30), datetime.time(18, 0)]
+    
+    def test_mixed_column_skips_sidecar(self, tmp_path):
+        """Test a sheet mixing numbers and text in a column gets no sidecar"""
+        from agents.report_reader_agent.sidecar_store import (
+            LocalSidecarBackend, write_sidecar, read_sidecar, to_arrow_table
+        )
+        
+        backend = LocalSidecarBackend(str(tmp_path))
+        df = pd.DataFrame({"Mixed": [1, "два", None]})
+        
+        assert write_sidecar(backend, "bucket", "a.xlsx", 1, 0, 0, df) is None
+        assert read_sidecar(backend, "bucket", "a.xlsx", 1, 0, 0) is None
+        # Responses still get the column, as text
+        assert to_arrow_table(df).column("Mixed").to_pylist()[:2] == ["1", "два"]
+
+
+class TestRowStream:
+    """Test cursor-paginated row streaming"""
+    
+    def test_cursor_roundtrip(self):
+        """Test cursor tokens decode to the encoded position"""
+        from agents.report_reader_agent.row_stream import encode_cursor, decode_cursor
+        
+        position = {"file_path": "reports/a.xlsx", "bucket": "reports", "sheet_name": "Продажи",
+                    "header_row": 0, "columns": None, "offset": 500, "limit": 100,
+                    "format": "ndjson", "generation": 7}
+        token = encode_cursor(position)
+        
+        assert decode_cursor(token) == position
+        assert encode_cursor(position) == token
+    
+    def test_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        from agents.report_reader_agent.row_stream import encode_cursor, decode_cursor, CursorError
+        
+        with pytest.raises(CursorError):
+            decode_cursor("not-a-cursor")
+        with pytest.raises(CursorError, match="missing bucket"):
+            decode_cursor(encode_cursor({"file_path": "reports/a.xlsx", "offset": 500}))
+    
+    @pytest.mark.parametrize("change", [
+        {"limit": None},
+        {"offset": "500"},
+        {"offset": True},
+        {"header_row": 1.5},
+        {"sheet_name": None},
+        {"columns": "A"},
+        {"columns": ["A", 1]},
+        {"generation": "7"},
+        {"format": ["arrow"]},
+    ])
+    def test_cursor_field_types_validated(self, change):
+        """Test missing or mistyped cursor fields raise CursorError"""
+        from agents.report_reader_agent.row_stream import encode_cursor, decode_cursor, CursorError
+        
+        position = {"file_path": "reports/a.xlsx", "bucket": "reports", "sheet_name": 0,
+                    "header_row": 0, "offset": 0, "limit": 10, "format": "arrow"}
+        position.update(change)
+        
+        with pytest.raises(CursorError):
+            decode_cursor(encode_cursor(position))
+    
+    def test_empty_arrow_page_has_schema(self, sample_dataframe):
+        """Test a page past the last row is a valid Arrow stream with zero batches"""
+        import pyarrow as pa
+        from agents.report_reader_agent.row_stream import (
+            arrow_stream, frame_record_batches, frame_schema
+        )
+        
+        body = b"".join(arrow_stream(frame_record_batches(sample_dataframe, 100, 10, 5),
+                                     frame_schema(sample_dataframe)))
+        table = pa.ipc.open_stream(body).read_all()
+        
+        assert table.num_rows == 0
+        assert table.schema.names == [str(col) for col in sample_dataframe.columns]
+    
+    def test_sidecar_batches_skip_row_groups(self, tmp_path):
+        """Test a page spanning row groups is read from the right offset"""
+        from agents.report_reader_agent import sidecar_store
+        from agents.report_reader_agent.row_stream import open_sidecar_batches
+        
+        backend = sidecar_store.LocalSidecarBackend(str(tmp_path))
+        df = pd.DataFrame({"A": range(100), "B": ["x"] * 100})
+        with patch.object(sidecar_store, "ROW_GROUP_SIZE", 30):
+            sidecar_store.write_sidecar(backend, "bucket", "a.xlsx", 1, "S", 0, df)
+        
+        total_rows, schema, batches = open_sidecar_batches(
+            backend, "bucket", "a.xlsx", 1, "S", 0, ["A"], offset=45, limit=20, batch_size=8
+        )
+        rows = [value for batch in batches for value in batch.column(0).to_pylist()]
+        
+        assert total_rows == 100
+        assert schema.names == ["A"]
+        assert rows == list(range(45, 65))
+    
+    def test_ndjson_from_sidecar_keeps_ints(self, tmp_path):
+        """Test an int column with gaps streams from the sidecar as ints"""
+        from agents.report_reader_agent import sidecar_store
+        from agents.report_reader_agent.row_stream import open_sidecar_batches, ndjson_stream
+        
+        backend = sidecar_store.LocalSidecarBackend(str(tmp_path))
+        df = pd.DataFrame({"Остаток": pd.Series([100, None], dtype=object)})
+        sidecar_store.write_sidecar(backend, "bucket", "a.xlsx", 1, "S", 0, df)
+        
+        _, _, batches = open_sidecar_batches(backend, "bucket", "a.xlsx", 1, "S", 0, None,
+                                             offset=0, limit=10, batch_size=10)
+        
+        assert b"".join(ndjson_stream(batches)).decode("utf-8").splitlines() == [
+            '{"Остаток":100}', '{"Остаток":null}'
+        ]
+    
+    def test_ndjson_stream(self, sample_dataframe):
+        """Test NDJSON output has one JSON object per row"""
+        from agents.report_reader_agent.row_stream import frame_batches, ndjson_stream
+        
+        body = b"".join(ndjson_stream(frame_batches(sample_dataframe, 1, 10, 1)))
+        lines = body.decode("utf-8").splitlines()
+        
+        assert len(lines) == 2
+        assert '"Revenue":150000' in lines[0]
+
+
+class TestQueryEngine:
+    """Test server-side query execution"""
+    
+    @pytest.fixture
+    def sales_dataframe(self):
+        return pd.DataFrame({
+            "Дата": ["05.01.2024", "20.01.2024", "03.02.2024", "15.02.2024"],
+            "Категория": ["Одежда", "Обувь", "Одежда", "Одежда"],
+            "Выручка": [100, 200, 300, 400]
+        })
+    
+    def test_group_by_month_and_category(self, sales_dataframe):
+        """Test revenue by category per month"""
+        from agents.report_reader_agent.query_engine import run_query
+        
+        result = run_query(sales_dataframe, {
+            "date_bucket": {"column": "Дата", "freq": "month", "alias": "Месяц"},
+            "group_by": ["Категория", "Месяц"],
+            "aggregations": [{"column": "Выручка", "func": "sum", "alias": "revenue"}],
+            "sort": [{"column": "revenue", "descending": True}],
+            "limit": 2
+        })
+        
+        assert result.to_dict(orient="records") == [
+            {"Категория": "Одежда", "Месяц": "2024-02", "revenue": 700},
+            {"Категория": "Обувь", "Месяц": "2024-01", "revenue": 200},
+        ]
+    
+    def test_filter_and_total(self, sales_dataframe):
+        """Test filters and aggregation without group-by"""
+        from agents.report_reader_agent.query_engine import run_query
+        
+        result = run_query(sales_dataframe, {
+            "filters": [{"column": "Выручка", "op": ">=", "value": 200}],
+            "aggregations": [{"column": "Выручка", "func": "sum", "alias": "total"},
+                             {"func": "size", "alias": "n"}]
+        })
+        
+        assert result.iloc[0]["total"] == 900
+        assert result.iloc[0]["n"] == 3
+    
+    def test_unknown_column(self, sales_dataframe):
+        """Test unknown columns raise QueryError"""
+        from agents.report_reader_agent.query_engine import run_query, QueryError
+        
+        with pytest.raises(QueryError):
+            run_query(sales_dataframe, {"group_by": ["Регион"]})
+
+
+class TestTypeInference:
+    """Test vectorized column type inference"""
+    
+    def test_russian_locale_numbers(self):
+        """Test numbers with space thousands, decimal comma and currency"""
+        from agents.report_reader_agent.type_inference import parse_numbers
+        
+        values = pd.Series(["1 234,56 ₽", "2\xa0000,00 руб.", "−15,5", "1,234.5", None])
+        result = parse_numbers(values)
+        
+        assert result.iloc[:4].tolist() == [1234.56, 2000.0, -15.5, 1234.5]
+        assert pd.isna(result.iloc[4])
+    
+    def test_infer_and_apply_schema(self):
+        """Test int, float, day-first dates and categories"""
+        from agents.report_reader_agent.type_inference import infer_schema, apply_schema
+        
+        df = pd.DataFrame({
+            "Количество": ["1", "2", "3"] * 40,
+            "Выручка": ["1 000,50", "200", "3,5"] * 40,
+            "Дата": ["05.01.2024", "20.01.2024", "03.02.2024"] * 40,
+            "Категория": ["Одежда", "Обувь", "Сумки"] * 40
+        })
+        
+        schema = infer_schema(df)
+        assert schema == {
+            "Количество": "int", "Выручка": "float",
+            "Дата": "datetime", "Категория": "category"
+        }
+        
+        result = apply_schema(df, schema)
+        assert result["Количество"].dtype == "int64"
+        assert result["Выручка"].iloc[0] == 1000.5
+        assert result["Дата"].iloc[1] == pd.Timestamp("2024-01-20")
+        assert isinstance(result["Категория"].dtype, pd.CategoricalDtype)
+    
+    def test_decimals_outside_sample_stay_float(self):
+        """Test that an int inferred from the sample never truncates other rows"""
+        from agents.report_reader_agent.type_inference import infer_schema, apply_schema
+        
+        values = ["100"] * 5000
+        values[7], values[4001] = "99,5", "1 234,75"
+        df = pd.DataFrame({"Сумма": values})
+        
+        schema = infer_schema(df, sample_size=100)
+        result = apply_schema(df, schema)
+        
+        assert schema == {"Сумма": "float"}
+        assert result["Сумма"].dtype == "float64"
+        assert result["Сумма"].iloc[[7, 4001]].tolist() == [99.5, 1234.75]
+    
+    def test_mixed_column_kept_as_text(self):
+        """Test that a conversion losing values is rolled back"""
+        from agents.report_reader_agent.type_inference import convert_column
+        
+        values = pd.Series(["10", "20", "нет данных"])
+        result = convert_column(values, "float")
+        
+        assert result.tolist() == ["10", "20", "нет данных"]
+
+
+class TestFrameCompaction:
+    """Test compact in-memory representation of sheets"""
+    
+    def test_compact_dataframe(self):
+        """Test category conversion, downcasting and memory report"""
+        from agents.report_reader_agent.frame_compaction import compact_dataframe
+        
+        df = pd.DataFrame({
+            "Статус": ["Продажа", "Возврат"] * 100,
+            "Количество": list(range(200)),
+            "Выручка": [100.5] * 200
+        })
+        
+        result = compact_dataframe(df)
+        
+        assert isinstance(result["Статус"].dtype, pd.CategoricalDtype)
+        assert result["Количество"].dtype == "int16"
+        assert result["Выручка"].dtype == "float64"
+        assert result.astype(object).equals(df.astype(object))
+        
+        report = result.attrs["memory_compaction"]
+        assert report["after_bytes"] < report["before_bytes"]
+    
+    def test_intern_strings(self):
+        """Test that equal strings share one object"""
+        from agents.report_reader_agent.frame_compaction import intern_strings
+        
+        values = pd.Series(["".join(["Мос", "ква"]), None, "".join(["Моск", "ва"])])
+        result = intern_strings(values)
+        
+        assert result.iloc[0] is result.iloc[2]
+        assert result.iloc[1] is None
+
+
+class TestParseExecutor:
+    """Test the bounded parse executor"""
+    
+    def test_map_keeps_order_and_reports_stats(self):
+        """Test results order and latency stats (inline mode)"""
+        from agents.report_reader_agent.parse_executor import ParseExecutor
+        
+        executor = ParseExecutor(max_workers=0, max_queue=2)
+        results = executor.map(pow, [(2, 3), (3, 2), (10, 0)])
+        
+        assert results == [8, 9, 1]
+        stats = executor.stats()
+        assert stats["completed"] == 3
+        assert stats["in_flight"] == 0
+        assert stats["queue_depth"] == 0
+    
+    def test_map_larger_than_slots(self):
+        """Test that maps with more tasks than slots, also concurrent ones, finish"""
+        import threading
+        from agents.report_reader_agent.parse_executor import ParseExecutor
+        
+        executor = ParseExecutor(max_workers=0, max_queue=1)  # 2 slots
+        results = {}
+        
+        def run_map(name, base):
+            results[name] = executor.map(pow, [(base, i) for i in range(6)])
+        
+        threads = [threading.Thread(target=run_map, args=(name, base), daemon=True)
+                   for name, base in (("twos", 2), ("threes", 3))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        assert results == {"twos": [1, 2, 4, 8, 16, 32], "threes": [1, 3, 9, 27, 81, 243]}
+        assert executor.stats()["in_flight"] == 0
+    
+    def test_failed_task_releases_slot(self):
+        """Test that a failing parse does not leak queue slots"""
+        from agents.report_reader_agent.parse_executor import ParseExecutor
+        
+        executor = ParseExecutor(max_workers=0, max_queue=0)
+        with pytest.raises(ZeroDivisionError):
+            executor.run(divmod, 1, 0)
+        
+        assert executor.run(divmod, 7, 2) == (3, 1)
+        assert executor.stats()["failed"] == 1
+    
+    def test_parse_sheet(self):
+        """Test parsing one sheet from raw bytes"""
+        from agents.report_reader_agent.parse_executor import parse_sheet, list_sheet_names
+        
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer) as writer:
+            pd.DataFrame({"A": [1]}).to_excel(writer, sheet_name="Первый", index=False)
+            pd.DataFrame({"B": [2, 3]}).to_excel(writer, sheet_name="Второй", index=False)
+        file_bytes = buffer.getvalue()
+        
+        assert list_sheet_names(file_bytes) == ["Первый", "Второй"]
+        assert len(parse_sheet("report.xlsx", file_bytes, "Второй")) == 2
+
+
+class TestStorageIO:
+    """Test blob metadata reuse and the local download spool"""
+    
+    @pytest.fixture
+    def storage_client(self):
+        def make_blob(name, generation=None):
+            blob = MagicMock()
+            blob.download_to_file.side_effect = lambda f: f.write(name.encode() * 10)
+            return blob
+        
+        client = MagicMock()
+        client.bucket.return_value.blob.side_effect = make_blob
+        return client
+    
+    def test_get_blob_info(self):
+        """Test generation and size come from one metadata request"""
+        from agents.report_reader_agent.storage_io import get_blob_info
+        
+        client = MagicMock()
+        client.bucket.return_value.get_blob.return_value = Mock(generation=7, size=1024)
+        assert get_blob_info(client, "bucket", "a.xlsx") == (7, 1024)
+        
+        client.bucket.return_value.get_blob.return_value = None
+        assert get_blob_info(client, "bucket", "missing.xlsx") is None
+    
+    def test_spool_reuses_local_copy(self, storage_client, tmp_path):
+        """Test a large file is downloaded to disk once per generation"""
+        from agents.report_reader_agent.storage_io import DownloadSpool
+        
+        spool = DownloadSpool(str(tmp_path), max_bytes=1024)
+        with spool.pinned(storage_client, "bucket", "reports/a.xlsx", 1) as path:
+            assert path.endswith(".xlsx")
+            assert open(path, "rb").read() == b"reports/a.xlsx" * 10
+        
+        with spool.pinned(storage_client, "bucket", "reports/a.xlsx", 1) as again:
+            assert again == path
+        assert spool.stats()["downloads"] == 1
+        assert spool.stats()["hits"] == 1
+    
+    def test_spool_evicts_oldest(self, storage_client, tmp_path):
+        """Test the spool stays within its disk budget"""
+        from agents.report_reader_agent.storage_io import DownloadSpool
+        import os
+        
+        spool = DownloadSpool(str(tmp_path), max_bytes=250)
+        with spool.pinned(storage_client, "bucket", "reports/first.xlsx", 1) as first:
+            pass
+        with spool.pinned(storage_client, "bucket", "reports/second.xlsx", 1) as second:
+            pass
+        
+        assert not os.path.exists(first)
+        assert os.path.exists(second)
+        assert spool.stats()["evictions"] == 1
+    
+    def test_spool_keeps_pinned_copies(self, storage_client, tmp_path):
+        """Test a copy in use is not evicted until it is released"""
+        from agents.report_reader_agent.storage_io import DownloadSpool
+        import os
+        
+        spool = DownloadSpool(str(tmp_path), max_bytes=250)
+        with spool.pinned(storage_client, "bucket", "reports/first.xlsx", 1) as first:
+            with spool.pinned(storage_client, "bucket", "reports/second.xlsx", 1) as second:
+                with spool.pinned(storage_client, "bucket", "reports/third.xlsx", 1):
+                    assert os.path.exists(first) and os.path.exists(second)
+                    assert spool.stats()["evictions"] == 0
+                    assert spool.stats()["pinned"] == 3
+            assert os.path.exists(first)
+            assert not os.path.exists(second)
+        
+        assert not os.path.exists(first)
+        assert spool.stats()["evictions"] == 2
+        assert spool.stats()["pinned"] == 0
+
+
+class TestCsvStream:
+    """Test single-pass CSV statistics"""
+    
+    def test_hyperloglog_estimate_and_merge(self):
+        """Test approximate distinct counts of merged sketches"""
+        from agents.report_reader_agent.sketches import HyperLogLog
+        
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(pd.Series([f"SKU-{i}" for i in range(5000)]))
+        second.update(pd.Series([f"SKU-{i}" for i in range(2500, 7500)]))
+        first.merge(second)
+        
+        assert abs(first.estimate() - 7500) < 7500 * 0.05
+    
+    def test_heavy_hitter_sketches_merge_and_serialize(self):
+        """Test Space-Saving and Count-Min across chunks, merged and restored"""
+        import json
+        from agents.report_reader_agent.sketches import CountMinSketch, SpaceSaving, hash_values
+        
+        values = pd.Series([f"SKU-{i % 10}" if i % 2 else f"ID-{i}" for i in range(20000)])
+        first, second = SpaceSaving(capacity=16), SpaceSaving(capacity=16)
+        counts = CountMinSketch()
+        for chunk in (values[:7000], values[7000:14000], values[14000:]):
+            (first if len(chunk) == 7000 else second).update(chunk)
+            counts.update(chunk)
+        first.merge(second)
+        restored = SpaceSaving.from_dict(json.loads(json.dumps(first.to_dict())))
+        
+        top = restored.top(5)
+        assert {item["value"] for item in top} == {"SKU-1", "SKU-3", "SKU-5", "SKU-7", "SKU-9"}
+        assert all(item["count"] - item["error"] <= 2000 <= item["count"] for item in top)
+        estimates = CountMinSketch.from_dict(counts.to_dict()).estimate_hashes(
+            hash_values(pd.Series(["SKU-1", "ID-0"])))
+        assert estimates[0] >= 2000 and estimates[1] >= 1
+    
+    def test_summarize_chunks(self):
+        """Test running stats across chunks of a CSV file"""
+        from agents.report_reader_agent.csv_stream import summarize_chunks
+        
+        csv = "Товар,Сумма\n" + "".join(f"SKU-{i % 3},{i}\n" for i in range(1000))
+        chunks = pd.read_csv(io.StringIO(csv), chunksize=300)
+        
+        summary = summarize_chunks(chunks, preview_rows=10)
+        
+        assert summary["rows"] == 1000
+        assert len(summary["preview"]) == 10
+        amount = summary["columns"]["Сумма"]
+        assert amount["sum"] == sum(range(1000))
+        assert amount["min"] == 0 and amount["max"] == 999
+        assert summary["columns"]["Товар"]["type"] == "text"
+        assert summary["columns"]["Товар"]["distinct_approx"] == 3
+
+
+class TestSheetsClient:
+    """Test the shared Sheets client and its revision cache"""
+    
+    @pytest.fixture
+    def sheets_client(self):
+        from agents.report_reader_agent.sheets_client import SheetsClient
+        from agents.report_reader_agent.parse_cache import ParsedFrameCache
+        
+        client = SheetsClient("/nonexistent.json", ParsedFrameCache(10 * 1024 * 1024, 60))
+        client._sheets = MagicMock()
+        client._drive = MagicMock()
+        client.http = lambda: None
+        
+        def batch_get(spreadsheetId, ranges):
+            request = Mock()
+            request.execute.return_value = {"valueRanges": [
+                {"range": r, "values": [["Товар", "Сумма"], ["A", "10"]]} for r in ranges
+            ]}
+            return request
+        
+        client._sheets.spreadsheets.return_value.values.return_value.batchGet.side_effect = batch_get
+        client._drive.files.return_value.get.return_value.execute.return_value = {"version": "12"}
+        return client
+    
+    def test_batch_get_one_call(self, sheets_client):
+        """Test several ranges are fetched with one batchGet"""
+        result = sheets_client.batch_get("sheet-1", ["Продажи!A1:B2", "Возвраты!A1:B2"])
+        
+        assert list(result) == ["Продажи!A1:B2", "Возвраты!A1:B2"]
+        assert sheets_client.api_calls == 1
+    
+    def test_unchanged_revision_served_from_cache(self, sheets_client):
+        """Test re-reads of an unchanged spreadsheet make no values call"""
+        sheets_client.get_values("sheet-1", "A1:B2")
+        sheets_client.get_values("sheet-1", "A1:B2")
+        assert sheets_client.api_calls == 1
+        
+        # A new Drive version invalidates the cached values
+        sheets_client._revisions.clear()
+        sheets_client._drive.files.return_value.get.return_value.execute.return_value = {"version": "13"}
+        sheets_client.get_values("sheet-1", "A1:B2")
+        assert sheets_client.api_calls == 2
+    
+    def test_read_sheet_in_parallel_pages(self, sheets_client):
+        """Test a sheet is sized by gridProperties and read page by page"""
+        import re
+        
+        rows = [["Дата", "Сумма"]] + [[f"d{i}", str(i)] for i in range(1, 25)]
+        rows[9:12] = [[], [], []]  # Empty rows at the end of the first page
+        
+        def batch_get(spreadsheetId, ranges):
+            value_ranges = []
+            for r in ranges:
+                start, end = map(int, re.search(r"!A(\d+):B(\d+)$", r).groups())
+                page = rows[start - 1:end]
+                while page and not page[-1]:
+                    page = page[:-1]  # The API drops trailing empty rows
+                value_ranges.append({"range": r, "values": page})
+            request = Mock()
+            request.execute.return_value = {"valueRanges": value_ranges}
+            return request
+        
+        sheets_client.page_rows = 12
+        sheets_client._sheets.spreadsheets.return_value.values.return_value.batchGet.side_effect = batch_get
+        sheets_client._sheets.spreadsheets.return_value.get.return_value.execute.return_value = {
+            "sheets": [{"properties": {
+                "title": "Продажи", "gridProperties": {"rowCount": 40, "columnCount": 2}
+            }}]
+        }
+        
+        values = sheets_client.read_sheet("sheet-1")
+        
+        assert len(values) == 25
+        assert values[24] == ["d24", "24"]
+        assert values[9] == []
+    
+    def test_values_to_dataframe_pads_short_rows(self):
+        """Test rows with omitted trailing cells"""
+        from agents.report_reader_agent.main import values_to_dataframe
+        
+        df = values_to_dataframe([["Товар", "Сумма"], ["A", "10"], ["B"]])
+        
+        assert df.shape == (2, 2)
+        assert df["Сумма"].tolist() == ["10", None]
+
+
+class TestTableDetection:
+    """Test header-row and table-region detection"""
+    
+    def test_title_block_and_side_table(self):
+        """Test that title rows are skipped and side-by-side tables are split"""
+        from agents.report_reader_agent.table_detection import detect_tables
+        
+        rows = [
+            ("Отчет о продажах за январь 2024",),
+            ("Поставщик: ООО Ромашка",),
+            (),
+            (None, "Дата", "Артикул", "Сумма, ₽", None, "Склад", "Остаток"),
+        ]
+        for i in range(20):
+            side = ("Коледино", i) if i < 3 else ()
+            rows.append((None, f"{i + 1:02d}.01.2024", f"SKU-{i % 4}", "1 299,50") + (None,) + side)
+        
+        tables = detect_tables(rows)
+        
+        assert [t["range"] for t in tables] == ["B4:D24", "F4:G7"]
+        assert tables[0]["header_row"] == 3
+        assert tables[0]["columns"] == ["Дата", "Артикул", "Сумма, ₽"]
+        assert tables[1]["rows"] == 3
+    
+    def test_gap_rows_and_scan_window(self):
+        """Test that data after an empty row continues the table to the sheet end"""
+        from agents.report_reader_agent.table_detection import detect_tables, parse_range
+        
+        rows = [("Товар", "Кол-во")] + [(f"SKU-{i}", i) for i in range(5)] + [()]
+        rows += [(f"SKU-{i}", i) for i in range(5, 10)]
+        
+        tables = detect_tables(rows, sheet_last_row=5000)
+        
+        assert [t["range"] for t in tables] == ["A1:B5000"]
+        assert parse_range("AA10:AB20") == (10, 20, 26, 27)
+
+
+class TestProfiling:
+    """Test ingestion-time column profiles"""
+    
+    def test_profile_dataframe(self):
+        """Test numeric stats, date range and top values of a messy sheet"""
+        from agents.report_reader_agent.profiling import profile_dataframe
+        
+        df = pd.DataFrame({
+            "Дата": ["01.03.2024", "15.03.2024", "31.03.2024", None] * 50,
+            "Артикул": ["SKU-1", "SKU-2", "SKU-1", "SKU-3"] * 50,
+            "Сумма": ["1 200,50 ₽", "300", "99,50", "400"] * 50,
+        })
+        
+        profile = profile_dataframe(df, top_k=2)
+        columns = profile["columns"]
+        
+        assert profile["rows"] == 200
+        assert columns["Дата"]["null_ratio"] == 0.25
+        assert columns["Дата"]["date_range"]["days"] == 31
+        assert columns["Сумма"]["min"] == 99.5 and columns["Сумма"]["max"] == 1200.5
+        assert columns["Сумма"]["sum"] == 50 * 2000.0
+        assert columns["Артикул"]["top_values"] == [
+            {"value": "SKU-1", "count": 100},
+            {"value": "SKU-2", "count": 50},
+        ]
+    
+    def test_merge_sheet_profiles(self):
+        """Test file-wide profiles of columns shared by several sheets"""
+        from agents.report_reader_agent.profiling import merge_sheet_profiles, profile_chunks
+        
+        january = pd.DataFrame({"ID транзакции": [f"T{i}" for i in range(3000)],
+                                "Артикул": ["SKU-1", "SKU-2", "SKU-1"] * 1000})
+        february = pd.DataFrame({"ID транзакции": [f"T{i}" for i in range(3000, 5000)],
+                                 "Артикул": ["SKU-2", "SKU-3"] * 1000})
+        
+        combined = merge_sheet_profiles([
+            profile_chunks([january[:1000], january[1000:]]),
+            profile_chunks([february]),
+        ])
+        
+        assert combined["ID транзакции"]["sheets"] == 2
+        assert abs(combined["ID транзакции"]["distinct"] - 5000) < 250
+        assert combined["ID транзакции"]["top_values"] == []
+        assert combined["Артикул"]["top_values"][0] == {"value": "SKU-1", "count": 2000}
+        assert combined["Артикул"]["distinct"] == 3
+    
+    def test_decimals_in_later_chunk_switch_to_float(self):
+        """Test that a column inferred as int from the first chunk profiles later decimals"""
+        from agents.report_reader_agent.profiling import SheetProfiler
+        
+        profiler = SheetProfiler()
+        profiler.update(pd.DataFrame({"Сумма": ["100", "200"] * 50}))
+        profiler.update(pd.DataFrame({"Сумма": ["1 234,75"]}))
+        
+        column = profiler.to_dict()["columns"]["Сумма"]
+        assert column["type"] == "float"
+        assert column["max"] == 1234.75
+        assert column["sum"] == 16234.75
+    
+    def test_profile_round_trip(self, tmp_path):
+        """Test storing a profile as JSON next to the sidecars"""
+        from agents.report_reader_agent.profiling import (
+            new_profile, profile_path, read_profile, write_profile
+        )
+        from agents.report_reader_agent.sidecar_store import LocalSidecarBackend
+        
+        backend = LocalSidecarBackend(str(tmp_path))
+        profile = new_profile("reports/a.xlsx", 7)
+        
+        assert read_profile(backend, "bucket", "reports/a.xlsx", 7) is None
+        write_profile(backend, "bucket", "reports/a.xlsx", 7, profile)
+        
+        assert read_profile(backend, "bucket", "reports/a.xlsx", 7) == profile
+        assert profile_path("reports/a.xlsx", 7) == "reports/a.xlsx.sidecar/g7/profile.json"
+
+
+class TestIngest:
+    """Test incremental re-ingest of updated reports"""
+    
+    def test_diff_fingerprints(self):
+        """Test append/update/new classification of a re-uploaded sheet"""
+        from agents.report_reader_agent.ingest import diff_fingerprints, row_fingerprints
+        
+        v1 = pd.DataFrame({"Артикул": [f"SKU-{i}" for i in range(100)], "Сумма": range(100)})
+        appended = pd.concat([v1, pd.DataFrame({"Артикул": ["SKU-X"], "Сумма": [7]})],
+                             ignore_index=True)
+        previous = row_fingerprints(v1)
+        
+        # A float column with the same values hashes like the int column
+        assert diff_fingerprints(previous, row_fingerprints(v1.astype({"Сумма": float})))["kind"] == "identical"
+        
+        diff = diff_fingerprints(previous, row_fingerprints(appended))
+        assert diff["kind"] == "append" and list(diff["added"]) == [100]
+        
+        edited = appended.drop(index=[3, 4]).iloc[::-1]
+        diff = diff_fingerprints(previous, row_fingerprints(edited))
+        assert (diff["kind"], diff["removed"], len(diff["added"])) == ("update", 2, 1)
+        
+        other = pd.DataFrame({"Артикул": ["A", "B"], "Сумма": [1, 2]})
+        assert diff_fingerprints(previous, row_fingerprints(other))["kind"] == "new"
+        
+        # Key columns: rows with the same key are the same row
+        keyed = diff_fingerprints(row_fingerprints(v1, ["Артикул"]),
+                                  row_fingerprints(v1.assign(Сумма=0), ["Артикул"]))
+        assert keyed["kind"] == "identical"
+    
+    def test_diff_counts_duplicate_rows(self):
+        """Test a second copy of an existing row counts as added, a dropped copy as removed"""
+        import numpy as np
+        from agents.report_reader_agent.ingest import diff_fingerprints
+        
+        previous = np.array([5, 1, 2, 2, 3, 4], dtype=np.uint64)
+        
+        diff = diff_fingerprints(previous, np.array([1, 2, 2, 3, 4, 5, 2, 1], dtype=np.uint64))
+        assert (diff["kind"], diff["unchanged"], diff["removed"]) == ("update", 6, 0)
+        assert list(diff["added"]) == [6, 7]
+        
+        diff = diff_fingerprints(previous, np.array([4, 3, 2, 1, 5], dtype=np.uint64))
+        assert (diff["unchanged"], diff["removed"], len(diff["added"])) == (5, 1, 0)
+    
+    def test_profile_state_continues_with_appended_rows(self):
+        """Test that a stored profiler state plus the delta equals a full profile"""
+        import json
+        from agents.report_reader_agent.profiling import SheetProfiler, profile_chunks
+        
+        df = pd.DataFrame({
+            "Дата": pd.date_range("2024-03-01", periods=300, freq="D"),
+            "Артикул": ["SKU-1", "SKU-2", "SKU-1"] * 100,
+            "Сумма": [float(i) for i in range(300)],
+        })
+        
+        state = json.loads(json.dumps(profile_chunks([df[:200]]).to_state()))
+        incremental = SheetProfiler.from_state(state)
+        incremental.update(df[200:])
+        result = incremental.to_dict()
+        full = profile_chunks([df]).to_dict()
+        
+        assert result["rows"] == 300
+        for name in ("Дата", "Артикул"):
+            assert result["columns"][name] == full["columns"][name]
+        for field in ("count", "min", "max", "mean", "std", "sum", "distinct"):
+            assert result["columns"]["Сумма"][field] == full["columns"]["Сумма"][field]
+
+class TestResponseEncoding:
+    """Test Accept-header negotiation of read response encodings"""
+    
+    def test_negotiate(self):
+        """Test that the first supported media type wins and JSON is the default"""
+        from agents.report_reader_agent.response_encoding import negotiate
+        
+        assert negotiate(None) == "json"
+        assert negotiate("text/html, application/vnd.apache.arrow.stream") == "arrow"
+        assert negotiate("application/x-msgpack;q=0.9, application/json") == "msgpack"
+        assert negotiate("application/xml") == "json"
+    
+    def test_arrow_envelope(self):
+        """Test that Arrow responses carry rows as columns and the rest as metadata"""
+        import json
+        import pyarrow as pa
+        from agents.report_reader_agent.response_encoding import encode_arrow
+        
+        df = pd.DataFrame({"Артикул": ["A", None], "Сумма": [1.5, float("nan")]})
+        content = encode_arrow(df, {"status": "success", "data": {"rows": 2}, "warnings": []})
+        
+        table = pa.ipc.open_stream(content).read_all()
+        assert table.to_pydict() == {"Артикул": ["A", None], "Сумма": [1.5, None]}
+        assert json.loads(table.schema.metadata[b"envelope"])["data"] == {"rows": 2}
+
+class TestHandles:
+    """Test the open workbook handle registry"""
+    
+    def test_idle_expiry_and_bound(self):
+        """Test that idle handles expire and the least recently used is evicted"""
+        from agents.report_reader_agent.handles import HandleRegistry
+        
+        registry = HandleRegistry(idle_seconds=60, max_handles=2)
+        first = registry.open("bucket", "reports/jan.xlsx", 1, {"Продажи": "Продажи"})
+        second = registry.open("bucket", "reports/feb.xlsx", 1, {"Продажи": "Продажи"})
+        
+        assert registry.get(first.id) is first  # Now the most recently used
+        third = registry.open("bucket", "reports/mar.csv", 1, {"mar.csv": None})
+        assert registry.get(second.id) is None
+        assert third.sheet() is None and first.sheet("Продажи") == "Продажи"
+        
+        first.last_used -= 61
+        assert registry.get(first.id) is None
+        assert registry.stats()["open"] == 1
+        assert (registry.stats()["expired"], registry.stats()["evicted"]) == (1, 1)
+
+class TestNormalization:
+    """Test the manifest of upload-time normalized workbooks"""
+    
+    def test_manifest_round_trip(self, tmp_path):
+        """Test that sheet metadata survives the manifest with ISO sample dates"""
+        from agents.report_reader_agent.normalization import (
+            manifest_path, new_manifest, read_manifest, write_manifest
+        )
+        from agents.report_reader_agent.sidecar_store import LocalSidecarBackend
+        
+        backend = LocalSidecarBackend(str(tmp_path))
+        sheet = {"name": "Продажи", "rows": 2, "columns": ["Дата"],
+                 "sample_data": [{"Дата": pd.Timestamp("2024-03-01")}], "tables": []}
+        
+        assert read_manifest(backend, "bucket", "reports/a.xlsx", 7) is None
+        path = write_manifest(backend, "bucket", "reports/a.xlsx", 7,
+                              new_manifest("reports/a.xlsx", 7, 1024, [sheet]))
+        
+        assert path == manifest_path("reports/a.xlsx", 7)
+        manifest = read_manifest(backend, "bucket", "reports/a.xlsx", 7)
+        assert manifest["file_size_bytes"] == 1024
+        assert manifest["sheets"][0]["sample_data"] == [{"Дата": "2024-03-01T00:00:00"}]
+
 class TestExcelReader:
     """Test Excel file reading"""
     
@@ -150,6 +1092,78 @@ class TestAPI:
             assert "data" in data
             assert "metadata" in data
     
+    def test_read_batch_mock(self):
+        """Test multi-file reads aligned on common columns"""
+        from agents.report_reader_agent.main import app
+        
+        client = TestClient(app)
+        frames = {
+            "reports/jan.xlsx": pd.DataFrame({"Артикул": ["A", "B"], "Сумма": [1, 2], "Склад": ["M", "K"]}),
+            "reports/feb.xlsx": pd.DataFrame({"Артикул": ["C"], "Сумма": [3]}),
+        }
+        
+        with patch('agents.report_reader_agent.main.load_batch_item') as mock_load:
+            mock_load.side_effect = lambda item, bucket, columns: frames[item.file_path]
+            
+            response = client.post(
+                "/read/batch",
+                json={"request": {
+                    "files": [{"file_path": "reports/jan.xlsx", "label": "Январь"},
+                              {"file_path": "reports/feb.xlsx", "label": "Февраль"}],
+                    "concat": True
+                }}
+            )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["common_columns"] == ["Артикул", "Сумма"]
+        assert data["files"][0]["extra_columns"] == ["Склад"]
+        assert data["combined"]["rows_by_source"] == {"Январь": 2, "Февраль": 1}
+        assert [row["source"] for row in data["combined"]["data"]] == ["Январь", "Январь", "Февраль"]
+    
+    def test_analyze_overview_mock(self):
+        """Test metadata plus first-sheet preview in one call, preview skipped with a profile"""
+        from agents.report_reader_agent.main import app, FileMetadata
+        
+        client = TestClient(app)
+        metadata = FileMetadata(sheets_count=2, sheet_names=["Продажи", "Возвраты"],
+                                file_size_bytes=1024, file_path="reports/oct.xlsx",
+                                top_sheets_summary=[])
+        sheet = pd.DataFrame({"Товар": ["A", "B"], "Выручка": [100.0, 250.5]})
+        
+        with patch('agents.report_reader_agent.main.load_file_metadata', return_value=metadata), \
+             patch('agents.report_reader_agent.main.load_sheet', return_value=sheet), \
+             patch('agents.report_reader_agent.main.get_file_generation', return_value=7), \
+             patch('agents.report_reader_agent.main.load_file_profile') as mock_profile:
+            mock_profile.return_value = None
+            first = client.post("/analyze/overview", json={"file_path": "reports/oct.xlsx"})
+            mock_profile.return_value = {"sheets": [{"name": "Продажи", "rows": 2}]}
+            profiled = client.post("/analyze/overview", json={"file_path": "reports/oct.xlsx"})
+        
+        assert first.status_code == 200
+        data = first.json()
+        assert data["generation"] == 7
+        assert data["metadata"]["sheet_names"] == ["Продажи", "Возвраты"]
+        assert data["profile"] is None
+        assert data["preview"]["data"]["rows"] == 2
+        assert data["preview"]["data"]["columns"] == ["Товар", "Выручка"]
+        assert profiled.json()["preview"] is None
+    
+    def test_read_rows_rejects_bad_cursor(self):
+        """Test a cursor with a mistyped field is a client error"""
+        from agents.report_reader_agent.main import app
+        from agents.report_reader_agent.row_stream import encode_cursor
+        
+        client = TestClient(app)
+        cursor = encode_cursor({"file_path": "reports/a.xlsx", "bucket": "reports",
+                                "sheet_name": 0, "header_row": 0, "offset": 0,
+                                "limit": "all", "format": "ndjson"})
+        
+        response = client.post("/read/sheet/rows", json={"cursor": cursor})
+        
+        assert response.status_code == 400
+        assert "limit" in response.json()["detail"]
+    
     def test_read_sheets_mock(self):
         """Test Google Sheets reading"""
         from agents.report_reader_agent.main import app